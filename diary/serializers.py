@@ -3,7 +3,12 @@ from .models import Entry, Attachment, MapView, Mood
 from interests.models import Interest
 from user_service.services.rabbitmq import RabbitMQClient, Queues
 from interests.services.interest_resolver import ensure_grant_override
-from newsfeed.services.link_preview import extract_first_url_from_html, get_preview
+from newsfeed.services.link_preview import extract_first_url_from_html
+from newsfeed.services.link_preview_worker import get_preview_or_enqueue
+
+
+def entry_link_url(entry):
+    return extract_first_url_from_html(entry.content or "")
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -54,8 +59,16 @@ class EntrySerializer(serializers.ModelSerializer):
     link_preview = serializers.SerializerMethodField()
 
     def get_link_preview(self, obj):
-        url = extract_first_url_from_html(obj.content or "")
-        return get_preview(url) if url else None
+        previews = self.context.get("link_previews")
+        if previews is not None and obj.pk in previews:
+            return previews[obj.pk]
+
+        url = entry_link_url(obj)
+        return (
+            get_preview_or_enqueue(url, self.context.get("viewer_entity_id"))
+            if url
+            else None
+        )
 
     class Meta:
         model = Entry
@@ -80,13 +93,7 @@ class EntrySerializer(serializers.ModelSerializer):
     def _handle_tags(self, entry, tag_names):
         if tag_names is None:
             return
-        tags = []
-        for name in tag_names:
-            cleaned = name.strip()
-            if not cleaned:
-                continue
-            tag, _ = Interest.objects.get_or_create_by_name(cleaned)
-            tags.append(tag)
+        tags = Interest.objects.get_or_create_many_by_name(tag_names)
         entry.tags.set(tags)
         if tags:
             tag_ids = [tag.id for tag in tags]
@@ -55,7 +55,7 @@ class UnifiedTagCreationTests(TestCase):
     EntrySerializer._handle_tags used Tag.objects.get_or_create(name=...)
     while DiaryCRUDView.post used a separate bulk_create(ignore_conflicts=
     True) path with weaker dedup. Both should now resolve identically via
-    Interest.objects.get_or_create_by_name.
+    Interest.objects.get_or_create_many_by_name.
     """
 
     def setUp(self):
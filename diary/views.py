@@ -14,7 +14,8 @@ from interests.services.interest_resolver import ensure_grant_override
 from interests.views import InterestListView
 from user.models import Account
 from django.shortcuts import get_object_or_404
-from .serializers import EntrySerializer, TagSerializer, MoodSerializer
+from .serializers import EntrySerializer, TagSerializer, MoodSerializer, entry_link_url
+from newsfeed.services.link_preview_worker import link_preview_context
 from django.utils import timezone
 from datetime import datetime
 from entity.services.follows import get_profile_relationship_state
@@ -144,7 +145,13 @@ class DiaryListView(APIView):
                 queryset, request, view=self
             )
 
-            serialized_result = EntrySerializer(paginated_queryset, many=True)
+            serialized_result = EntrySerializer(
+                paginated_queryset,
+                many=True,
+                context=link_preview_context(
+                    paginated_queryset, entry_link_url, viewer_entity_id=user.entity_id
+                ),
+            )
             data = paginator.get_paginated_response(serialized_result.data)
 
             return data
@@ -207,7 +214,9 @@ class DiaryCRUDView(APIView):
                 queryset, Q(account=user) | Q(is_private=False), id=entry_id
             )
 
-            serialized_response = EntrySerializer(final_query)
+            serialized_response = EntrySerializer(
+                final_query, context={"viewer_entity_id": user.entity_id}
+            )
 
             return Response(serialized_response.data, status=status.HTTP_200_OK)
         except Exception as ex:
@@ -245,10 +254,9 @@ class DiaryCRUDView(APIView):
                 # ignore_conflicts=True) path with weaker dedup than
                 # EntrySerializer's get_or_create, and trusted the client's
                 # is_new flag even though it can be stale by request time.
-                combined_tags = [
-                    Interest.objects.get_or_create_by_name(tag["name"])[0]
-                    for tag in tags
-                ]
+                combined_tags = Interest.objects.get_or_create_many_by_name(
+                    [tag["name"] for tag in tags]
+                )
 
                 entry_mood = None
 
@@ -5,6 +5,8 @@ The newsfeed is fan-out-on-write: NewsfeedIndex rows are keyed by `bucket`
 (the VIEWER's entity id), and fetch_friends_posts() reads that bucket. So
 "whose posts land in my feed" is decided entirely by who writes into my
 bucket - which is now the FOLLOW graph rather than the connection graph.
+The exception is an author with a very large following (is_pull_author):
+their posts are read from their own AuthorTimeline at feed time instead.
 
 Following is directional and a superset of connecting (sending a contact
 request and accepting one both auto-follow), so a connection still fills the
@@ -17,12 +19,17 @@ helpers import back into user.models, so a module-scope import would close a
 cycle.
 """
 
-from django.db.models import Q, F
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count, Q, F
 
 from entity.models import Follow, Connection, Entity
 from user_service.services.rabbitmq import RabbitMQClient, Queues
 from ..utils import entity_side_is_visible
 
+logger = logging.getLogger(__name__)
+
 
 def _publish_backfill(follower, followee):
     """
@@ -70,6 +77,9 @@ def get_follower_ids(entity_id, limit=500):
     Pending (status=False) follows are excluded: a follow request that has
     not been approved yet must not seed the requester's feed, which is the
     whole point of gating a private profile.
+
+    An author for whom is_pull_author() holds should not be fanned out at
+    all - their followers read the AuthorTimeline instead.
     """
     qs = (
         Follow.objects.filter(followee_id=entity_id, status=True)
@@ -81,6 +91,75 @@ def get_follower_ids(entity_id, limit=500):
     return [str(fid) for fid in qs]
 
 
+# Above this many accepted followers an author is read on the pull side
+# (their AuthorTimeline) instead of fanned out - see newsfeed.models.
+# AuthorTimeline. Matches get_follower_ids' default cap, so no author is both
+# pushed and truncated.
+PULL_AUTHOR_FOLLOWER_THRESHOLD = 500
+PULL_AUTHORS_CACHE_KEY = "chatterloop:feed:pull_authors"
+PULL_AUTHORS_TTL = 60 * 10
+# Pulled timelines one friends-feed page merges at most. Their first slices
+# are read concurrently (feed_day_reads.read_timeline_heads), so this only
+# bounds a pathological follow list; past it the least interacted-with are
+# left out, and that is logged.
+MAX_PULLED_AUTHORS = 1000
+
+
+def get_pull_author_ids():
+    """
+    Entity ids of every author above PULL_AUTHOR_FOLLOWER_THRESHOLD.
+
+    One GROUP BY over accepted follows, cached for PULL_AUTHORS_TTL: an
+    author crossing the threshold moves to the pull side within minutes,
+    which the timeline (written for every post) makes seamless.
+    """
+    author_ids = cache.get(PULL_AUTHORS_CACHE_KEY)
+    if author_ids is None:
+        author_ids = [
+            str(author_id)
+            for author_id in Follow.objects.filter(status=True)
+            .values("followee_id")
+            .annotate(follower_count=Count("follow_id"))
+            .filter(follower_count__gt=PULL_AUTHOR_FOLLOWER_THRESHOLD)
+            .values_list("followee_id", flat=True)
+        ]
+        cache.set(PULL_AUTHORS_CACHE_KEY, author_ids, PULL_AUTHORS_TTL)
+    return set(author_ids)
+
+
+def is_pull_author(entity_id):
+    """True when `entity_id`'s posts are pulled rather than fanned out."""
+    return str(entity_id) in get_pull_author_ids()
+
+
+def get_followed_pull_author_ids(entity_id, limit=MAX_PULLED_AUTHORS):
+    """
+    The pull authors `entity_id` follows (accepted follows only), most
+    interacted-with first - the timelines fetch_friends_posts merges in.
+    At most `limit` of them; a follow list longer than that is logged.
+    """
+    pull_author_ids = get_pull_author_ids()
+    if not pull_author_ids:
+        return []
+
+    followed = [
+        str(followee_id)
+        for followee_id in Follow.objects.filter(
+            follower_id=entity_id, status=True, followee_id__in=pull_author_ids
+        )
+        .order_by("-interaction_score", "-last_interaction_at")
+        .values_list("followee_id", flat=True)[: limit + 1]
+    ]
+    if len(followed) > limit:
+        logger.warning(
+            "%s follows more than %s pull authors; the rest are left out of "
+            "their friends feed",
+            entity_id,
+            limit,
+        )
+    return followed[:limit]
+
+
 def entity_is_private(entity):
     """
     True only for a private USER profile.
@@ -261,6 +340,11 @@ def approve_follow_request(follower, followee):
     if not updated:
         return False
 
+    # A queryset update sends no post_save, so the follower's cached feed
+    # pages are retired here rather than in newsfeed/signals.py.
+    from newsfeed.services.feed_page_cache import invalidate_viewers
+
+    invalidate_viewers([follower.id])
     _publish_backfill(follower, followee)
 
     return True
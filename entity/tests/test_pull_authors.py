@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from entity.models import Entity, Follow
+from entity.services import follows
+
+
+class FollowedPullAuthorsTests(TestCase):
+    def setUp(self):
+        self.viewer = Entity.objects.create(type="user")
+        self.authors = []
+        for score in (30.0, 20.0, 10.0):
+            author = Entity.objects.create(type="user")
+            Follow.objects.create(
+                follower=self.viewer, followee=author, interaction_score=score
+            )
+            self.authors.append(str(author.id))
+        patcher = mock.patch.object(
+            follows, "get_pull_author_ids", return_value=set(self.authors)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_most_interacted_with_first(self):
+        with self.assertNoLogs(follows.logger, "WARNING"):
+            followed = follows.get_followed_pull_author_ids(self.viewer.id)
+
+        self.assertEqual(followed, self.authors)
+
+    def test_truncation_is_logged(self):
+        with self.assertLogs(follows.logger, "WARNING") as logs:
+            followed = follows.get_followed_pull_author_ids(self.viewer.id, limit=2)
+
+        self.assertEqual(followed, self.authors[:2])
+        self.assertIn("more than 2 pull authors", logs.output[0])
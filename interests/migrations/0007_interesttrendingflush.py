@@ -0,0 +1,21 @@
+# Generated by Django 5.2.15 on 2026-10-18 00:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interests', '0006_interests_own_physical_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestTrendingFlush',
+            fields=[
+                ('batch_id', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('applied_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.15 on 2026-10-18 00:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interests', '0007_interesttrendingflush'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interesttrendingscore',
+            name='hourly_score',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='interesttrendingscore',
+            name='daily_score',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='interesttrendingscore',
+            name='decayed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
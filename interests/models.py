@@ -29,6 +29,47 @@ class InterestManager(models.Manager):
         normalized = cleaned.lower()
         return self.get_or_create(normalized_name=normalized, defaults={"name": cleaned})
 
+    def get_or_create_many_by_name(self, raw_names):
+        """
+        get_or_create_by_name for a whole tag list at once: one query for the
+        names that already exist, one bulk insert for the rest and one query
+        to read those back - instead of a get_or_create round trip per tag.
+        Blank names are skipped. Returns the Interests in the order of their
+        first appearance in `raw_names`, one per distinct normalized name.
+        """
+        cleaned_by_normalized = {}
+        for raw_name in raw_names:
+            cleaned = raw_name.strip()
+            if cleaned:
+                cleaned_by_normalized.setdefault(cleaned.lower(), cleaned)
+        if not cleaned_by_normalized:
+            return []
+
+        found = {
+            interest.normalized_name: interest
+            for interest in self.filter(normalized_name__in=list(cleaned_by_normalized))
+        }
+        missing = [name for name in cleaned_by_normalized if name not in found]
+        if missing:
+            # bulk_create skips save(), so normalized_name is set here. A
+            # concurrent insert of the same name wins; it is read back below.
+            self.bulk_create(
+                [
+                    self.model(name=cleaned_by_normalized[name], normalized_name=name)
+                    for name in missing
+                ],
+                ignore_conflicts=True,
+            )
+            for interest in self.filter(normalized_name__in=missing):
+                found[interest.normalized_name] = interest
+
+            # bulk_create sends no post_save, so the taxonomy is told here.
+            from interests.services.taxonomy import invalidate_taxonomy
+
+            invalidate_taxonomy()
+
+        return [found[name] for name in cleaned_by_normalized if name in found]
+
 
 class Interest(models.Model):
     """
@@ -191,6 +232,25 @@ class InterestTrendingScore(models.Model):
     """
 
     interest = models.OneToOneField(Interest, on_delete=models.CASCADE, related_name="trending_score")
+    # All-time: every delta ever, never decayed.
     score = models.FloatField(default=0.0, db_index=True)
+    # Exponentially decayed over an hour / a day half-life, as of
+    # decayed_at - see interests.services.trending_decay.
+    hourly_score = models.FloatField(default=0.0, db_index=True)
+    daily_score = models.FloatField(default=0.0, db_index=True)
+    decayed_at = models.DateTimeField(default=now)
     recent_activity_boost = models.FloatField(default=1.0)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class InterestTrendingFlush(models.Model):
+    """
+    Ledger of write-behind batches already applied to InterestTrendingScore
+    (see interests.services.trending_buffer). Written in the same transaction
+    as the batch itself, so a flush that dies after committing but before
+    clearing its Redis batch is recognised on retry and not applied twice.
+    Pruned after TRENDING_FLUSH_LEDGER_TTL.
+    """
+
+    batch_id = models.CharField(max_length=40, primary_key=True)
+    applied_at = models.DateTimeField(default=now, db_index=True)
@@ -1,7 +1,9 @@
-from django.db import transaction
-from django.db.models import F
+from django.db import connection
+from django.utils.timezone import now
 
-from interests.models import EntityInterestAffinity, InterestTrendingScore
+from interests.models import EntityInterestAffinity
+from interests.services.category_cache import invalidate_interest_categories
+from interests.services.trending_buffer import record_trending_deltas
 
 # Mirrors newsfeed.helpers.query_functions.INTERACTION_WEIGHTS - kept as its
 # own copy here (not imported from newsfeed) since interests must not
@@ -35,23 +37,68 @@ def bump_interest_affinity(entity_id, interest_ids, action, is_decrease):
     event, since both are driven by identical inputs and only differ in
     which axis they aggregate along.
     """
-    weight = INTERACTION_WEIGHTS.get(action, 0.0)
-    if weight == 0.0:
-        return
-    interest_ids = set(interest_ids)
-    if not interest_ids:
+    bump_interest_affinities(entity_id, [(interest_ids, action, is_decrease)])
+
+
+def bump_interest_affinities(entity_id, events):
+    """
+    bump_interest_affinity for many engagement events by the same entity at
+    once - `events` is an iterable of (interest_ids, action, is_decrease).
+
+    The deltas are summed per interest first and applied with one
+    INSERT ... ON CONFLICT DO UPDATE, so a viewcache of 30 posts costs one
+    statement rather than a locked get_or_create and an UPDATE per post per
+    interest. The trending side is write-behind (see trending_buffer): the
+    one global row per interest is too hot to lock from every request.
+
+    Python side only: its one caller, save_viewcache_engagements, is not
+    called in this repo. NewsfeedView publishes SAVE_VIEWCACHE_ENGAGEMENTS
+    instead, and the Go worker's handler still bumps per view.
+    """
+    deltas = {}
+    for interest_ids, action, is_decrease in events:
+        weight = INTERACTION_WEIGHTS.get(action, 0.0)
+        if weight == 0.0:
+            continue
+        delta = -weight if is_decrease else weight
+        for interest_id in set(interest_ids):
+            deltas[interest_id] = deltas.get(interest_id, 0.0) + delta
+
+    # Sorted so two concurrent batches lock shared rows in the same order.
+    rows = sorted(
+        (interest_id, delta) for interest_id, delta in deltas.items() if delta
+    )
+    if not rows:
         return
 
-    delta = -weight if is_decrease else weight
+    table = connection.ops.quote_name(EntityInterestAffinity._meta.db_table)
+    bumped_at = now()
+    params = []
+    for interest_id, delta in rows:
+        params += [entity_id, interest_id, delta, bumped_at]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} "
+            f"(entity_id, interest_id, score, last_bumped_at) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))} "
+            f"ON CONFLICT (entity_id, interest_id) DO UPDATE SET "
+            f"score = {table}.score + EXCLUDED.score, "
+            f"last_bumped_at = EXCLUDED.last_bumped_at "
+            f"RETURNING interest_id, score",
+            params,
+        )
+        bumped = cursor.fetchall()
+
+    # Crossing the implicit-grant threshold either way changes which
+    # categories this entity's feed reads trending posts from.
+    from interests.services.interest_resolver import IMPLICIT_GRANT_THRESHOLD
 
-    with transaction.atomic():
-        for interest_id in interest_ids:
-            obj, _ = EntityInterestAffinity.objects.select_for_update().get_or_create(
-                entity_id=entity_id, interest_id=interest_id
-            )
-            EntityInterestAffinity.objects.filter(pk=obj.pk).update(score=F("score") + delta)
+    delta_by_id = {str(interest_id): delta for interest_id, delta in rows}
+    if any(
+        (score >= IMPLICIT_GRANT_THRESHOLD)
+        != (score - delta_by_id[str(interest_id)] >= IMPLICIT_GRANT_THRESHOLD)
+        for interest_id, score in bumped
+    ):
+        invalidate_interest_categories(entity_id)
 
-            trending, _ = InterestTrendingScore.objects.select_for_update().get_or_create(
-                interest_id=interest_id
-            )
-            InterestTrendingScore.objects.filter(pk=trending.pk).update(score=F("score") + delta)
+    record_trending_deltas(rows)
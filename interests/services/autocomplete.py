@@ -0,0 +1,140 @@
+"""
+In-process typeahead index over the interest vocabulary, for
+InterestListView (the diary tag picker and the post interest picker).
+
+The view used to run `name__icontains` over the whole table ordered by id,
+a COUNT for the paginator and a third query for `is_new` - on every
+keystroke. Now it answers from an index built off the taxonomy snapshot
+(services/taxonomy.py), so a keystroke costs no queries at all:
+
+- Every word of every normalized name contributes one entry, the name from
+  that word on, to one sorted list. A search is a bisect for the query
+  string - prefix matches on the whole name or on any later word ("bik"
+  finds "mountain biking"), in O(log n) plus the matches.
+- Matches are ranked whole-name prefixes first, then by today's trending
+  score (InterestTrendingScore.daily_score, then all-time score), then
+  shorter names first.
+- is_new is a dict lookup of the normalized query in the same snapshot.
+
+The index is rebuilt whenever the snapshot is, and the scores it ranks by
+are re-read at most every AUTOCOMPLETE_SCORE_TTL seconds - about as often
+as trending_decay moves them.
+"""
+
+import bisect
+import threading
+import time
+
+from interests.services.taxonomy import get_taxonomy
+
+AUTOCOMPLETE_SCORE_TTL = 60 * 5
+
+_index = None
+_scores = {}
+_scores_read_at = 0.0
+_lock = threading.Lock()
+
+
+class AutocompleteIndex:
+    __slots__ = ("taxonomy", "keys", "ids", "by_id")
+
+    def __init__(self, taxonomy):
+        self.taxonomy = taxonomy
+        entries = []
+        for interest_id, normalized_name in taxonomy.normalized_names.items():
+            start = 0
+            for word in normalized_name.split(" "):
+                if word:
+                    entries.append((normalized_name[start:], interest_id))
+                start += len(word) + 1
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [interest_id for _, interest_id in entries]
+        self.by_id = sorted(taxonomy.names)
+
+    def matching_ids(self, query):
+        """Ids of every interest with a word starting with `query`."""
+        start = bisect.bisect_left(self.keys, query)
+        # Every key with `query` as a prefix sorts below query + U+10FFFF.
+        end = bisect.bisect_left(self.keys, query + "\U0010ffff", lo=start)
+        return set(self.ids[start:end])
+
+
+def _get_index():
+    global _index
+
+    taxonomy = get_taxonomy()
+    index = _index
+    if index is None or index.taxonomy is not taxonomy:
+        with _lock:
+            index = _index
+            if index is None or index.taxonomy is not taxonomy:
+                index = _index = AutocompleteIndex(taxonomy)
+    return index
+
+
+def _get_scores():
+    """interest_id -> (daily_score, score), re-read every AUTOCOMPLETE_SCORE_TTL."""
+    global _scores, _scores_read_at
+
+    if time.monotonic() - _scores_read_at >= AUTOCOMPLETE_SCORE_TTL:
+        from interests.models import InterestTrendingScore
+
+        with _lock:
+            if time.monotonic() - _scores_read_at >= AUTOCOMPLETE_SCORE_TTL:
+                _scores = {
+                    interest_id: (daily_score, score)
+                    for interest_id, daily_score, score in (
+                        InterestTrendingScore.objects.values_list(
+                            "interest_id", "daily_score", "score"
+                        )
+                    )
+                }
+                _scores_read_at = time.monotonic()
+    return _scores
+
+
+class SearchResults:
+    """
+    Ranked interest ids that render as {"id", "name"} only when sliced, so
+    paginating a short query's thousands of matches builds one page.
+    """
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self, ids, names):
+        self.ids = ids
+        self.names = names
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [{"id": i, "name": self.names[i]} for i in self.ids[item]]
+        return {"id": self.ids[item], "name": self.names[self.ids[item]]}
+
+
+def search_interests(search):
+    """
+    (results, is_new) for a typeahead query: a ranked SearchResults (every
+    interest in id order when there is no query), and whether the query
+    names no existing interest.
+    """
+    index = _get_index()
+    taxonomy = index.taxonomy
+    query = (search or "").strip().lower()
+    if not query:
+        return SearchResults(index.by_id, taxonomy.names), False
+
+    scores = _get_scores()
+    names = taxonomy.normalized_names
+
+    def rank(interest_id):
+        daily_score, score = scores.get(interest_id, (0.0, 0.0))
+        name = names[interest_id]
+        return (not name.startswith(query), -daily_score, -score, len(name), name)
+
+    matches = sorted(index.matching_ids(query), key=rank)
+    is_new = query not in taxonomy.ids_by_normalized_name
+    return SearchResults(matches, taxonomy.names), is_new
@@ -0,0 +1,80 @@
+"""
+Per-entity cache of the interest categories a feed page reads trending
+posts from (newsfeed's resolved_interest_categories).
+
+Resolving them takes a query each over the entity's grants, denies and
+high-affinity interests, on every feed page, for a set that changes only
+when the entity edits an override, tags a diary entry, or an affinity bump
+carries an interest across IMPLICIT_GRANT_THRESHOLD.
+
+Versioned rather than deleted on write: each entity has a version counter
+next to its cached set, and a read is one get_many of both. A write bumps
+the version (on commit), so a set built from the old rows - even one stored
+after the bump by a read that raced it - no longer matches and is rebuilt.
+The set also carries a few trending-today interests, so entries expire
+after INTEREST_CATEGORIES_TTL regardless.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+INTEREST_CATEGORIES_TTL = 60 * 5
+# Outlives every entry it can invalidate by a wide margin; a version that
+# does expire only reads back as 0, which no live entry carries any more.
+INTEREST_CATEGORIES_VERSION_TTL = 60 * 60 * 24
+
+
+def _categories_key(entity_id):
+    return f"chatterloop:interestcats:v1:{entity_id}"
+
+
+def _version_key(entity_id):
+    return f"chatterloop:interestcats:v1:version:{entity_id}"
+
+
+def get_or_build_categories(entity_id, build):
+    """The cached category list for `entity_id`, or `build()`'s, cached."""
+    categories_key = _categories_key(entity_id)
+    version_key = _version_key(entity_id)
+    try:
+        cached = cache.get_many([categories_key, version_key])
+    except Exception:
+        logger.warning("Interest category cache read failed (non-fatal)", exc_info=True)
+        cached = {}
+
+    version = cached.get(version_key, 0)
+    entry = cached.get(categories_key)
+    if entry is not None and entry["version"] == version:
+        return entry["categories"]
+
+    categories = build()
+    try:
+        cache.set(
+            categories_key,
+            {"version": version, "categories": categories},
+            timeout=INTEREST_CATEGORIES_TTL,
+        )
+    except Exception:
+        logger.warning("Interest category cache write failed (non-fatal)", exc_info=True)
+    return categories
+
+
+def invalidate_interest_categories(entity_id):
+    """Retires `entity_id`'s cached categories once the current transaction
+    commits."""
+
+    def _bump():
+        key = _version_key(entity_id)
+        try:
+            if not cache.add(key, 1, timeout=INTEREST_CATEGORIES_VERSION_TTL):
+                cache.incr(key)
+        except Exception:
+            logger.warning(
+                "Interest category invalidation failed for %s", entity_id, exc_info=True
+            )
+
+    transaction.on_commit(_bump)
@@ -2,42 +2,22 @@ from django.db.models import Q
 from django.utils.timezone import now
 
 from entity.permissions import PermissionEffect
-from interests.models import EntityInterest, Interest, MAX_INTEREST_DEPTH
-from interests.services.affinity import get_affinity_score
+from interests.models import EntityInterest, EntityInterestAffinity, Interest
+from interests.services.category_cache import invalidate_interest_categories
+from interests.services.taxonomy import get_taxonomy
 
 # Tuned as "half of a strong signal" - mirrors the NEW_CONNECTION weight
 # (10.0) in newsfeed's INTERACTION_WEIGHTS table used for affinity bumps.
 IMPLICIT_GRANT_THRESHOLD = 5.0
 
 
-def _fetch_with_ancestors(interest):
-    """One query, not N sequential .parent hops - chains select_related
-    paths up to MAX_INTEREST_DEPTH so the whole (shallow) ancestor chain
-    comes back in a single round trip."""
-    paths = []
-    path = "parent"
-    for _ in range(MAX_INTEREST_DEPTH):
-        paths.append(path)
-        path += "__parent"
-    return Interest.objects.select_related(*paths).get(pk=interest.pk)
-
-
-def _ancestor_chain(interest):
-    node = _fetch_with_ancestors(interest)
-    chain = []
-    for _ in range(MAX_INTEREST_DEPTH):
-        if node is None:
-            break
-        chain.append(node)
-        node = node.parent
-    return chain
-
-
-def _active_override(entity, interest):
-    return (
-        EntityInterest.objects.filter(entity=entity, interest=interest)
+def _active_overrides(entity, interest_ids):
+    """interest_id -> effect of every unexpired override `entity` has on
+    `interest_ids`, in one query."""
+    return dict(
+        EntityInterest.objects.filter(entity=entity, interest_id__in=interest_ids)
         .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now()))
-        .first()
+        .values_list("interest_id", "effect")
     )
 
 
@@ -64,14 +44,63 @@ def resolve_interest(entity, interest):
     if entity is None or interest is None:
         return ("neutral", None)
 
-    for node in _ancestor_chain(interest):
-        override = _active_override(entity, node)
-        if override is not None:
-            return (override.effect, node)
+    effect, matched_id = resolve_interests(entity, [interest.pk])[interest.pk]
+    if matched_id is None or matched_id == interest.pk:
+        return (effect, interest if matched_id is not None else None)
+    return (effect, Interest.objects.get(pk=matched_id))
 
-    if get_affinity_score(entity, interest) >= IMPLICIT_GRANT_THRESHOLD:
-        return ("grant", None)
-    return ("neutral", None)
+
+def resolve_interests(entity, interest_ids):
+    """
+    resolve_interest for many interests at once, e.g. every interest on a
+    page of posts. The ancestor chains come from the in-memory taxonomy
+    snapshot (services/taxonomy.py), and the entity's overrides and
+    affinities are read in one query each, so the cost does not grow with
+    the number of interests or the depth of the tree.
+
+    Returns interest_id -> (effect, matched_interest_id), with the same
+    meaning as resolve_interest's result but the matched interest as an id.
+    An interest that no longer exists resolves to neutral.
+    """
+    interest_ids = list(dict.fromkeys(interest_ids))
+    if entity is None:
+        return {interest_id: ("neutral", None) for interest_id in interest_ids}
+
+    taxonomy = get_taxonomy(require_ids=interest_ids)
+    chains = {
+        interest_id: taxonomy.ancestors(interest_id)
+        for interest_id in interest_ids
+        if interest_id in taxonomy
+    }
+    overrides = _active_overrides(
+        entity, {node for chain in chains.values() for node in chain}
+    )
+    matches = {
+        interest_id: next((node for node in chain if node in overrides), None)
+        for interest_id, chain in chains.items()
+    }
+
+    unmatched = [interest_id for interest_id, node in matches.items() if node is None]
+    affinities = (
+        dict(
+            EntityInterestAffinity.objects.filter(
+                entity=entity, interest_id__in=unmatched
+            ).values_list("interest_id", "score")
+        )
+        if unmatched
+        else {}
+    )
+
+    resolved = {}
+    for interest_id in interest_ids:
+        node = matches.get(interest_id)
+        if node is not None:
+            resolved[interest_id] = (overrides[node], node)
+        elif affinities.get(interest_id, 0.0) >= IMPLICIT_GRANT_THRESHOLD:
+            resolved[interest_id] = ("grant", None)
+        else:
+            resolved[interest_id] = ("neutral", None)
+    return resolved
 
 
 def ensure_grant_override(entity_id, interest_ids):
@@ -89,9 +118,13 @@ def ensure_grant_override(entity_id, interest_ids):
     elsewhere, re-tagging a diary entry with it doesn't silently flip that
     back to a grant.
     """
+    created_any = False
     for interest_id in set(interest_ids):
-        EntityInterest.objects.get_or_create(
+        _, created = EntityInterest.objects.get_or_create(
             entity_id=entity_id,
             interest_id=interest_id,
             defaults={"effect": PermissionEffect.GRANT, "created_by_id": entity_id},
         )
+        created_any = created_any or created
+    if created_any:
+        invalidate_interest_categories(entity_id)
@@ -0,0 +1,123 @@
+"""
+Process-local snapshot of the Interest tree: every interest's parent, name
+and normalized name, so ancestor walks (interest_resolver.resolve_interests)
+cost no queries at all.
+
+The tree is small and edited rarely, so each process holds all of it and
+rebuilds it in one query when it changes. Changes are tracked by a version
+number in the shared cache, bumped on every Interest save or delete
+(interests/signals.py) and on bulk creation. A process compares its
+snapshot's version against the shared one at most every
+TAXONOMY_CHECK_INTERVAL seconds; writes made in this process drop its own
+snapshot as soon as they commit. A lookup for an interest the snapshot does
+not have yet - created elsewhere within the interval - rebuilds it then
+and there.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from interests.models import MAX_INTEREST_DEPTH
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_VERSION_KEY = "chatterloop:interests:taxonomy:version"
+TAXONOMY_CHECK_INTERVAL = 5
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+class TaxonomySnapshot:
+    """The Interest tree as of `version`. Read-only once built."""
+
+    __slots__ = ("version", "parents", "names", "normalized_names", "ids_by_normalized_name")
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.parents = {}
+        self.names = {}
+        self.normalized_names = {}
+        self.ids_by_normalized_name = {}
+        for interest_id, parent_id, name, normalized_name in rows:
+            self.parents[interest_id] = parent_id
+            self.names[interest_id] = name
+            self.normalized_names[interest_id] = normalized_name
+            self.ids_by_normalized_name[normalized_name] = interest_id
+
+    def __contains__(self, interest_id):
+        return interest_id in self.parents
+
+    def ancestors(self, interest_id):
+        """`interest_id` and its ancestors, closest first, at most
+        MAX_INTEREST_DEPTH long - the same chain _fetch_with_ancestors reads."""
+        chain = []
+        node = interest_id
+        while node is not None and len(chain) < MAX_INTEREST_DEPTH:
+            chain.append(node)
+            node = self.parents.get(node)
+        return chain
+
+
+def _shared_version():
+    try:
+        return cache.get(TAXONOMY_VERSION_KEY, 0)
+    except Exception:
+        logger.warning("Taxonomy version read failed (non-fatal)", exc_info=True)
+        return None
+
+
+def _build(version):
+    from interests.models import Interest
+
+    rows = Interest.objects.values_list("id", "parent_id", "name", "normalized_name")
+    return TaxonomySnapshot(version, rows)
+
+
+def get_taxonomy(require_ids=()):
+    """
+    The current snapshot. Rebuilt if the shared version moved since it was
+    built, or if any of `require_ids` is missing from it.
+    """
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    checked = time.monotonic() - _checked_at < TAXONOMY_CHECK_INTERVAL
+    missing = snapshot is not None and any(i not in snapshot for i in require_ids)
+    if snapshot is not None and checked and not missing:
+        return snapshot
+
+    with _lock:
+        version = _shared_version()
+        snapshot = _snapshot
+        stale = snapshot is None or version is None or snapshot.version != version
+        if stale or any(i not in snapshot for i in require_ids):
+            snapshot = _snapshot = _build(version)
+        _checked_at = time.monotonic()
+    return snapshot
+
+
+def invalidate_taxonomy():
+    """
+    Once the current transaction commits, drops this process's snapshot and
+    bumps the shared version, so every other process rebuilds within
+    TAXONOMY_CHECK_INTERVAL. Not before: a process rebuilding from the old
+    rows would stamp them with the new version and keep them.
+    """
+
+    def _bump():
+        global _snapshot
+
+        _snapshot = None
+        try:
+            if not cache.add(TAXONOMY_VERSION_KEY, 1, timeout=None):
+                cache.incr(TAXONOMY_VERSION_KEY)
+        except Exception:
+            logger.warning("Taxonomy version bump failed", exc_info=True)
+
+    transaction.on_commit(_bump)
@@ -0,0 +1,231 @@
+"""
+Write-behind buffer for InterestTrendingScore.
+
+Every like, view, comment and diary tag platform-wide used to upsert the one
+InterestTrendingScore row of each interest involved, inside the request's
+transaction. A popular interest's row became a platform-wide mutex: every
+engagement touching it queued on that row lock until the request committed.
+
+Now record_trending_deltas() adds the deltas to a single Redis hash
+(interest id -> summed delta) on commit, and the first delta in a window
+schedules a flush TRENDING_FLUSH_WINDOW seconds later; a beat entry sweeps
+up anything a lost schedule left behind. The flush writes the whole hash
+back as one batched upsert.
+
+Exactly once, across worker restarts: the flush first RENAMEs the pending
+hash to an in-flight one and tags it with a batch id, atomically, so new
+deltas start a fresh hash. The batch is applied in one transaction together
+with an InterestTrendingFlush ledger row for its id, and only then is the
+in-flight hash deleted. A flush that dies before committing leaves the
+in-flight batch for the next one to retry; a flush that dies after
+committing leaves it too, but the retry finds the ledger row and just
+clears it.
+
+If Redis is unreachable the deltas are written straight to Postgres instead.
+
+Scope: only the Python bump_interest_affinity(ies) path (interests.services.
+affinity) writes through this buffer, and nothing in this repo calls it -
+views and diary publish BUMP_INTEREST_AFFINITY and SAVE_VIEWCACHE_ENGAGEMENTS
+to the Go worker, whose handlers still upsert InterestTrendingScore.score row
+by row. The hot-row contention there is unchanged until the worker records
+its deltas into PENDING_TRENDING_KEY (HINCRBYFLOAT, interest id -> delta)
+instead.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.utils.timezone import now
+
+from interests.services.trending_decay import DAY, HOUR, decay_rate
+from user_service.services.redis import RedisPubSubClient
+
+logger = logging.getLogger(__name__)
+
+TRENDING_FLUSH_WINDOW = 10
+TRENDING_FLUSH_LOCK_TTL = 60
+TRENDING_FLUSH_LEDGER_TTL = timedelta(days=1)
+
+PENDING_TRENDING_KEY = "chatterloop:interest_trending:pending"
+INFLIGHT_TRENDING_KEY = "chatterloop:interest_trending:inflight"
+FLUSH_SCHEDULED_KEY = "chatterloop:interest_trending:flush_scheduled"
+FLUSH_LOCK_KEY = "chatterloop:interest_trending:flush_lock"
+# Field of the in-flight hash holding its batch id - never an interest id.
+BATCH_ID_FIELD = "batch_id"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _decay(table):
+    """
+    SQL factor decaying a conflicting row from its decayed_at to the incoming
+    row's, at the rate given as the next parameter. The exponent is capped
+    because Postgres raises on EXP underflow rather than returning zero.
+    """
+    return (
+        f"EXP(-LEAST(%s * GREATEST(EXTRACT(EPOCH FROM "
+        f"EXCLUDED.decayed_at - {table}.decayed_at), 0), 700))"
+    )
+
+
+def apply_trending_deltas(rows, batch_id=None):
+    """
+    Adds each (interest_id, delta) in `rows` to its InterestTrendingScore,
+    creating the row if needed. Interests deleted since are skipped. With a
+    `batch_id`, records it in the ledger in the same transaction and returns
+    False without applying anything if it was already applied.
+    """
+    from interests.models import Interest, InterestTrendingFlush, InterestTrendingScore
+
+    table = connection.ops.quote_name(InterestTrendingScore._meta.db_table)
+    try:
+        with transaction.atomic():
+            if batch_id is not None:
+                InterestTrendingFlush.objects.create(batch_id=batch_id)
+            existing = set(
+                Interest.objects.filter(
+                    id__in=[interest_id for interest_id, _ in rows]
+                ).values_list("id", flat=True)
+            )
+            # Sorted so concurrent write-throughs lock shared rows in order.
+            rows = sorted(row for row in rows if row[0] in existing and row[1])
+            if not rows:
+                return True
+
+            updated_at = now()
+            params = []
+            for interest_id, delta in rows:
+                params += [interest_id, delta, delta, delta, 1.0, updated_at, updated_at]
+            # The decayed windows are brought forward to now before the delta
+            # is added, so a row is exact whenever it was last decayed. See
+            # trending_decay. decayed_at never moves backwards: a write-through
+            # stamped before a decay pass that committed first must not rewind
+            # it, or the next decay would apply that interval twice.
+            params += [decay_rate(HOUR), decay_rate(DAY)]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (interest_id, score, hourly_score, "
+                    f"daily_score, recent_activity_boost, decayed_at, updated_at) "
+                    f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(rows))} "
+                    f"ON CONFLICT (interest_id) DO UPDATE SET "
+                    f"score = {table}.score + EXCLUDED.score, "
+                    f"hourly_score = {table}.hourly_score * {_decay(table)} "
+                    f"+ EXCLUDED.hourly_score, "
+                    f"daily_score = {table}.daily_score * {_decay(table)} "
+                    f"+ EXCLUDED.daily_score, "
+                    f"decayed_at = GREATEST({table}.decayed_at, EXCLUDED.decayed_at), "
+                    f"updated_at = EXCLUDED.updated_at",
+                    params,
+                )
+    except IntegrityError:
+        if batch_id is not None and InterestTrendingFlush.objects.filter(
+            batch_id=batch_id
+        ).exists():
+            return False
+        raise
+    return True
+
+
+def _schedule_flush():
+    if cache.add(FLUSH_SCHEDULED_KEY, "1", timeout=TRENDING_FLUSH_WINDOW):
+        from interests.tasks import flush_trending_scores_task
+
+        flush_trending_scores_task.apply_async(countdown=TRENDING_FLUSH_WINDOW)
+
+
+def record_trending_deltas(rows):
+    """
+    Buffers each (interest_id, delta) in `rows` for the next flush. Recorded
+    on commit, so it only counts if the engagement it mirrors landed.
+    """
+    rows = [(interest_id, delta) for interest_id, delta in rows if delta]
+    if not rows:
+        return
+
+    def _record():
+        try:
+            pipe = RedisPubSubClient.get_redis_connection().pipeline()
+            for interest_id, delta in rows:
+                pipe.hincrbyfloat(PENDING_TRENDING_KEY, str(interest_id), delta)
+            pipe.execute()
+        except Exception:
+            logger.warning(
+                "Trending write-behind failed, writing through", exc_info=True
+            )
+            apply_trending_deltas(rows)
+            return
+
+        try:
+            _schedule_flush()
+        except Exception:
+            logger.warning("Could not schedule a trending flush", exc_info=True)
+
+    transaction.on_commit(_record)
+
+
+def _claim_batch(conn):
+    """
+    The in-flight batch left by an earlier flush, or else the pending hash
+    moved aside as a new one. Returns (batch_id, rows), or (None, []) when
+    nothing is pending.
+    """
+    if not conn.exists(INFLIGHT_TRENDING_KEY):
+        if not conn.exists(PENDING_TRENDING_KEY):
+            return None, []
+        # Only a flush - holding FLUSH_LOCK_KEY - ever removes the pending
+        # hash, so it cannot vanish between the check and the RENAME.
+        pipe = conn.pipeline(transaction=True)
+        pipe.rename(PENDING_TRENDING_KEY, INFLIGHT_TRENDING_KEY)
+        pipe.hset(INFLIGHT_TRENDING_KEY, BATCH_ID_FIELD, str(uuid.uuid4()))
+        pipe.execute()
+
+    batch = {
+        _decode(field): _decode(value)
+        for field, value in conn.hgetall(INFLIGHT_TRENDING_KEY).items()
+    }
+    batch_id = batch.pop(BATCH_ID_FIELD)
+    return batch_id, [
+        (int(interest_id), float(delta)) for interest_id, delta in batch.items()
+    ]
+
+
+def flush_trending_scores():
+    """
+    Applies every buffered delta to InterestTrendingScore. Returns the number
+    of interests written.
+    """
+    from interests.models import InterestTrendingFlush
+
+    # Released first, so a delta recorded mid-flush can schedule the next.
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    if not cache.add(FLUSH_LOCK_KEY, "1", timeout=TRENDING_FLUSH_LOCK_TTL):
+        return 0
+
+    written = 0
+    try:
+        conn = RedisPubSubClient.get_redis_connection()
+        # At most a batch left in flight by an earlier flush, then this one's.
+        for _ in range(2):
+            batch_id, rows = _claim_batch(conn)
+            if batch_id is None:
+                break
+            if apply_trending_deltas(rows, batch_id):
+                written += len(rows)
+            conn.delete(INFLIGHT_TRENDING_KEY)
+
+        InterestTrendingFlush.objects.filter(
+            applied_at__lt=now() - TRENDING_FLUSH_LEDGER_TTL
+        ).delete()
+    except Exception:
+        logger.warning(
+            "Trending flush failed, keeping its batch for the next one",
+            exc_info=True,
+        )
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return written
@@ -0,0 +1,165 @@
+"""
+Time-decayed trending windows for interests, and their materialized top-K.
+
+InterestTrendingScore.score only ever accumulates, so ranking by it is
+all-time popularity. hourly_score and daily_score are the same deltas
+decayed exponentially with an hour and a day half-life. Each stores its
+value as of the row's decayed_at; the trending flush (trending_buffer)
+decays a row up to now before adding to it, so a row is exact as of
+whenever it was last written.
+
+decay_trending_scores() runs from beat every few minutes. It walks the
+table in interest order, DECAY_CHUNK_SIZE rows at a time under row locks
+(so a concurrent flush waits rather than being overwritten), brings the
+windows of every row - including the ones nobody engages with any more -
+forward to now with NumPy, and writes them back in one
+bulk_update per chunk. It then materializes the top TRENDING_TOP_K of each
+window into the cache, which TrendingInterestsView and
+newsfeed's resolved_interest_categories read instead of ordering the table.
+
+Only the trending flush writes the decayed windows - the Go worker's bumps
+add to score alone - so the default window stays all-time until the
+TRENDING_DECAYED_WINDOWS setting is switched on (see default_window()).
+"""
+
+import logging
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+HOUR = "hour"
+DAY = "day"
+ALL_TIME = "all"
+
+TRENDING_HALF_LIVES = {HOUR: 60 * 60, DAY: 60 * 60 * 24}
+WINDOW_FIELDS = {HOUR: "hourly_score", DAY: "daily_score", ALL_TIME: "score"}
+
+TRENDING_TOP_K = 100
+DECAY_CHUNK_SIZE = 1000
+# A little over two beat intervals, so one missed pass does not empty it.
+TOP_TRENDING_TTL = 60 * 12
+
+
+def decay_rate(window):
+    """Per-second exponential decay rate of a window."""
+    return math.log(2) / TRENDING_HALF_LIVES[window]
+
+
+def default_window():
+    """
+    The window read when none is asked for: the daily one once the decayed
+    windows are written on every path, all-time until then.
+    """
+    return DAY if settings.TRENDING_DECAYED_WINDOWS else ALL_TIME
+
+
+def _top_key(window):
+    return f"chatterloop:interests:trending_top:{window}"
+
+
+def decay_scores(scores, elapsed, window):
+    """`scores` decayed over `elapsed` seconds each, as arrays."""
+    return np.asarray(scores, dtype=np.float64) * np.exp(
+        -decay_rate(window) * np.maximum(np.asarray(elapsed, dtype=np.float64), 0.0)
+    )
+
+
+def _decay_chunk(after, chunk_size):
+    from interests.models import InterestTrendingScore
+
+    with transaction.atomic():
+        rows = list(
+            InterestTrendingScore.objects.select_for_update()
+            .filter(interest_id__gt=after)
+            .order_by("interest_id")
+            .values_list("id", "interest_id", "hourly_score", "daily_score", "decayed_at")[
+                :chunk_size
+            ]
+        )
+        if not rows:
+            return None, 0
+
+        # Taken under the row locks, so no row was written after it.
+        decayed_at = now()
+        ids, interest_ids, hourly, daily, last_decayed = zip(*rows)
+        elapsed = [(decayed_at - at).total_seconds() for at in last_decayed]
+        hourly = decay_scores(hourly, elapsed, HOUR)
+        daily = decay_scores(daily, elapsed, DAY)
+
+        InterestTrendingScore.objects.bulk_update(
+            [
+                InterestTrendingScore(
+                    id=score_id,
+                    hourly_score=float(hourly_score),
+                    daily_score=float(daily_score),
+                    decayed_at=decayed_at,
+                )
+                for score_id, hourly_score, daily_score in zip(ids, hourly, daily)
+            ],
+            ["hourly_score", "daily_score", "decayed_at"],
+        )
+    return interest_ids[-1], len(rows)
+
+
+def decay_trending_scores(chunk_size=DECAY_CHUNK_SIZE):
+    """
+    Brings every row's decayed windows forward to now, then refreshes the
+    materialized top-K. Returns the number of rows decayed.
+    """
+    decayed = 0
+    after = 0
+    while True:
+        after, count = _decay_chunk(after, chunk_size)
+        decayed += count
+        if count < chunk_size:
+            break
+
+    for window in WINDOW_FIELDS:
+        refresh_top_trending(window)
+    logger.info("Decayed %s trending interest rows", decayed)
+    return decayed
+
+
+def refresh_top_trending(window):
+    """Recomputes and caches the top TRENDING_TOP_K interests of `window`."""
+    from interests.models import InterestTrendingScore
+
+    field = WINDOW_FIELDS[window]
+    rows = (
+        InterestTrendingScore.objects.filter(**{f"{field}__gt": 0})
+        .order_by(f"-{field}")
+        .values_list("interest_id", "interest__name", "interest__normalized_name", field)
+    )
+    top = [
+        {"id": interest_id, "name": name, "normalized_name": normalized_name, "score": score}
+        for interest_id, name, normalized_name, score in rows[:TRENDING_TOP_K]
+    ]
+    try:
+        cache.set(_top_key(window), top, timeout=TOP_TRENDING_TTL)
+    except Exception:
+        logger.warning("Could not cache top trending interests", exc_info=True)
+    return top
+
+
+def get_top_trending(window=None, limit=TRENDING_TOP_K):
+    """
+    The top `limit` (at most TRENDING_TOP_K) interests of `window` (default:
+    default_window()), as dicts of id, name, normalized_name and score. Read
+    from the materialized list; rebuilt from the table only if it is missing.
+    """
+    if window is None:
+        window = default_window()
+    try:
+        top = cache.get(_top_key(window))
+    except Exception:
+        logger.warning("Top trending cache read failed (non-fatal)", exc_info=True)
+        top = None
+    if top is None:
+        top = refresh_top_trending(window)
+    return top[: min(int(limit), TRENDING_TOP_K)]
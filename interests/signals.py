@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interests.models import Interest
+from interests.services.taxonomy import invalidate_taxonomy
+
+
+@receiver(post_save, sender=Interest)
+@receiver(post_delete, sender=Interest)
+def _on_interest_changed(sender, **kwargs):
+    # Deleting a parent also re-roots its children (SET_NULL), which sends
+    # no signal of its own - this covers it.
+    invalidate_taxonomy()
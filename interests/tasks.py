@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .services.trending_buffer import flush_trending_scores
+from .services.trending_decay import decay_trending_scores
+
+
+@shared_task
+def flush_trending_scores_task():
+    flush_trending_scores()
+
+
+@shared_task
+def decay_trending_scores_task():
+    decay_trending_scores()
@@ -1,8 +1,11 @@
+from unittest import mock
+
 from django.test import TestCase
 
 from entity.models import Entity
 from interests.models import EntityInterestAffinity, Interest, InterestTrendingScore
-from interests.services.affinity import bump_interest_affinity
+from interests.services import trending_buffer
+from interests.services.affinity import bump_interest_affinities, bump_interest_affinity
 
 
 def _make_entity():
@@ -13,9 +16,19 @@ class BumpInterestAffinityTests(TestCase):
     def setUp(self):
         self.entity = _make_entity()
         self.hiking = Interest.objects.create(name="Hiking")
+        # No Redis here: the trending deltas take the write-through path, so
+        # they land as soon as the bump's on_commit callbacks run.
+        patcher = mock.patch.object(
+            trending_buffer.RedisPubSubClient,
+            "get_redis_connection",
+            side_effect=ConnectionError("redis down"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_bump_creates_both_affinity_and_trending_rows(self):
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
 
         affinity = EntityInterestAffinity.objects.get(entity=self.entity, interest=self.hiking)
         trending = InterestTrendingScore.objects.get(interest=self.hiking)
@@ -24,16 +37,18 @@ class BumpInterestAffinityTests(TestCase):
         self.assertEqual(trending.score, 1.0)
 
     def test_bump_accumulates_across_actions(self):
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "COMMENT", False)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "COMMENT", False)
 
         affinity = EntityInterestAffinity.objects.get(entity=self.entity, interest=self.hiking)
         # LIKE (1.0) + COMMENT (4.0)
         self.assertEqual(affinity.score, 5.0)
 
     def test_bump_decrease_on_unlike(self):
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", True)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", True)
 
         affinity = EntityInterestAffinity.objects.get(entity=self.entity, interest=self.hiking)
         trending = InterestTrendingScore.objects.get(interest=self.hiking)
@@ -42,9 +57,35 @@ class BumpInterestAffinityTests(TestCase):
         self.assertEqual(trending.score, 0.0)
 
     def test_unknown_action_is_a_no_op(self):
-        bump_interest_affinity(self.entity.id, [self.hiking.id], "UNKNOWN_ACTION", False)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "UNKNOWN_ACTION", False)
         self.assertFalse(EntityInterestAffinity.objects.filter(entity=self.entity).exists())
 
     def test_empty_interest_ids_is_a_no_op(self):
-        bump_interest_affinity(self.entity.id, [], "LIKE", False)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [], "LIKE", False)
         self.assertFalse(EntityInterestAffinity.objects.filter(entity=self.entity).exists())
+
+    def test_batch_sums_deltas_per_interest(self):
+        cooking = Interest.objects.create(name="Cooking")
+        events = [([self.hiking.id, cooking.id], "VIEW", False)] * 30 + [
+            ([self.hiking.id], "LIKE", False)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinities(self.entity.id, events)
+
+        hiking = EntityInterestAffinity.objects.get(entity=self.entity, interest=self.hiking)
+        cooking_trending = InterestTrendingScore.objects.get(interest=cooking)
+        self.assertAlmostEqual(hiking.score, 30 * 0.1 + 1.0)
+        self.assertAlmostEqual(cooking_trending.score, 30 * 0.1)
+
+    def test_batch_adds_to_existing_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "COMMENT", False)
+            bump_interest_affinities(self.entity.id, [([self.hiking.id], "LIKE", True)])
+
+        affinity = EntityInterestAffinity.objects.get(entity=self.entity, interest=self.hiking)
+        trending = InterestTrendingScore.objects.get(interest=self.hiking)
+        self.assertEqual(affinity.score, 3.0)
+        self.assertEqual(trending.score, 3.0)
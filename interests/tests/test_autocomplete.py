@@ -0,0 +1,77 @@
+import uuid
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from entity.models import Entity
+from interests.models import Interest, InterestTrendingScore
+from interests.services import autocomplete, taxonomy
+from interests.views import InterestListView
+from user.models import Account
+
+
+class InterestAutocompleteTests(TestCase):
+    def setUp(self):
+        # Interests created inside a test transaction never commit, so the
+        # process snapshot is dropped here instead.
+        for module, name, value in (
+            (taxonomy, "_snapshot", None),
+            (autocomplete, "_index", None),
+            (autocomplete, "_scores_read_at", 0.0),
+        ):
+            patcher = mock.patch.object(module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.biking = Interest.objects.create(name="Biking")
+        self.mountain_biking = Interest.objects.create(name="Mountain Biking")
+        self.bird_watching = Interest.objects.create(name="Bird Watching")
+        self.hiking = Interest.objects.create(name="Hiking")
+
+    def _names(self, search):
+        results, _ = autocomplete.search_interests(search)
+        return [interest["name"] for interest in results[:]]
+
+    def test_matches_any_word_prefix_whole_name_prefixes_first(self):
+        self.assertEqual(self._names("bi"), ["Biking", "Bird Watching", "Mountain Biking"])
+        self.assertEqual(self._names("BIKING"), ["Biking", "Mountain Biking"])
+        self.assertEqual(self._names("iking"), [])
+
+    def test_trending_interests_rank_first(self):
+        InterestTrendingScore.objects.create(interest=self.bird_watching, daily_score=5.0)
+
+        self.assertEqual(self._names("bi")[0], "Bird Watching")
+
+    def test_is_new_and_warm_lookups_run_no_queries(self):
+        autocomplete.search_interests("warm-up")
+
+        with self.assertNumQueries(0):
+            _, is_new_existing = autocomplete.search_interests(" hiking ")
+            _, is_new_unknown = autocomplete.search_interests("hik")
+
+        self.assertFalse(is_new_existing)
+        self.assertTrue(is_new_unknown)
+
+    def test_view_paginates_the_ranked_matches(self):
+        entity = Entity.objects.create(type="user")
+        account = Account.objects.create(
+            entity=entity,
+            first_name="Test",
+            last_name="User",
+            email=f"{uuid.uuid4()}@example.com",
+            is_active=True,
+            is_verified=True,
+        )
+        request = APIRequestFactory().get("/api/interests/", {"search": "bi", "page_size": 2})
+        force_authenticate(request, user=account)
+        request.entity = entity
+
+        response = InterestListView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [i["name"] for i in response.data["results"]["list"]], ["Biking", "Bird Watching"]
+        )
+        self.assertTrue(response.data["results"]["is_new"])
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from entity.models import Entity
+from interests.models import Interest
+from interests.services import trending_buffer
+from interests.services.affinity import bump_interest_affinity
+from interests.services.category_cache import (
+    get_or_build_categories,
+    invalidate_interest_categories,
+)
+from interests.services.interest_resolver import ensure_grant_override
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class InterestCategoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.entity = Entity.objects.create(type="user")
+        self.hiking = Interest.objects.create(name="Hiking")
+        self.build = mock.Mock(return_value=["hiking", "global"])
+        patcher = mock.patch.object(
+            trending_buffer.RedisPubSubClient,
+            "get_redis_connection",
+            side_effect=ConnectionError("redis down"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self):
+        return get_or_build_categories(self.entity.id, self.build)
+
+    def test_built_once_until_invalidated(self):
+        self.assertEqual(self._get(), ["hiking", "global"])
+        self._get()
+        self.assertEqual(self.build.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_interest_categories(self.entity.id)
+        self._get()
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_new_grant_override_invalidates(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            ensure_grant_override(self.entity.id, [self.hiking.id])
+        self._get()
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_affinity_bump_invalidates_only_when_crossing_the_threshold(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "COMMENT", False)
+        self._get()
+        self.assertEqual(self.build.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_interest_affinity(self.entity.id, [self.hiking.id], "LIKE", False)
+        self._get()
+        self.assertEqual(self.build.call_count, 2)
@@ -22,6 +22,18 @@ class InterestModelTests(TestCase):
         self.assertFalse(created_second)
         self.assertEqual(first.id, second.id)
 
+    def test_get_or_create_many_by_name_dedups_and_keeps_order(self):
+        existing = Interest.objects.create(name="Travel")
+
+        interests = Interest.objects.get_or_create_many_by_name(
+            ["Hiking", " travel ", "", "hiking", "Camping"]
+        )
+
+        self.assertEqual([i.normalized_name for i in interests], ["hiking", "travel", "camping"])
+        self.assertEqual(interests[1].id, existing.id)
+        self.assertEqual(interests[0].name, "Hiking")
+        self.assertEqual(Interest.objects.count(), 3)
+
     def test_parent_set_null_on_delete(self):
         parent = Interest.objects.create(name="Sports")
         child = Interest.objects.create(name="Hiking", parent=parent)
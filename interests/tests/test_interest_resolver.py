@@ -10,7 +10,9 @@ from interests.services.interest_resolver import (
     IMPLICIT_GRANT_THRESHOLD,
     ensure_grant_override,
     resolve_interest,
+    resolve_interests,
 )
+from interests.services.taxonomy import get_taxonomy
 
 
 def _make_entity():
@@ -95,6 +97,36 @@ class ResolveInterestTests(TestCase):
         self.assertEqual(resolve_interest(self.entity, None), ("neutral", None))
 
 
+class ResolveInterestsTests(TestCase):
+    def setUp(self):
+        self.entity = _make_entity()
+        self.outdoors = Interest.objects.create(name="Outdoors")
+        self.hiking = Interest.objects.create(name="Hiking", parent=self.outdoors)
+        self.camping = Interest.objects.create(name="Camping", parent=self.outdoors)
+        self.cooking = Interest.objects.create(name="Cooking")
+        self.baking = Interest.objects.create(name="Baking", parent=self.cooking)
+
+    def test_resolves_a_batch_in_one_query_each_for_overrides_and_affinities(self):
+        EntityInterest.objects.create(entity=self.entity, interest=self.outdoors, effect=PermissionEffect.DENY)
+        EntityInterest.objects.create(entity=self.entity, interest=self.camping, effect=PermissionEffect.GRANT)
+        EntityInterestAffinity.objects.create(
+            entity=self.entity, interest=self.baking, score=IMPLICIT_GRANT_THRESHOLD
+        )
+        interest_ids = [self.hiking.id, self.camping.id, self.cooking.id, self.baking.id]
+        get_taxonomy(require_ids=interest_ids)
+
+        with self.assertNumQueries(2):
+            resolved = resolve_interests(self.entity, interest_ids)
+
+        self.assertEqual(resolved[self.hiking.id], (PermissionEffect.DENY, self.outdoors.id))
+        self.assertEqual(resolved[self.camping.id], (PermissionEffect.GRANT, self.camping.id))
+        self.assertEqual(resolved[self.cooking.id], ("neutral", None))
+        self.assertEqual(resolved[self.baking.id], ("grant", None))
+
+    def test_unknown_interest_is_neutral(self):
+        self.assertEqual(resolve_interests(self.entity, [-1]), {-1: ("neutral", None)})
+
+
 class EnsureGrantOverrideTests(TestCase):
     def setUp(self):
         self.entity = _make_entity()
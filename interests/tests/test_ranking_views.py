@@ -1,10 +1,15 @@
 import uuid
 
-from django.test import TestCase
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIRequestFactory, force_authenticate
 
 from entity.models import Entity
 from interests.models import EntityInterestAffinity, Interest, InterestTrendingScore
+from interests.services import trending_decay
 from interests.views import MyTopInterestsView, TrendingInterestsView
 from user.models import Account
 
@@ -24,8 +29,12 @@ def _make_account(entity):
     )
 
 
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
 class RankingViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.factory = APIRequestFactory()
         self.entity = _make_entity()
         self.account = _make_account(self.entity)
@@ -51,8 +60,8 @@ class RankingViewTests(TestCase):
         self.assertEqual(data[1]["interest"]["name"], "Cooking")
 
     def test_trending_interests_is_unscoped_and_ranked(self):
-        InterestTrendingScore.objects.create(interest=self.hiking, score=50.0)
-        InterestTrendingScore.objects.create(interest=self.cooking, score=75.0)
+        InterestTrendingScore.objects.create(interest=self.hiking, score=50.0, daily_score=50.0)
+        InterestTrendingScore.objects.create(interest=self.cooking, score=75.0, daily_score=75.0)
 
         request = self.factory.get("/api/interests/trending/")
         force_authenticate(request, user=self.account)
@@ -65,3 +74,46 @@ class RankingViewTests(TestCase):
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]["interest"]["name"], "Cooking")
         self.assertEqual(data[1]["interest"]["name"], "Hiking")
+
+    def _trending(self, query=""):
+        request = self.factory.get(f"/api/interests/trending/{query}")
+        force_authenticate(request, user=self.account)
+        request.entity = self.entity
+        response = TrendingInterestsView.as_view()(request)
+        response.render()
+        return response
+
+    def test_trending_window_decays_where_all_time_does_not(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        InterestTrendingScore.objects.create(
+            interest=self.hiking, score=100.0, hourly_score=100.0, decayed_at=an_hour_ago
+        )
+        InterestTrendingScore.objects.create(
+            interest=self.cooking, score=60.0, hourly_score=60.0, decayed_at=timezone.now()
+        )
+
+        trending_decay.decay_trending_scores()
+
+        hourly = self._trending("?window=hour").data["data"]
+        all_time = self._trending("?window=all").data["data"]
+        self.assertEqual([t["interest"]["name"] for t in hourly], ["Cooking", "Hiking"])
+        self.assertAlmostEqual(hourly[1]["score"], 50.0, places=1)
+        self.assertEqual([t["interest"]["name"] for t in all_time], ["Hiking", "Cooking"])
+
+    def test_default_window_is_all_time_until_decayed_windows_are_on(self):
+        # What the Go worker's bumps leave behind: score only.
+        InterestTrendingScore.objects.create(interest=self.hiking, score=10.0)
+        InterestTrendingScore.objects.create(
+            interest=self.cooking, score=5.0, daily_score=20.0
+        )
+
+        names = [t["interest"]["name"] for t in self._trending().data["data"]]
+        self.assertEqual(names, ["Hiking", "Cooking"])
+
+        cache.clear()
+        with self.settings(TRENDING_DECAYED_WINDOWS=True):
+            names = [t["interest"]["name"] for t in self._trending().data["data"]]
+        self.assertEqual(names, ["Cooking"])
+
+    def test_trending_rejects_unknown_window(self):
+        self.assertEqual(self._trending("?window=week").status_code, 400)
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+
+from interests.models import Interest, InterestTrendingFlush, InterestTrendingScore
+from interests.services import trending_buffer
+
+
+class _FakeRedis:
+    """The hash commands the trending buffer uses, with real pipelines."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = float(bucket.get(field, 0)) + amount
+        return bucket[field]
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hgetall(self, key):
+        return {k: str(v) for k, v in self.hashes.get(key, {}).items()}
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def rename(self, src, dst):
+        self.hashes[dst] = self.hashes.pop(src)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [
+            getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TrendingBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(
+            trending_buffer.RedisPubSubClient,
+            "get_redis_connection",
+            return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        schedule = mock.patch.object(trending_buffer, "_schedule_flush")
+        schedule.start()
+        self.addCleanup(schedule.stop)
+        self.hiking = Interest.objects.create(name="Hiking")
+
+    def _record(self, rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            trending_buffer.record_trending_deltas(rows)
+
+    def _score(self):
+        return InterestTrendingScore.objects.get(interest=self.hiking).score
+
+    def test_deltas_are_buffered_until_flushed(self):
+        self._record([(self.hiking.id, 1.0)])
+        self._record([(self.hiking.id, 4.0)])
+
+        self.assertFalse(InterestTrendingScore.objects.exists())
+
+        self.assertEqual(trending_buffer.flush_trending_scores(), 1)
+        self.assertEqual(self._score(), 5.0)
+        self.assertEqual(trending_buffer.flush_trending_scores(), 0)
+        self.assertEqual(self._score(), 5.0)
+
+    def test_failed_flush_keeps_its_batch_for_the_next(self):
+        self._record([(self.hiking.id, 1.0)])
+
+        with mock.patch.object(
+            trending_buffer, "apply_trending_deltas", side_effect=DatabaseError
+        ):
+            trending_buffer.flush_trending_scores()
+        self._record([(self.hiking.id, 2.0)])
+
+        self.assertEqual(trending_buffer.flush_trending_scores(), 2)
+        self.assertEqual(self._score(), 3.0)
+
+    def test_batch_applied_before_a_crash_is_not_applied_again(self):
+        self._record([(self.hiking.id, 1.0)])
+        batch_id, rows = trending_buffer._claim_batch(self.redis)
+        # The crashed flush committed its batch but never cleared it.
+        trending_buffer.apply_trending_deltas(rows, batch_id)
+
+        trending_buffer.flush_trending_scores()
+
+        self.assertEqual(self._score(), 1.0)
+        self.assertFalse(self.redis.exists(trending_buffer.INFLIGHT_TRENDING_KEY))
+        self.assertTrue(InterestTrendingFlush.objects.filter(batch_id=batch_id).exists())
@@ -6,7 +6,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.pagination import PageNumberPagination
 
-from .models import EntityInterest, EntityInterestAffinity, Interest, InterestTrendingScore
+from .models import EntityInterest, EntityInterestAffinity, Interest
+from .services.autocomplete import search_interests
+from .services.category_cache import invalidate_interest_categories
+from .services.trending_decay import WINDOW_FIELDS, default_window, get_top_trending
 from entity.permissions import PermissionEffect
 import logging
 
@@ -22,7 +25,8 @@ class InterestListView(APIView):
     """
     Search/autocomplete over the shared interest vocabulary - generalized
     version of diary.views.TagListView (which now delegates here so
-    /api/diary/tags/ keeps working unchanged).
+    /api/diary/tags/ keeps working unchanged). Matches names with a word
+    starting with `search`, best-trending first.
     """
 
     permission_classes = [IsAuthenticated]
@@ -31,18 +35,12 @@ class InterestListView(APIView):
     def get(self, request):
         try:
             search = request.query_params.get("search", None)
-            queryset = Interest.objects.all().order_by("id")
-
-            if search:
-                queryset = queryset.filter(name__icontains=search)
+            # In-memory and ranked - see services/autocomplete.py. The
+            # paginator counts and slices the result list, not a queryset.
+            matches, is_new = search_interests(search)
 
             paginator = self.pagination_class()
-            paginated_queryset = paginator.paginate_queryset(queryset, request, view=self)
-
-            results = [{"id": i.id, "name": i.name} for i in paginated_queryset]
-            is_new = bool(search and search.strip()) and not Interest.objects.filter(
-                normalized_name=search.strip().lower()
-            ).exists()
+            results = paginator.paginate_queryset(matches, request, view=self)
 
             return paginator.get_paginated_response({"list": results, "is_new": is_new})
         except Exception as e:
@@ -124,6 +122,7 @@ class EntityInterestOverrideView(APIView):
                     "created_by": entity,
                 },
             )
+            invalidate_interest_categories(entity.id)
 
             return Response(
                 {
@@ -151,6 +150,7 @@ class EntityInterestOverrideView(APIView):
                 raise
 
             override.delete()
+            invalidate_interest_categories(override.entity_id)
             return Response(
                 {"status": True, "message": "Interest preference removed"},
                 status=status.HTTP_200_OK,
@@ -199,6 +199,11 @@ class TrendingInterestsView(APIView):
     """
     Global ranking of interests against each other - "what's trending
     platform-wide right now". Unscoped/public, unlike MyTopInterestsView.
+
+    `window` is "hour" or "day" for time-decayed trending, or "all" for
+    all-time totals; the default is all-time until TRENDING_DECAYED_WINDOWS
+    is on, then "day". Read from the materialized top-K list (see
+    services/trending_decay.py), so `limit` is capped at TRENDING_TOP_K.
     """
 
     permission_classes = [IsAuthenticated]
@@ -206,12 +211,15 @@ class TrendingInterestsView(APIView):
     def get(self, request):
         try:
             limit = int(request.query_params.get("limit", 10))
-            trending = (
-                InterestTrendingScore.objects.select_related("interest").order_by("-score")[:limit]
-            )
+            window = request.query_params.get("window") or default_window()
+            if window not in WINDOW_FIELDS:
+                return Response(
+                    {"status": False, "message": f"Unknown window: {window}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             data = [
-                {"interest": {"id": t.interest.id, "name": t.interest.name}, "score": t.score}
-                for t in trending
+                {"interest": {"id": t["id"], "name": t["name"]}, "score": t["score"]}
+                for t in get_top_trending(window, limit)
             ]
             return Response({"status": True, "data": data}, status=status.HTTP_200_OK)
         except Exception as e:
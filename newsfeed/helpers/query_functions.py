@@ -1,87 +1,85 @@
 from ..models import Post, PostScore
-from user.models import UserEngagementLog, Connection, Account
+from user.models import UserEngagementIndex, UserEngagementLog, Connection, Account
 from entity.models import Entity
 from community.models import Follow
-from ..models import NewsfeedIndex, TrendingPool
-from cassandra.cqlengine.query import BatchQuery
+from ..models import (
+    NEWSFEED_INDEX_TTL,
+    AuthorTimeline,
+    LegacyNewsfeedIndex,
+    NewsfeedIndex,
+)
+from cassandra.cqlengine.query import BatchQuery, BatchType
+from django.conf import settings
 from django.utils.timezone import now, is_naive, make_aware, get_current_timezone
 from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta
+from itertools import islice
 from django.db import transaction
 from django.db.models import Q, F
 from user.services.connections import ConnectionHelpers
-from interests.services.affinity import bump_interest_affinity
+from entity.services.follows import get_followed_pull_author_ids
+from ..services.feed_day_reads import read_day_heads, read_timeline_heads
+from ..services.feed_fanout import write_feed_rows
+from ..services.trending_pool import read_trending_candidates
+from user_service.services.redis import RedisPubSubClient
+from interests.services.affinity import bump_interest_affinities
 from interests.services.interest_resolver import IMPLICIT_GRANT_THRESHOLD
 from interests.models import EntityInterest, EntityInterestAffinity
+from interests.services.category_cache import get_or_build_categories
+from interests.services.trending_decay import get_top_trending
 from entity.permissions import PermissionEffect
+import heapq
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def update_ranking_score(post_id, update_type, is_decrease):
-    post_data = Post.objects.get(post_id=post_id)
-    post_score = PostScore.objects.get(post=post_data)
-
-    reactions = post_score.likes_count
-
-    reactions_total = reactions
-
-    final_content_score = post_score.content_type_weight
+# recent_update_boost moved per event, by update_type ("react", "comment",
+# "share"; anything else counts like a reaction).
+RANKING_BOOST_BY_UPDATE_TYPE = {"react": 0.1, "comment": 0.3, "share": 0.5}
+DEFAULT_RANKING_BOOST = 0.1
 
-    new_recent_update_boost = post_score.recent_update_boost
-
-    if update_type == "react":
-        if is_decrease:
-            new_recent_update_boost -= 0.1
-        else:
-            new_recent_update_boost += 0.1
-    elif update_type == "comment":
-        if is_decrease:
-            new_recent_update_boost -= 0.3
-        else:
-            new_recent_update_boost += 0.3
-    elif update_type == "share":
-        if is_decrease:
-            new_recent_update_boost -= 0.5
-        else:
-            new_recent_update_boost += 0.5
-    else:
-        if is_decrease:
-            new_recent_update_boost -= 0.1
-        else:
-            new_recent_update_boost += 0.1
 
-    age_hours = (now() - post_data.date_posted).total_seconds() / 3600
-    affinity_score = 1.0
-    content_type_weight = final_content_score
-    recent_update_boost = new_recent_update_boost
-    comments_count = post_score.comments_count
-    likes_count = reactions_total
-    shares_count = post_score.shares_count
+def compute_ranking_score(post_score, date_posted):
+    """The ranking formula, over a PostScore's current counters and weights."""
+    age_hours = (now() - date_posted).total_seconds() / 3600
 
     base_engagement = 1
 
     weighted_engagement = (
-        comments_count * 3 + likes_count * 1 + shares_count * 5 + base_engagement
+        post_score.comments_count * 3
+        + post_score.likes_count * 1
+        + post_score.shares_count * 5
+        + base_engagement
     )
     decay_factor = (age_hours + 1) ** 0.5
-    ranking_score = (
+    return (
         (weighted_engagement / decay_factor)
-        * affinity_score
-        * content_type_weight
-        * recent_update_boost
+        * post_score.affinity_score
+        * post_score.content_type_weight
+        * post_score.recent_update_boost
     )
 
+
+def update_ranking_score(post_id, update_type, is_decrease):
+    post_data = Post.objects.get(post_id=post_id)
+    post_score = PostScore.objects.get(post=post_data)
+
+    boost = RANKING_BOOST_BY_UPDATE_TYPE.get(update_type, DEFAULT_RANKING_BOOST)
+    post_score.recent_update_boost += -boost if is_decrease else boost
+    post_score.affinity_score = 1.0
+    ranking_score = compute_ranking_score(post_score, post_data.date_posted)
+
     PostScore.objects.update_or_create(
         post=post_data,
         defaults={
-            "affinity_score": affinity_score,
-            "content_type_weight": content_type_weight,
-            "recent_update_boost": recent_update_boost,
-            "likes_count": likes_count,
-            "comments_count": comments_count,
-            "shares_count": shares_count,
+            "affinity_score": post_score.affinity_score,
+            "content_type_weight": post_score.content_type_weight,
+            "recent_update_boost": post_score.recent_update_boost,
+            "likes_count": post_score.likes_count,
+            "comments_count": post_score.comments_count,
+            "shares_count": post_score.shares_count,
             "ranking_score": ranking_score,
         },
     )
@@ -95,7 +93,6 @@ def save_viewcache_engagements(entity, viewcache):
         user_id = uuid.UUID(entity.id) if isinstance(entity.id, str) else entity.id
 
         logs_to_create = []
-        post_ids_to_clean = []
         viewed_post_ids = [str(view["post_id"]) for view in viewcache]
         # One query for every viewed post's interests, keyed by post_id -
         # avoids an N+1 per view when bumping affinity below.
@@ -106,15 +103,23 @@ def save_viewcache_engagements(entity, viewcache):
             if interest_id is not None:
                 interests_by_post_id.setdefault(pid, []).append(interest_id)
 
+        # Summed per interest across the whole viewcache and written in one
+        # statement per table. Only this Python path is batched - the views
+        # publish SAVE_VIEWCACHE_ENGAGEMENTS, and the Go worker's handler
+        # still bumps one view at a time.
+        bump_interest_affinities(
+            entity.id,
+            [
+                (interests_by_post_id.get(str(view["post_id"]), []), "VIEW", False)
+                for view in viewcache
+            ],
+        )
+
         for view in viewcache:
             pid = view["post_id"]
             poid = view["post_owner_id"]
             current_duration = view.get("duration", 0)
 
-            post_ids_to_clean.append(str(pid))
-
-            bump_interest_affinity(entity.id, interests_by_post_id.get(str(pid), []), "VIEW", False)
-
             if str(poid) != str(entity.id):
                 created_at = view.get("created_at")
                 if isinstance(created_at, str):
@@ -132,17 +137,14 @@ def save_viewcache_engagements(entity, viewcache):
                 )
                 logs_to_create.append(log_instance)
 
+        # Viewed posts are no longer deleted from the NewsfeedIndex bucket -
+        # NewsfeedView records them in the feed seen-set instead, see
+        # fetch_friends_posts.
         with BatchQuery() as b:
 
             for log in logs_to_create:
                 log.batch(b).save()
-
-            if post_ids_to_clean:
-                rows_to_delete = NewsfeedIndex.objects.filter(
-                    bucket=str(user_id), post_id__in=post_ids_to_clean
-                )
-                for row in rows_to_delete:
-                    row.batch(b).delete()
+                UserEngagementIndex.for_log(log).batch(b).save()
 
         return logs_to_create
     except Exception as ex:
@@ -151,14 +153,20 @@ def save_viewcache_engagements(entity, viewcache):
 
 
 def bulk_fanout_to_cache(connections_list, post_data):
-    with BatchQuery() as b:
-        for follower_id in connections_list:
-            NewsfeedIndex.batch(b).create(
-                bucket=str(follower_id),
-                post_id=str(post_data["id"]),
-                created_at=now(),
-                author_id=str(post_data["author_id"]),
-            )
+    # One partition per follower - concurrent prepared inserts, not a
+    # multi-partition logged batch. See services/feed_fanout.py.
+    created_at = now()
+    day = NewsfeedIndex.day_of(created_at)
+    write_feed_rows(
+        {
+            "bucket": str(follower_id),
+            "day": day,
+            "post_id": str(post_data["id"]),
+            "created_at": created_at,
+            "author_id": str(post_data["author_id"]),
+        }
+        for follower_id in connections_list
+    )
 
 
 def interaction_score_bump(actor_id, receiver_id, action, is_decrease):
@@ -247,29 +255,73 @@ def follower_interaction_score_bump(actor_id, receiver_id, action, is_decrease):
 
 
 def remove_feed_on_unfriend(actor_id, author_id):
-    rows = NewsfeedIndex.objects.filter(
-        bucket=str(actor_id), author_id=author_id, type="fanout"
-    )
+    """
+    Deletes `author_id`'s fanned-out rows from `actor_id`'s feed, in both
+    feed tables. author_id and type are not key columns, so each partition
+    is read whole and matched here, and the matches deleted by primary key.
+    """
+    bucket = str(actor_id)
+    author_id = str(author_id)
+    partitions = [LegacyNewsfeedIndex.objects.filter(bucket=bucket)] + [
+        NewsfeedIndex.objects.filter(bucket=bucket, day=day) for day in _feed_days()
+    ]
+    for queryset in partitions:
+        rows = [
+            row
+            for row in queryset.limit(None)
+            if row.author_id == author_id and row.type == "fanout"
+        ]
+        if not rows:
+            continue
+        # One partition, so an unlogged batch is a single mutation.
+        with BatchQuery(batch_type=BatchType.Unlogged) as batch:
+            for row in rows:
+                row.batch(batch).delete()
+
+
+def _engagements(user_id, activity_types, target_ids):
+    """
+    (target_id, target_type, activity_time) of `user_id`'s engagements of
+    `activity_types` with `target_ids`.
 
-    for row in rows:
-        row.delete()
+    Read from UserEngagementIndex once ENGAGEMENT_INDEX_READS is on, and from
+    UserEngagementLog until then - the Go worker logs views without writing
+    the index, so reading it alone would forget every view since the backfill.
+    """
+    if not target_ids:
+        return []
+    fields = ("target_id", "target_type", "activity_time")
+    if not settings.ENGAGEMENT_INDEX_READS:
+        return list(
+            UserEngagementLog.objects.filter(
+                user_id=user_id,
+                activity_type__in=list(activity_types),
+                target_id__in=target_ids,
+            ).values_list(*fields)
+        )
+    rows = []
+    for activity_type in activity_types:
+        rows += UserEngagementIndex.objects.filter(
+            user_id=user_id,
+            activity_type=activity_type,
+            target_id__in=target_ids,
+        ).values_list(*fields)
+    return rows
 
 
 def get_latest_mutual_engagements(mutual_friend_ids, candidate_pids):
     latest_social_map = {}
     candidate_pids_str = [str(pid) for pid in candidate_pids]
 
-    for mf_id in mutual_friend_ids:
-        logs = UserEngagementLog.objects.filter(
-            user_id=mf_id,
-            activity_type__in=["comment", "share"],
-            target_id__in=candidate_pids_str,
-        )
-
-        for log in logs:
-            pid = log.target_id
-            ts = log.activity_time
+    if not candidate_pids_str:
+        return latest_social_map
 
+    for mf_id in mutual_friend_ids:
+        for pid, _, ts in _engagements(
+            mf_id, ("comment", "share"), candidate_pids_str
+        ):
+            if not ts:
+                continue
             if pid not in latest_social_map or ts > latest_social_map[pid]:
                 latest_social_map[pid] = ts
 
@@ -289,12 +341,13 @@ def backfill_new_friend_feed(viewer_id, new_friend_id):
     candidate_posts = Post.objects.filter(entity__id=str(new_friend_id))[:50]
     candidate_pids = [str(p.post_id) for p in candidate_posts]
 
-    view_logs = UserEngagementLog.objects.filter(
-        user_id=viewer_id,
-        activity_type="view",
-        target_type="post",
-        target_id__in=candidate_pids,
-    )
+    view_logs = [
+        (target_id, activity_time)
+        for target_id, target_type, activity_time in _engagements(
+            viewer_id, ("view",), candidate_pids
+        )
+        if target_type == "post"
+    ]
 
     user_connections = ConnectionHelpers(viewer_entity)
     mutual_friends = user_connections.get_mutual_connections(new_friend_id)
@@ -304,13 +357,11 @@ def backfill_new_friend_feed(viewer_id, new_friend_id):
         mutual_friends, candidate_pids
     )
 
-    for log in view_logs:
-        if log.target_id not in mutual_friend_engagements:
-            mutual_friend_engagements[log.target_id] = log.activity_time
-
-    b = BatchQuery()
+    for target_id, activity_time in view_logs:
+        if target_id not in mutual_friend_engagements:
+            mutual_friend_engagements[target_id] = activity_time
 
-    inserted_count = 0
+    rows = []
     for post in candidate_posts:
         pid = str(post.post_id)
         final_timestamp = post.date_posted
@@ -326,37 +377,277 @@ def backfill_new_friend_feed(viewer_id, new_friend_id):
                 should_insert = True
 
         if should_insert:
-            NewsfeedIndex.batch(b).create(
-                bucket=str(viewer_id),
-                post_id=pid,
-                created_at=now(),
-                author_id=str(new_friend_id),
+            created_at = now()
+            rows.append(
+                {
+                    "bucket": str(viewer_id),
+                    "day": NewsfeedIndex.day_of(created_at),
+                    "post_id": pid,
+                    "created_at": created_at,
+                    "author_id": str(new_friend_id),
+                }
             )
-            inserted_count += 1
 
-    if inserted_count > 0:
-        b.execute()
-        print(
-            f"Successfully executed batch for {inserted_count} posts | {viewer_id}:{new_friend_id}"
+    # All one viewer's partition for the day, so this is a single unlogged
+    # batch rather than a logged one.
+    if rows:
+        failed = write_feed_rows(rows)
+        logger.info(
+            "Backfilled %s posts of %s into %s's feed (%s partitions failed)",
+            len(rows),
+            new_friend_id,
+            viewer_id,
+            failed,
+        )
+
+
+# How many pages' worth of rows one friends-feed read may consume to fill a
+# page when most of what it finds has already been seen. Bounds the read even
+# for a feed that is entirely seen.
+MAX_FRIENDS_FEED_SLICES = 5
+# Rows outlive their TTL by nothing, so no day older than this can hold one.
+FEED_WINDOW_DAYS = NEWSFEED_INDEX_TTL // (60 * 60 * 24)
+
+
+def _feed_days(start=None):
+    """Every `day` partition a bucket can have rows in, newest first,
+    starting from `start` (default: today)."""
+    today = NewsfeedIndex.day_of(now())
+    day = min(start, today) if start is not None else today
+    oldest = today - timedelta(days=FEED_WINDOW_DAYS)
+    while day >= oldest:
+        yield day
+        day -= timedelta(days=1)
+
+
+def encode_feed_cursor(cursor):
+    if not cursor:
+        return None
+    created_at, served_ids = cursor
+    return "|".join([created_at.isoformat(), *sorted(served_ids)])
+
+
+def decode_feed_cursor(raw_cursor):
+    """
+    The (created_at, post ids already served at that created_at) a client
+    echoed back, or None (= start at the newest row) when it is missing or
+    not one of ours. A bare created_at, as issued before the post ids were
+    carried, reads as having served none at it.
+    """
+    if not raw_cursor:
+        return None
+    created_at, *served_ids = str(raw_cursor).split("|")
+    try:
+        return datetime.fromisoformat(created_at), frozenset(served_ids)
+    except ValueError:
+        return None
+
+
+def advance_feed_cursor(cursor, post_id, created_at):
+    """`cursor` moved past one more row, taken in feed order."""
+    if cursor is not None and cursor[0] == created_at:
+        return created_at, cursor[1] | {post_id}
+    return created_at, frozenset([post_id])
+
+
+def _slice_limit(cursor, page_size):
+    """Rows one slice reads - see _slices."""
+    return page_size + (len(cursor[1]) if cursor is not None else 0)
+
+
+def _slices(queryset, cursor, page_size, head=None):
+    """
+    The rows of one partition's `queryset` after `cursor`, newest first,
+    read `page_size` at a time. `head`, if given, is the first slice already
+    read (e.g. by read_timeline_heads).
+
+    Rows can share a created_at - more so with several timelines merged -
+    so a slice resumes at the cursor's created_at inclusive and drops the
+    post ids already served there, rather than skipping everything else at
+    that instant. It reads that many extra rows so it always makes progress.
+    """
+    while True:
+        cursor_at, served = cursor if cursor is not None else (None, frozenset())
+        limit = _slice_limit(cursor, page_size)
+        if head is not None:
+            rows, head = head, None
+        else:
+            sliced = queryset
+            if cursor_at is not None:
+                sliced = sliced.filter(created_at__lte=cursor_at)
+            rows = list(sliced.limit(limit).values_list("post_id", "created_at"))
+        for post_id, created_at in rows:
+            if post_id in served and created_at == cursor_at:
+                continue
+            cursor = advance_feed_cursor(cursor, post_id, created_at)
+            yield post_id, created_at
+        if len(rows) < limit:
+            return
+
+
+def _pushed_rows(entity_id, cursor, page_size):
+    """
+    The viewer's fanned-out rows after `cursor`, newest first, read
+    `page_size` at a time - walking the NewsfeedIndex day partitions
+    newest-first from the cursor's day and moving to the previous day
+    whenever one runs dry. Reads LegacyNewsfeedIndex instead until
+    FEED_INDEX_BY_DAY_READS is on.
+
+    The first day is read on its own, since for an active feed it fills the
+    page. Once it runs dry, the first slice of every older day in the window
+    is read at once (read_day_heads), so a sparse feed's empty days cost one
+    round trip between them rather than one each.
+    """
+    if not settings.FEED_INDEX_BY_DAY_READS:
+        yield from _legacy_pushed_rows(entity_id, cursor)
+        return
+
+    bucket = str(entity_id)
+    start_day = NewsfeedIndex.day_of(cursor[0]) if cursor is not None else None
+    days = list(_feed_days(start_day))
+    if not days:
+        return
+
+    def day_rows(day, day_cursor):
+        return _slices(
+            NewsfeedIndex.objects.filter(bucket=bucket, day=day), day_cursor, page_size
         )
 
+    yield from day_rows(days[0], cursor if days[0] == start_day else None)
 
-def fetch_friends_posts(entity_id, page_size=10):
-    newsfeed_queryset = (
-        NewsfeedIndex.objects.filter(bucket=str(entity_id))
-        .limit(int(page_size))
-        .values_list("post_id", flat=True)
+    older = days[1:]
+    for day, head in zip(older, read_day_heads(bucket, older, page_size)):
+        if head is None:
+            yield from day_rows(day, None)
+            continue
+        day_cursor = None
+        for post_id, created_at in head:
+            day_cursor = advance_feed_cursor(day_cursor, post_id, created_at)
+            yield post_id, created_at
+        if len(head) == page_size:
+            yield from day_rows(day, day_cursor)
+
+
+# Bounds one read of a legacy bucket. The Go worker still deletes seen rows
+# from that table, so a bucket holds little more than the unseen feed.
+LEGACY_FEED_READ_LIMIT = 1000
+
+
+def _legacy_pushed_rows(entity_id, cursor):
+    """
+    _pushed_rows over LegacyNewsfeedIndex. That table clusters on post_id,
+    so the bucket is read once and put in created_at order here.
+    """
+    rows = sorted(
+        LegacyNewsfeedIndex.objects.filter(bucket=str(entity_id))
+        .limit(LEGACY_FEED_READ_LIMIT)
+        .values_list("post_id", "created_at"),
+        key=lambda row: row[1],
+        reverse=True,
     )
-    return list(newsfeed_queryset)
+    cursor_at, served = cursor if cursor is not None else (None, frozenset())
+    for post_id, created_at in rows:
+        if cursor_at is not None and (
+            created_at > cursor_at or (created_at == cursor_at and post_id in served)
+        ):
+            continue
+        yield post_id, created_at
+
+
+def _pulled_rows(author_id, cursor, page_size, head=None):
+    """One pull author's AuthorTimeline rows after `cursor`, newest first,
+    read `page_size` at a time, starting from a prefetched `head` if any."""
+    return _slices(
+        AuthorTimeline.objects.filter(author_id=str(author_id)),
+        cursor,
+        page_size,
+        head,
+    )
+
+
+def fetch_friends_posts(entity_id, page_size=10, cursor=None, pull_author_ids=None):
+    """
+    One page of the viewer's friends feed, newest first, after `cursor` (see
+    decode_feed_cursor; None for the top of the feed) and skipping posts the
+    viewer has already seen.
+
+    Hybrid push/pull: the viewer's own NewsfeedIndex bucket (what was fanned
+    out to them) merged by created_at with the AuthorTimeline of each
+    high-follower author they follow, which is never fanned out - see
+    entity.services.follows.get_followed_pull_author_ids. The timelines'
+    first slices are read concurrently up front; after that every source is
+    read lazily, a slice at a time, and at most MAX_FRIENDS_FEED_SLICES
+    pages' worth of rows are consumed, so the read stays bounded however
+    much of the feed has been seen.
+
+    Returns (post_ids, next_cursor). next_cursor is the last row this read
+    consumed - its created_at and the post ids consumed at that created_at -
+    so the next page resumes right after it in every source at once rather
+    than re-reading the head of the feed.
+
+    `pull_author_ids` skips the lookup when the caller already has them.
+    """
+    rows, cursor = fetch_friends_rows(entity_id, page_size, cursor, pull_author_ids)
+    return [post_id for post_id, _ in rows], cursor
 
 
-# TrendingPool.category is the partition key, and fetch_trending_posts
-# queries it with category__in=user_interests - this cluster's configured
-# hard limit is 20 partition keys per query ("Select query cannot be
-# completed because it selects N partitions keys - more than the maximum
-# allowed 20"), confirmed directly from the server error, not assumed.
-# Reserve 1 slot for the always-included "global" fallback below.
-MAX_TRENDING_CATEGORIES = 19
+def fetch_friends_rows(entity_id, page_size=10, cursor=None, pull_author_ids=None):
+    """
+    fetch_friends_posts, as (post_id, created_at) rows - for a caller that
+    may use only part of the page and needs to resume right after the last
+    row it did use rather than after the whole page.
+    """
+    page_size = int(page_size)
+    if pull_author_ids is None:
+        pull_author_ids = get_followed_pull_author_ids(entity_id)
+    # The merge takes the head of every source before its first row, so the
+    # pulled timelines' first slices are read concurrently up front; one
+    # that failed is read again on its own.
+    heads = read_timeline_heads(
+        pull_author_ids, cursor, _slice_limit(cursor, page_size)
+    )
+    sources = [_pushed_rows(entity_id, cursor, page_size)] + [
+        _pulled_rows(author_id, cursor, page_size, head)
+        for author_id, head in zip(pull_author_ids, heads)
+    ]
+    rows = heapq.merge(*sources, key=lambda row: row[1], reverse=True)
+
+    picked = []
+    picked_ids = set()
+    budget = MAX_FRIENDS_FEED_SLICES * page_size
+    while budget > 0:
+        batch = list(islice(rows, min(page_size, budget)))
+        if not batch:
+            break
+        budget -= len(batch)
+
+        unseen = set(
+            RedisPubSubClient.filter_unseen_feed_posts(
+                entity_id, [post_id for post_id, _ in batch]
+            )
+        )
+        for post_id, created_at in batch:
+            cursor = advance_feed_cursor(cursor, post_id, created_at)
+            # A post re-fanned by a comment bump sits in the bucket twice,
+            # and a pull author's post can still have been pushed too.
+            if post_id in unseen and post_id not in picked_ids:
+                picked.append((post_id, created_at))
+                picked_ids.add(post_id)
+                if len(picked) == page_size:
+                    return picked, cursor
+
+    return picked, cursor
+
+
+# fetch_trending_posts reads one TrendingPool partition per category, all
+# concurrently (services/trending_pool.py), so the cluster's 20-partition
+# limit on a category__in query no longer applies. This only bounds how many
+# reads one page puts in flight. Reserve 1 slot for the always-included
+# "global" fallback below.
+MAX_TRENDING_CATEGORIES = 99
+# Trending-today interests added to a viewer's categories when their own
+# signals leave room.
+TRENDING_INTEREST_FILL = 5
 
 
 def resolved_interest_categories(entity):
@@ -369,12 +660,22 @@ def resolved_interest_categories(entity):
     signal yet.
 
     Capped at MAX_TRENDING_CATEGORIES total (see constant above) - an
-    entity can accumulate far more than 25 granted/high-affinity interests
-    over time (e.g. via diary tagging), which would otherwise blow up
-    TrendingPool's category__in query. Explicit grants are a stronger
-    signal than implicit affinity, so grants fill the cap first; implicit
-    interests only fill whatever's left, highest-scored first.
+    entity can accumulate any number of granted/high-affinity interests
+    over time (e.g. via diary tagging), and each one is a partition read.
+    Explicit grants are a stronger signal than implicit affinity, so grants
+    fill the cap first; implicit interests only fill whatever's left,
+    highest-scored first, and up to TRENDING_INTEREST_FILL of the top
+    trending interests (the entity has not denied) after that.
+
+    Cached per entity and invalidated on the writes that can change it - see
+    interests.services.category_cache.
     """
+    return get_or_build_categories(
+        entity.id, lambda: _build_interest_categories(entity)
+    )
+
+
+def _build_interest_categories(entity):
     granted = list(
         EntityInterest.objects.filter(entity=entity, effect=PermissionEffect.GRANT)
         .values_list("interest__normalized_name", flat=True)[:MAX_TRENDING_CATEGORIES]
@@ -387,7 +688,25 @@ def resolved_interest_categories(entity):
         .order_by("-score")
         .values_list("interest__normalized_name", flat=True)[:remaining_slots]
     )
-    return list(set(granted) | set(implicit) | {"global"})
+    # Whatever is left goes to what is trending platform-wide, so a
+    # viewer with little signal of their own still sees more than "global".
+    # The top-K list is materialized, so this is a cache read, not a query.
+    remaining_slots = max(remaining_slots - len(implicit), 0)
+    categories = set(granted) | set(implicit)
+    if remaining_slots:
+        denied = set(
+            EntityInterest.objects.filter(
+                entity=entity, effect=PermissionEffect.DENY
+            ).values_list("interest__normalized_name", flat=True)
+        )
+        excluded = denied | categories
+        trending = [
+            interest["normalized_name"]
+            for interest in get_top_trending()
+            if interest["normalized_name"] not in excluded
+        ]
+        categories.update(trending[: min(remaining_slots, TRENDING_INTEREST_FILL)])
+    return list(categories | {"global"})
 
 
 def fetch_trending_posts(
@@ -398,21 +717,17 @@ def fetch_trending_posts(
         uuid.UUID(str(entity_id)) if not isinstance(entity_id, uuid.UUID) else entity_id
     )
 
-    # Defensive cap independent of the caller: category__in is a Cassandra/
-    # Scylla query against TrendingPool's partition key, which rejects more
-    # than 25 IN values regardless of how user_interests was built.
-    trending_queryset = (
-        TrendingPool.objects.filter(category__in=list(user_interests)[:MAX_TRENDING_CATEGORIES + 1])
-        .limit(int(candidate_limit))
-        .values_list("post_id", flat=True)
+    # Defensive cap independent of the caller - one concurrent partition
+    # read per category.
+    trending_pids = read_trending_candidates(
+        list(user_interests)[: MAX_TRENDING_CATEGORIES + 1], int(candidate_limit)
     )
-    trending_pids = list(trending_queryset)
 
     if not trending_pids:
         return []
 
-    seen_logs = UserEngagementLog.objects.filter(
-        user_id=entity_uuid, activity_type="view", target_id__in=trending_pids
-    )
-    seen_pids = {str(log.target_id) for log in seen_logs}
+    seen_pids = {
+        str(target_id)
+        for target_id, _, _ in _engagements(entity_uuid, ("view",), trending_pids)
+    }
     return [pid for pid in trending_pids if pid not in seen_pids][: int(page_size)]
@@ -0,0 +1,113 @@
+"""
+Copies every live LegacyNewsfeedIndex row into the day-partitioned
+NewsfeedIndex, so turning FEED_INDEX_BY_DAY_READS on does not start every
+friends feed empty.
+
+Walks the legacy table in token order, --chunk-size rows at a time. A chunk
+can end partway through a bucket, so that bucket is re-read whole before
+moving past it, and the last bucket finished is checkpointed after every
+chunk: rerun the same command to resume, or pass --restart to start over.
+Rows are upserts, so re-copying a bucket is harmless. Rows older than the
+feed window are skipped - nothing reads their day any more.
+
+Run it once the Go worker writes NewsfeedIndex too, then switch the flag on.
+
+    python manage.py backfill_newsfeed_index
+"""
+
+import json
+import os
+from datetime import timedelta
+
+from cassandra.cqlengine.functions import Token
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from newsfeed.models import NEWSFEED_INDEX_TTL, LegacyNewsfeedIndex, NewsfeedIndex
+from newsfeed.services.feed_fanout import write_feed_rows
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_CHECKPOINT = "newsfeed_index_backfill.checkpoint.json"
+
+ROW_FIELDS = ("bucket", "post_id", "created_at", "author_id", "type")
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _rows(queryset):
+    return [dict(zip(ROW_FIELDS, row)) for row in queryset.values_list(*ROW_FIELDS)]
+
+
+def backfill_chunk(after, chunk_size):
+    """
+    Copies the buckets that follow `after` (a bucket, or None for the start)
+    in token order, about `chunk_size` rows' worth. Returns (last bucket
+    copied, rows written), or (None, 0) at the end of the table.
+    """
+    queryset = LegacyNewsfeedIndex.objects.all()
+    if after is not None:
+        queryset = queryset.filter(pk__token__gt=Token(after))
+    rows = _rows(queryset.limit(chunk_size))
+    if not rows:
+        return None, 0
+
+    last = rows[-1]["bucket"]
+    # The chunk may have cut the last bucket short; take all of it.
+    rows = [row for row in rows if row["bucket"] != last] + _rows(
+        LegacyNewsfeedIndex.objects.filter(bucket=last).limit(None)
+    )
+
+    window_start = (now() - timedelta(seconds=NEWSFEED_INDEX_TTL)).replace(tzinfo=None)
+    rows = [row for row in rows if row["created_at"] >= window_start]
+    for row in rows:
+        row["day"] = NewsfeedIndex.day_of(row["created_at"])
+    failed = write_feed_rows(rows, models=(NewsfeedIndex,))
+    if failed:
+        raise CommandError(f"{failed} partitions failed to write after {last!r}")
+    return last, len(rows)
+
+
+class Command(BaseCommand):
+    help = "Copy LegacyNewsfeedIndex rows into the day-partitioned NewsfeedIndex."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any saved checkpoint and start from the first bucket.",
+        )
+
+    def handle(self, *args, chunk_size, checkpoint, restart, **options):
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        progress = None if restart else _read_json(checkpoint)
+        after = (progress or {}).get("last_bucket")
+
+        written = 0
+        while True:
+            last, count = backfill_chunk(after, chunk_size)
+            if last is None:
+                break
+            written += count
+            after = last
+            _write_json(checkpoint, {"last_bucket": after})
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Copied {written} feed rows"))
@@ -0,0 +1,243 @@
+"""
+Recomputes every post's PostScore from its reaction, comment, share and
+reference rows.
+
+Replaces newsfeed/scripts/post_score.py, which walked Post.objects.all() and
+ran four or five queries per post. This walks posts in post_id order,
+--chunk-size at a time, and per chunk runs one aggregate query each for
+reaction totals, activity counts and reference media mix, then writes the
+whole chunk with one bulk_update plus one bulk_create for posts that had no
+score row yet.
+
+Progress is checkpointed after every committed chunk, so an interrupted run
+picks up where it stopped: rerun the same command, or pass --restart to start
+over. --workers N splits the post_id space into N key ranges (fixed when the
+run starts and kept in the checkpoint) and backfills them in parallel
+processes.
+
+    python manage.py backfill_post_scores --workers 4
+"""
+
+import json
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count, Sum
+
+from newsfeed.helpers.query_functions import compute_ranking_score
+from newsfeed.models import ActivityCount, Post, PostReference, PostScore, PreviewCount
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHECKPOINT = "post_score_backfill.checkpoint.json"
+
+# Same weights the old script used: a post's content_type_weight is the mean
+# of 1.0 plus these over its references, or 5.0 / 1 for a text-only post.
+REFERENCE_MEDIA_WEIGHT = {"image": 6.5, "video": 8.5}
+DEFAULT_REFERENCE_WEIGHT = 2.0
+NO_REFERENCE_WEIGHT = 4.0
+
+SCORE_FIELDS = [
+    "affinity_score",
+    "content_type_weight",
+    "recent_update_boost",
+    "likes_count",
+    "comments_count",
+    "shares_count",
+    "ranking_score",
+]
+
+
+def content_type_weight(media_counts):
+    """`media_counts` is reference_media_type -> number of references."""
+    reference_count = sum(media_counts.values())
+    if not reference_count:
+        return (1.0 + NO_REFERENCE_WEIGHT) / 1
+
+    weight = 1.0 + sum(
+        REFERENCE_MEDIA_WEIGHT.get(media_type, DEFAULT_REFERENCE_WEIGHT) * count
+        for media_type, count in media_counts.items()
+    )
+    return weight / (reference_count + 1)
+
+
+def backfill_chunk(posts):
+    """Rescores `posts`, a list of (post_id, date_posted). Returns rows written."""
+    post_ids = [post_id for post_id, _ in posts]
+
+    reactions = dict(
+        PreviewCount.objects.filter(post_id__in=post_ids)
+        .values("post_id")
+        .annotate(total=Sum("count"))
+        .values_list("post_id", "total")
+    )
+    activity = {
+        (post_id, count_type): count
+        for post_id, count_type, count in ActivityCount.objects.filter(
+            post_id__in=post_ids
+        ).values_list("post_id", "count_type", "count")
+    }
+    media = {}
+    for post_id, media_type, count in (
+        PostReference.objects.filter(post_id__in=post_ids)
+        .values("post_id", "reference_media_type")
+        .annotate(count=Count("reference_id"))
+        .values_list("post_id", "reference_media_type", "count")
+    ):
+        media.setdefault(post_id, {})[media_type] = count
+
+    with transaction.atomic():
+        existing = {
+            score.post_id: score
+            for score in PostScore.objects.select_for_update().filter(
+                post_id__in=post_ids
+            )
+        }
+        to_update = []
+        to_create = []
+        for post_id, date_posted in posts:
+            score = existing.get(post_id)
+            if score is None:
+                score = PostScore(post_id=post_id)
+                to_create.append(score)
+            else:
+                to_update.append(score)
+
+            score.affinity_score = 1.0
+            score.content_type_weight = content_type_weight(media.get(post_id, {}))
+            score.recent_update_boost = 1.0
+            score.likes_count = max(reactions.get(post_id) or 0, 0)
+            score.comments_count = max(activity.get((post_id, "comment"), 0), 0)
+            score.shares_count = max(activity.get((post_id, "share"), 0), 0)
+            score.ranking_score = compute_ranking_score(score, date_posted)
+
+        if to_update:
+            PostScore.objects.bulk_update(to_update, SCORE_FIELDS)
+        if to_create:
+            # The worker seeds a row for every new post; one that lands
+            # between the read above and this insert wins.
+            PostScore.objects.bulk_create(to_create, ignore_conflicts=True)
+
+    return len(posts)
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _shard_progress_path(checkpoint, shard):
+    return f"{checkpoint}.{shard}"
+
+
+def key_ranges(workers):
+    """
+    Splits post_id into `workers` ranges of about equal size, as
+    [(after, upto)] - after exclusive, upto inclusive, None for unbounded.
+    """
+    total = Post.objects.count()
+    bounds = [None]
+    for shard in range(1, workers):
+        offset = total * shard // workers
+        bound = (
+            Post.objects.order_by("post_id")
+            .values_list("post_id", flat=True)[offset : offset + 1]
+            .first()
+        )
+        if bound is not None and bound != bounds[-1]:
+            bounds.append(bound)
+    bounds.append(None)
+    return list(zip(bounds, bounds[1:]))
+
+
+def backfill_range(shard, after, upto, chunk_size, checkpoint):
+    """Backfills one key range, resuming from its progress file."""
+    progress_path = _shard_progress_path(checkpoint, shard)
+    progress = _read_json(progress_path) or {}
+    if progress.get("done"):
+        return 0
+    after = progress.get("last_post_id", after)
+
+    written = 0
+    while True:
+        queryset = Post.objects.filter(post_id__gt=after) if after else Post.objects
+        if upto is not None:
+            queryset = queryset.filter(post_id__lte=upto)
+        posts = list(
+            queryset.order_by("post_id").values_list("post_id", "date_posted")[
+                :chunk_size
+            ]
+        )
+        if not posts:
+            break
+
+        written += backfill_chunk(posts)
+        after = posts[-1][0]
+        _write_json(progress_path, {"last_post_id": after})
+
+    _write_json(progress_path, {"last_post_id": after, "done": True})
+    return written
+
+
+def _run_shard(args):
+    return backfill_range(*args)
+
+
+class Command(BaseCommand):
+    help = "Recompute PostScore for every post, resumably and in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any saved checkpoint and start from the first post.",
+        )
+
+    def handle(self, *args, chunk_size, workers, checkpoint, restart, **options):
+        if chunk_size < 1 or workers < 1:
+            raise CommandError("--chunk-size and --workers must be at least 1")
+
+        manifest = None if restart else _read_json(checkpoint)
+        if manifest is None:
+            manifest = {"ranges": key_ranges(workers)}
+            for shard in range(len(manifest["ranges"])):
+                try:
+                    os.remove(_shard_progress_path(checkpoint, shard))
+                except FileNotFoundError:
+                    pass
+            _write_json(checkpoint, manifest)
+        elif len(manifest["ranges"]) != workers:
+            self.stdout.write(
+                f"Resuming with the checkpoint's {len(manifest['ranges'])} ranges"
+            )
+
+        jobs = [
+            (shard, after, upto, chunk_size, checkpoint)
+            for shard, (after, upto) in enumerate(manifest["ranges"])
+        ]
+        if len(jobs) == 1:
+            written = [_run_shard(jobs[0])]
+        else:
+            # Forked children must not share the parent's DB socket.
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(len(jobs)) as pool:
+                written = pool.map(_run_shard, jobs)
+
+        for shard in range(len(jobs)):
+            os.remove(_shard_progress_path(checkpoint, shard))
+        os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Rescored {sum(written)} posts"))
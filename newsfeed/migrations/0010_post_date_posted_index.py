@@ -0,0 +1,21 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsfeed", "0009_postscoreflush"),
+    ]
+
+    operations = [
+        # Lets the periodic decay rescore start at the recent posts instead
+        # of walking every PostScore row.
+        migrations.AlterField(
+            model_name="post",
+            name="date_posted",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.15 on 2026-10-18 00:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsfeed", "0010_post_date_posted_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CounterFlush",
+            fields=[
+                (
+                    "batch_id",
+                    models.CharField(max_length=40, primary_key=True, serialize=False),
+                ),
+                (
+                    "applied_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+    ]
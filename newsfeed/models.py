@@ -1,5 +1,6 @@
 import uuid
 import random
+from datetime import timezone as dt_timezone
 from django.db import models
 from django.db.models import Q
 from django.utils.timezone import now
@@ -65,7 +66,7 @@ class Post(models.Model):
     is_live = models.BooleanField(default=False)
     is_archived = models.BooleanField(default=False)
     on_feed = models.CharField(max_length=50)
-    date_posted = models.DateTimeField(default=now)
+    date_posted = models.DateTimeField(default=now, db_index=True)
     from_system = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True, default=None)
     deleted_by = models.ForeignKey(
@@ -289,6 +290,31 @@ class PostScore(models.Model):
     ranking_score = models.FloatField(default=0.0, db_index=True)
 
 
+class CounterFlush(models.Model):
+    """
+    Ledger of reaction/activity counter batches already applied to the tally
+    tables (see newsfeed.services.reaction_counters), written in the same
+    transaction as the batch - the counterpart of PostScoreFlush. Pruned
+    after COUNTER_FLUSH_LEDGER_TTL.
+    """
+
+    batch_id = models.CharField(max_length=40, primary_key=True)
+    applied_at = models.DateTimeField(default=now, db_index=True)
+
+
+class PostScoreFlush(models.Model):
+    """
+    Ledger of ranking-update batches already applied to PostScore (see
+    newsfeed.services.ranking_updates). Written in the same transaction as
+    the batch, so a flush that dies after committing but before clearing its
+    Redis batch is recognised on retry and not applied twice. Pruned after
+    RANKING_FLUSH_LEDGER_TTL.
+    """
+
+    batch_id = models.CharField(max_length=40, primary_key=True)
+    applied_at = models.DateTimeField(default=now, db_index=True)
+
+
 class PostSave(models.Model):
     id = models.CharField(max_length=40, default=uuid.uuid4, primary_key=True)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="saved_post")
@@ -303,21 +329,56 @@ class PostSave(models.Model):
         unique_together = ("post", "entity")
 
 
+# 14 days = 14 * 24 * 60 * 60
+NEWSFEED_INDEX_TTL = 1209600
+
+
 class NewsfeedIndex(DjangoCassandraModel):
+    """
+    A viewer's fanned-out feed, one partition per viewer per UTC day, newest
+    first within it.
+
+    Partitioned by day so a heavy follower's feed is fourteen bounded
+    partitions instead of one that grows with every realm they follow -
+    fetch_friends_posts walks the days newest-first until a page fills.
+    Anything writing a row sets `day` from its created_at via day_of().
+
+    created_at is the first clustering column so a page is a slice -
+    `created_at < cursor LIMIT n` - rather than a read of the partition head.
+    Seen posts are tracked outside the table (RedisPubSubClient.
+    mark_feed_posts_seen), so rows are only ever deleted on unfollow.
+
+    A new table rather than an ALTER, because Cassandra cannot change a
+    primary key. Until the Go worker writes it, the feed keeps reading
+    LegacyNewsfeedIndex - see FEED_INDEX_BY_DAY_READS - while every Python
+    writer fills both, and backfill_newsfeed_index copies the legacy rows
+    across before the switch.
+    """
+
+    __table_name__ = "newsfeed_index_by_day"
+
     # The viewer_id (the person who owns this feed)
     bucket = columns.Text(partition_key=True)
-    post_id = columns.Text(primary_key=True)
+    day = columns.Date(partition_key=True)
     created_at = columns.DateTime(primary_key=True, clustering_order="DESC")
+    post_id = columns.Text(primary_key=True)
     author_id = columns.Text()
     type = columns.Text(required=True, default="fanout")  # fanout, suggested, sponsored
 
     __options__ = {
-        # 14 days = 14 * 24 * 60 * 60
-        "default_time_to_live": 1209600,
-        # Optimization: Since you delete frequently, keep the grace period low
-        "gc_grace_seconds": 86400,  # 1 day (standard for high-turnover caches)
+        "default_time_to_live": NEWSFEED_INDEX_TTL,
+        # Deletes are rare now (unfollow only), but a short grace period still
+        # keeps those few from lingering on the read path.
+        "gc_grace_seconds": 86400,
     }
 
+    @staticmethod
+    def day_of(created_at):
+        """The `day` partition a row created at `created_at` belongs to."""
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(dt_timezone.utc)
+        return created_at.date()
+
     class Meta:
         get_pk_field = "post_id"
 
@@ -325,6 +386,69 @@ class NewsfeedIndex(DjangoCassandraModel):
         return f"{self.bucket} - {self.post_id} at {self.created_at}"
 
 
+class LegacyNewsfeedIndex(DjangoCassandraModel):
+    """
+    The original feed table, one partition per viewer clustered on post_id,
+    which the Go worker's fan-out, backfill, unfriend and viewcache handlers
+    still write. Read by the friends feed until FEED_INDEX_BY_DAY_READS is
+    switched on, and written alongside NewsfeedIndex by feed_fanout until
+    then; dropped once nothing reads it.
+    """
+
+    __table_name__ = "newsfeed_index"
+
+    bucket = columns.Text(partition_key=True)
+    post_id = columns.Text(primary_key=True)
+    created_at = columns.DateTime(primary_key=True, clustering_order="DESC")
+    author_id = columns.Text()
+    type = columns.Text(required=True, default="fanout")
+
+    __options__ = {
+        "default_time_to_live": NEWSFEED_INDEX_TTL,
+        "gc_grace_seconds": 86400,
+    }
+
+    class Meta:
+        get_pk_field = "post_id"
+
+    def __str__(self):
+        return f"{self.bucket} - {self.post_id} at {self.created_at}"
+
+
+class AuthorTimeline(DjangoCassandraModel):
+    """
+    Every author's own recent posts, newest first - the pull side of the
+    friends feed.
+
+    An author with more than PULL_AUTHOR_FOLLOWER_THRESHOLD followers (see
+    entity.services.follows) is not fanned out into follower buckets: fan-out
+    cost would grow with the audience, and the capped version silently left
+    everyone past the cap without the post. fetch_friends_posts reads such
+    authors' timelines here instead and merges them into the viewer's
+    NewsfeedIndex page by created_at.
+
+    Written for every post, not only for current pull authors, so an author
+    crossing the threshold already has their history in place.
+    """
+
+    __table_name__ = "author_timeline"
+
+    author_id = columns.Text(partition_key=True)
+    created_at = columns.DateTime(primary_key=True, clustering_order="DESC")
+    post_id = columns.Text(primary_key=True)
+
+    __options__ = {
+        "default_time_to_live": NEWSFEED_INDEX_TTL,
+        "gc_grace_seconds": 86400,
+    }
+
+    class Meta:
+        get_pk_field = "post_id"
+
+    def __str__(self):
+        return f"{self.author_id} - {self.post_id} at {self.created_at}"
+
+
 class TrendingPool(DjangoCassandraModel):
     # The partition key: "global", "gaming", "fitness", etc.
     # experiment between 100 or 1000 for trending post scores
@@ -1,20 +1,26 @@
 from celery import shared_task
-from django.core.cache import cache
-from ..helpers.query_functions import update_ranking_score
+from ..services.reaction_counters import flush_counters
+from ..services.ranking_decay import rescore_decayed_posts
+from ..services.ranking_updates import flush_ranking_updates, record_ranking_update
 
 
 @shared_task
 def calculate_ranking_score_task(post_id, update_type, is_decrease):
-    print("Init Score Recalculation...")
+    # No per-post lock any more - it dropped every event that arrived while
+    # it was held. The event is recorded and folded into the next flush.
+    record_ranking_update(post_id, update_type, is_decrease)
 
-    lock_key = f"active_ranking_update_{post_id}"
 
-    if not cache.add(lock_key, "locked", timeout=10):
-        print(f"Post {post_id} update already in progress. Skipping.")
-        return
+@shared_task
+def flush_ranking_updates_task():
+    flush_ranking_updates()
+
+
+@shared_task
+def rescore_decayed_posts_task():
+    rescore_decayed_posts()
+
 
-    try:
-        print(f"Recalculating score for post {post_id}...")
-        update_ranking_score(post_id, update_type, is_decrease)
-    finally:
-        pass
+@shared_task
+def flush_counters_task():
+    flush_counters()
@@ -17,7 +17,35 @@ from .models import (
 from user.serializers import AccountPreviewSerializer
 from entity.serializers import EntitySerializer
 from community.models import Realm
-from .services.link_preview import extract_first_url, get_preview
+from .services.link_preview import extract_first_url
+from .services.link_preview_worker import get_preview_or_enqueue
+
+
+def post_link_url(post):
+    return extract_first_url(post.caption or "")
+
+
+def comment_link_url(comment):
+    return extract_first_url(comment.text or "")
+
+
+def _context_link_preview(serializer, obj, extract_url):
+    """
+    The preview batched into context by link_preview_context() when the view
+    built one, otherwise a per-object lookup. Never fetches inline - a cold
+    URL comes back as a pending card and the viewer is nudged over SSE once
+    it resolves.
+    """
+    previews = serializer.context.get("link_previews")
+    if previews is not None and obj.pk in previews:
+        return previews[obj.pk]
+
+    url = extract_url(obj)
+    return (
+        get_preview_or_enqueue(url, serializer.context.get("viewer_entity_id"))
+        if url
+        else None
+    )
 
 
 class PostTagSerializer(serializers.ModelSerializer):
@@ -99,8 +127,7 @@ class PostSerializer(serializers.ModelSerializer):
     link_preview = serializers.SerializerMethodField()
 
     def get_link_preview(self, obj):
-        url = extract_first_url(obj.caption or "")
-        return get_preview(url) if url else None
+        return _context_link_preview(self, obj, post_link_url)
 
     class Meta:
         model = Post
@@ -135,8 +162,7 @@ class CommentSerializer(serializers.ModelSerializer):
         return getattr(obj, "entity_reaction", None)
 
     def get_link_preview(self, obj):
-        url = extract_first_url(obj.text or "")
-        return get_preview(url) if url else None
+        return _context_link_preview(self, obj, comment_link_url)
 
     def get_reply_count(self, obj):
         # Annotated by the view for the top-level list ("View 3 replies").
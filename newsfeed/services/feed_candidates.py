@@ -0,0 +1,142 @@
+"""
+Newsfeed candidate generation: friends and trending, blended into one page.
+
+NewsfeedView used to alternate whole pages between the two sources, with a
+Redis read-modify-write per request to remember which one was next, and a
+second serial Cassandra read whenever the chosen source came back empty.
+
+generate_candidates() reads both sources at once on a small per-process
+thread pool and interleaves them FEED_FRIENDS_SHARE to the rest (0.7 gives
+7 friends posts and 3 trending on a page of 10), de-duplicated by post_id.
+When one side runs short the other fills the page, so an empty friends feed
+is an all-trending page in the same single round of I/O.
+
+Anything that reads Postgres - the viewer's interest categories and the
+pull authors they follow - is resolved on the request thread before the
+reads are submitted, so the pool threads only ever touch Cassandra and
+Redis and never open database connections of their own. Like the link
+preview pool (link_preview_worker.py), the executor is built lazily so it
+is created after the gunicorn fork.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from entity.services.follows import get_followed_pull_author_ids
+from ..helpers.query_functions import (
+    advance_feed_cursor,
+    fetch_friends_rows,
+    fetch_trending_posts,
+    resolved_interest_categories,
+)
+
+logger = logging.getLogger(__name__)
+
+FEED_CANDIDATE_WORKERS = 8
+TRENDING_CANDIDATE_LIMIT = 100
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=FEED_CANDIDATE_WORKERS,
+                    thread_name_prefix="feedcandidates",
+                )
+    return _executor
+
+
+def interleave(friends, trending, page_size, friends_share):
+    """
+    Blends `friends` and `trending` post ids into at most `page_size` ids.
+    Each slot takes a friends post while friends hold no more than
+    `friends_share` of the slots filled so far, and a trending post
+    otherwise. Either side fills in once the other is exhausted, and a post
+    already picked is skipped. Returns (post_ids, friends_consumed) - how many of `friends`
+    the page used, for resuming the friends feed after exactly those.
+    """
+    picked = []
+    picked_ids = set()
+    fi = ti = 0
+    friends_used = 0
+    while len(picked) < page_size and (fi < len(friends) or ti < len(trending)):
+        want_friend = friends_used <= len(picked) * friends_share
+        if fi < len(friends) and (want_friend or ti >= len(trending)):
+            post_id = friends[fi]
+            fi += 1
+            if post_id not in picked_ids:
+                friends_used += 1
+        else:
+            post_id = trending[ti]
+            ti += 1
+        if post_id not in picked_ids:
+            picked.append(post_id)
+            picked_ids.add(post_id)
+    return picked, fi
+
+
+def _next_friends_cursor(rows, consumed, cursor, next_cursor):
+    """
+    Where the friends feed resumes after a page that used the first
+    `consumed` of `rows`. Rows it did not use are served on a later page
+    rather than skipped.
+    """
+    if consumed == len(rows):
+        # Also covers the rows fetch_friends_rows passed over as seen.
+        return next_cursor
+    for post_id, created_at in rows[:consumed]:
+        cursor = advance_feed_cursor(cursor, post_id, created_at)
+    return cursor
+
+
+def _result(future, source):
+    try:
+        return future.result()
+    except Exception:
+        logger.warning("Feed candidate source %s failed", source, exc_info=True)
+        return None
+
+
+def generate_candidates(entity, page_size, friends_cursor=None):
+    """
+    One page of candidate post ids for `entity`, friends and trending
+    blended. Returns (post_ids, next friends cursor). A source that fails is
+    logged and left out of the page rather than failing it.
+    """
+    page_size = int(page_size)
+    pull_author_ids = get_followed_pull_author_ids(entity.id)
+    categories = resolved_interest_categories(entity)
+
+    executor = _get_executor()
+    friends_future = executor.submit(
+        fetch_friends_rows, entity.id, page_size, friends_cursor, pull_author_ids
+    )
+    trending_future = executor.submit(
+        fetch_trending_posts,
+        entity.id,
+        page_size,
+        TRENDING_CANDIDATE_LIMIT,
+        categories,
+    )
+
+    friends = _result(friends_future, "friends") or ([], friends_cursor)
+    friends_rows, next_cursor = friends
+    trending = _result(trending_future, "trending") or []
+
+    post_ids, consumed = interleave(
+        [post_id for post_id, _ in friends_rows],
+        trending,
+        page_size,
+        settings.FEED_FRIENDS_SHARE,
+    )
+    return post_ids, _next_friends_cursor(
+        friends_rows, consumed, friends_cursor, next_cursor
+    )
@@ -0,0 +1,140 @@
+"""
+Concurrent reads of the head of several feed partitions - NewsfeedIndex day
+partitions, and the AuthorTimelines of the pull authors a viewer follows.
+
+A friends-feed page walks the viewer's day partitions newest-first until it
+fills. Read one at a time, a sparse or new feed - mostly empty days, which
+yield no rows and so cost nothing against MAX_FRIENDS_FEED_SLICES - paid a
+round trip per day, about fifteen serial reads for one page.
+
+read_day_heads() instead sends the first slice of every day at once, as
+prepared single-partition SELECTs via execute_async, the way
+trending_pool.read_trending_candidates reads its categories. A day that
+errors or times out comes back as None and the caller reads it the slow way
+rather than losing its rows.
+
+read_timeline_heads() does the same for pull authors: the merge needs the
+head of every followed timeline before it can yield its first row, so read
+one at a time a viewer following hundreds of them paid hundreds of serial
+round trips. They go through execute_concurrent instead, at most
+TIMELINE_READ_CONCURRENCY in flight.
+"""
+
+import logging
+import threading
+
+from cassandra.concurrent import execute_concurrent
+from cassandra.cqlengine import connection as cql_connection
+
+from ..models import AuthorTimeline, NewsfeedIndex
+
+logger = logging.getLogger(__name__)
+
+FEED_DAY_READ_TIMEOUT = 0.5
+TIMELINE_READ_CONCURRENCY = 50
+
+# (session, query) -> prepared SELECT, per process - see feed_fanout._prepared.
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _session():
+    return cql_connection.get_session()
+
+
+def _prepare(session, query):
+    key = (id(session), query)
+    statement = _prepared.get(key)
+    if statement is None:
+        with _prepared_lock:
+            statement = _prepared.get(key)
+            if statement is None:
+                statement = session.prepare(query)
+                _prepared[key] = statement
+    return statement
+
+
+def _select_statement(session):
+    return _prepare(
+        session,
+        f"SELECT post_id, created_at FROM {NewsfeedIndex.column_family_name()} "
+        f"WHERE bucket = ? AND day = ? LIMIT ?",
+    )
+
+
+def _timeline_statement(session, after_cursor):
+    return _prepare(
+        session,
+        f"SELECT post_id, created_at FROM {AuthorTimeline.column_family_name()} "
+        f"WHERE author_id = ? "
+        f"{'AND created_at <= ? ' if after_cursor else ''}LIMIT ?",
+    )
+
+
+def read_day_heads(bucket, days, limit):
+    """
+    The newest `limit` (post_id, created_at) rows of each of `bucket`'s
+    `days`, in the same order as `days`; None for a day that failed.
+    """
+    if not days:
+        return []
+
+    session = _session()
+    select = _select_statement(session)
+    futures = [
+        session.execute_async(
+            select, (bucket, day, limit), timeout=FEED_DAY_READ_TIMEOUT
+        )
+        for day in days
+    ]
+
+    heads = []
+    for day, future in zip(days, futures):
+        try:
+            # cqlengine sets the shared session's row_factory to dict_factory.
+            rows = future.result()
+            heads.append([(row["post_id"], row["created_at"]) for row in rows])
+        except Exception:
+            logger.warning("Feed day %s of %s read failed", day, bucket, exc_info=True)
+            heads.append(None)
+    return heads
+
+
+def read_timeline_heads(author_ids, cursor, limit):
+    """
+    The first slice of each of `author_ids`' AuthorTimeline at or below
+    `cursor`'s created_at (see query_functions._slices): the newest `limit`
+    (post_id, created_at) rows, in the same order as `author_ids`; None for
+    an author whose read failed.
+    """
+    if not author_ids:
+        return []
+
+    session = _session()
+    select = _timeline_statement(session, cursor is not None)
+    statements = [
+        (
+            select,
+            (str(author_id), cursor[0], limit)
+            if cursor is not None
+            else (str(author_id), limit),
+        )
+        for author_id in author_ids
+    ]
+    results = execute_concurrent(
+        session,
+        statements,
+        concurrency=TIMELINE_READ_CONCURRENCY,
+        raise_on_first_error=False,
+    )
+
+    heads = []
+    for author_id, (success, rows) in zip(author_ids, results):
+        if not success:
+            logger.warning(
+                "Timeline read of pull author %s failed", author_id, exc_info=rows
+            )
+            heads.append(None)
+            continue
+        heads.append([(row["post_id"], row["created_at"]) for row in rows])
+    return heads
@@ -0,0 +1,158 @@
+"""
+Bulk writer for NewsfeedIndex rows - and, while the feed still reads it,
+the same rows into LegacyNewsfeedIndex.
+
+Fan-out used to wrap every follower's insert in one cqlengine BatchQuery -
+a LOGGED batch spanning one partition per follower, which is the most
+expensive write Cassandra has (batchlog write and replay bookkeeping on the
+coordinator, every replica set involved) and trips batch_size_warn at a few
+hundred followers.
+
+Here rows are grouped by partition - (bucket, day), or bucket alone in the
+legacy table - and written as prepared INSERTs: one statement per single-row
+partition, one UNLOGGED batch for a partition with several rows, which stays
+a single mutation on a single replica set. Statements run through
+execute_concurrent FANOUT_CHUNK_SIZE at a time with at most
+FANOUT_CONCURRENCY in flight, so a post to a large audience cannot flood the
+connection pool; a chunk's failures are retried on their own, with backoff,
+before the next chunk starts.
+
+Rows carry no per-write TTL - the table's default_time_to_live applies.
+
+Scope: live fan-out is done by the Go worker, off the BULK_FANOUT_TO_CACHE and
+BACKFILL_NEW_FRIEND_FEED queues, and is not changed by this module. Its Python
+callers here - bulk_fanout_to_cache and backfill_new_friend_feed in
+helpers.query_functions - are not invoked anywhere in this repo; the only
+in-repo writer that runs is the backfill_newsfeed_index command.
+"""
+
+import logging
+import threading
+import time
+
+from cassandra.concurrent import execute_concurrent
+from cassandra.cqlengine import connection as cql_connection
+from cassandra.query import BatchStatement, BatchType
+
+from ..models import LegacyNewsfeedIndex, NewsfeedIndex
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHUNK_SIZE = 500
+FANOUT_CONCURRENCY = 50
+FANOUT_RETRIES = 2
+FANOUT_RETRY_BACKOFF = 0.05
+
+# model -> (inserted columns, partition key columns)
+_TABLES = {
+    NewsfeedIndex: (
+        ("bucket", "day", "created_at", "post_id", "author_id", "type"),
+        ("bucket", "day"),
+    ),
+    LegacyNewsfeedIndex: (
+        ("bucket", "post_id", "created_at", "author_id", "type"),
+        ("bucket",),
+    ),
+}
+FEED_INDEX_MODELS = (NewsfeedIndex, LegacyNewsfeedIndex)
+
+# (session, model) -> prepared INSERT. Keyed by the session rather than held
+# as module globals because cqlengine's session is per process: a statement
+# prepared before a fork is no use to the child.
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _session():
+    return cql_connection.get_session()
+
+
+def _insert_statement(session, model):
+    key = (id(session), model)
+    statement = _prepared.get(key)
+    if statement is None:
+        with _prepared_lock:
+            statement = _prepared.get(key)
+            if statement is None:
+                columns, _ = _TABLES[model]
+                statement = session.prepare(
+                    f"INSERT INTO {model.column_family_name()} "
+                    f"({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})"
+                )
+                _prepared[key] = statement
+    return statement
+
+
+def _statements(session, rows, model):
+    """One (statement, params) per partition of `model` in `rows`."""
+    insert = _insert_statement(session, model)
+    columns, partition_key = _TABLES[model]
+
+    partitions = {}
+    for row in rows:
+        partition = tuple(row[column] for column in partition_key)
+        partitions.setdefault(partition, []).append(
+            tuple(
+                row.get(column, "fanout") if column == "type" else row[column]
+                for column in columns
+            )
+        )
+
+    statements = []
+    for params_list in partitions.values():
+        if len(params_list) == 1:
+            statements.append((insert, params_list[0]))
+            continue
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for params in params_list:
+            batch.add(insert, params)
+        statements.append((batch, None))
+    return statements
+
+
+def write_feed_rows(rows, models=FEED_INDEX_MODELS):
+    """
+    Writes feed rows, each a dict of bucket, day, created_at, post_id,
+    author_id and optionally type, to every table in `models`. Returns how
+    many partitions could not be written after retries; those are logged,
+    not raised - a missed fan-out row only means the post is absent from
+    one feed.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    session = _session()
+    statements = [
+        statement for model in models for statement in _statements(session, rows, model)
+    ]
+
+    failed = 0
+    for start in range(0, len(statements), FANOUT_CHUNK_SIZE):
+        pending = statements[start : start + FANOUT_CHUNK_SIZE]
+        for attempt in range(FANOUT_RETRIES + 1):
+            results = execute_concurrent(
+                session,
+                pending,
+                concurrency=FANOUT_CONCURRENCY,
+                raise_on_first_error=False,
+            )
+            pending = [
+                statement
+                for statement, (success, _) in zip(pending, results)
+                if not success
+            ]
+            if not pending:
+                break
+            if attempt < FANOUT_RETRIES:
+                time.sleep(FANOUT_RETRY_BACKOFF * (2**attempt))
+
+        if pending:
+            failed += len(pending)
+            logger.warning(
+                "Feed fan-out left %s partitions unwritten after %s retries",
+                len(pending),
+                FANOUT_RETRIES,
+            )
+    return failed
@@ -0,0 +1,193 @@
+"""
+Per-viewer cache of hydrated home-feed pages.
+
+NewsfeedView.post picks a page of candidate post ids and then does the
+expensive part: connections, followed realms and blocks for the ranking/
+filtering, one heavy hydrate query, and a full PostSerializer pass. For a
+viewer refreshing or re-scrolling onto the same candidates, that work gives
+the same answer every time. This caches the serialized cards per (viewer,
+candidate set) and, on a hit, only re-reads what the viewer can change
+themselves - is_saved and entity_reaction - plus any link preview that was
+still pending when the page was built.
+
+Invalidation is by change marks rather than by finding and deleting pages
+(a post sits in many viewers' pages, and nothing indexes them): a write
+stamps the post, its author, or a viewer with the time it happened, and a
+page built before any mark that applies to it is a miss. Marks only need to
+outlive the pages they can invalidate, so they share FEED_PAGE_TTL and the
+whole check is one MGET. Marked on:
+
+- post: edit, delete, privacy change (NewsfeedView.put/delete, Post saves)
+- author: every post narrowed or removed at once
+  (apply_profile_privacy_to_posts, account deletion)
+- viewer: a reaction (its counts are in the cards), a block either way, a
+  connection made or removed either way, or a follow made, approved or
+  removed
+
+Anything else on a card - reaction counts from other viewers, ranking score,
+the author's display name - is allowed to be FEED_PAGE_TTL stale.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .link_preview import get_cached_previews
+
+logger = logging.getLogger(__name__)
+
+FEED_PAGE_TTL = 60 * 5
+# Tolerated clock difference between the web hosts stamping marks and the one
+# building a page - a page is only trusted if it was built this long after
+# every mark that applies to it.
+CLOCK_SKEW_SECONDS = 2
+
+
+def _page_key(viewer_id, candidate_post_ids):
+    digest = hashlib.sha1(
+        ",".join(sorted(str(post_id) for post_id in candidate_post_ids)).encode()
+    ).hexdigest()
+    return f"chatterloop:feedpage:v1:{viewer_id}:{digest}"
+
+
+def _post_mark_key(post_id):
+    return f"chatterloop:feedpage:v1:mark:post:{post_id}"
+
+
+def _author_mark_key(entity_id):
+    return f"chatterloop:feedpage:v1:mark:author:{entity_id}"
+
+
+def _viewer_mark_key(entity_id):
+    return f"chatterloop:feedpage:v1:mark:viewer:{entity_id}"
+
+
+def _mark(keys):
+    """
+    Stamps `keys` once the surrounding transaction commits. Stamping first
+    would let a concurrent build read the pre-change rows after the mark and
+    cache them as newer than it.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+
+    def _stamp(keys=keys):
+        changed_at = time.time()
+        cache.set_many({key: changed_at for key in keys}, FEED_PAGE_TTL)
+
+    transaction.on_commit(_stamp)
+
+
+def invalidate_posts(post_ids):
+    _mark(_post_mark_key(post_id) for post_id in post_ids)
+
+
+def invalidate_authors(entity_ids):
+    _mark(_author_mark_key(entity_id) for entity_id in entity_ids)
+
+
+def invalidate_viewers(entity_ids):
+    _mark(_viewer_mark_key(entity_id) for entity_id in entity_ids)
+
+
+def _card_author_id(card):
+    entity = card.get("entity")
+    return entity.get("id") if entity else None
+
+
+def _get_page(viewer_id, candidate_post_ids):
+    entry = cache.get(_page_key(viewer_id, candidate_post_ids))
+    if entry is None:
+        return None
+
+    mark_keys = [_viewer_mark_key(viewer_id)]
+    # Every candidate, not just the cards: a candidate filtered out as not
+    # visible can become visible through an edit to its own privacy.
+    mark_keys += [_post_mark_key(post_id) for post_id in candidate_post_ids]
+    mark_keys += [_author_mark_key(author_id) for author_id in entry["author_ids"]]
+
+    marks = cache.get_many(mark_keys)
+    built_at = entry["built_at"]
+    if any(changed_at + CLOCK_SKEW_SECONDS >= built_at for changed_at in marks.values()):
+        return None
+    return entry["cards"]
+
+
+def _refresh_pending_previews(cards):
+    pending = [
+        card
+        for card in cards
+        if card.get("link_preview")
+        and card["link_preview"].get("status") == "pending"
+    ]
+    if not pending:
+        return
+
+    resolved = get_cached_previews(card["link_preview"]["url"] for card in pending)
+    for card in pending:
+        preview = resolved.get(card["link_preview"]["url"])
+        if preview is not None:
+            card["link_preview"] = preview
+
+
+def _patch_viewer_fields(cards, viewer_entity):
+    from newsfeed.models import PostSave, Reaction
+
+    post_ids = [card["post_id"] for card in cards]
+    saved = set(
+        PostSave.objects.filter(entity=viewer_entity, post_id__in=post_ids).values_list(
+            "post_id", flat=True
+        )
+    )
+    reactions = dict(
+        Reaction.objects.filter(entity=viewer_entity, post_id__in=post_ids).values_list(
+            "post_id", "emoji_id"
+        )
+    )
+
+    for card in cards:
+        card["is_saved"] = card["post_id"] in saved
+        emoji_id = reactions.get(card["post_id"])
+        card["entity_reaction"] = str(emoji_id) if emoji_id is not None else None
+
+
+def get_or_build_page(viewer_entity, candidate_post_ids, build):
+    """
+    The serialized cards for this viewer's page of `candidate_post_ids`.
+    `build()` runs the full hydrate + serialize on a miss and returns the
+    cards; on a hit only the viewer's own fields are re-read.
+    """
+    try:
+        cards = _get_page(viewer_entity.id, candidate_post_ids)
+    except Exception:
+        logger.warning("Feed page cache read failed (non-fatal)", exc_info=True)
+        cards = None
+
+    if cards is not None:
+        _patch_viewer_fields(cards, viewer_entity)
+        _refresh_pending_previews(cards)
+        return cards
+
+    built_at = time.time()
+    cards = [dict(card) for card in build()]
+
+    try:
+        cache.set(
+            _page_key(viewer_entity.id, candidate_post_ids),
+            {
+                "built_at": built_at,
+                "cards": cards,
+                "author_ids": list(
+                    {_card_author_id(card) for card in cards} - {None}
+                ),
+            },
+            FEED_PAGE_TTL,
+        )
+    except Exception:
+        logger.warning("Feed page cache write failed (non-fatal)", exc_info=True)
+
+    return cards
@@ -7,38 +7,49 @@ entry).
 
 Consumers: newsfeed (Post/Comment), diary (Entry), and the Node chat server
 via LinkPreviewView (an internal-auth caller, see newsfeed/drf_permissions.py).
-get_preview() is the only function other modules should call directly.
-
-KNOWN LIMITATION: is_safe_url() resolves the hostname and validates every
-returned address is public, and that check is re-run on every redirect hop.
-It does NOT pin the outbound connection to the specific IP it validated -
-requests/urllib3 re-resolves the hostname when it actually connects a moment
-later. This closes the overwhelming majority of real-world SSRF payloads
-(direct private/loopback/link-local/metadata-IP URLs, IP-literal encoding
-tricks, redirect chains to a different private host) but leaves a narrower
-DNS-rebinding window (a hostile authoritative DNS server alternating between
-a public answer for the check and a private answer for the connect). Closing
-that fully requires pinning the validated IP at the connection/transport
-level (or, more commonly in production, network-level egress filtering as
-defense-in-depth). Flagged here deliberately rather than silently assumed
-solved - treat as a follow-up hardening item before this handles very
-high-value/sensitive traffic.
+Other modules call get_preview() when they need the answer now, or
+link_preview_worker.get_preview_or_enqueue() when they must not block on a
+third-party fetch (serializers).
+
+Outbound connections are PINNED to the address is_safe_url() validated:
+every fetch goes through one shared, pooled session (_http_session) whose
+transport adapter connects to that already-checked IP rather than letting
+urllib3 re-resolve the hostname at connect time, with SNI and certificate
+verification still done against the hostname. That closes the DNS-rebinding
+window (a hostile authoritative DNS server alternating between a public
+answer for the check and a private answer for the connect) that a check-
+then-connect design leaves open. Resolutions are cached for DNS_CACHE_TTL,
+so the validated answer is also what later hops and requests reuse.
+Network-level egress filtering is still worth having as defense-in-depth.
 """
 
 import hashlib
 import ipaddress
 import re
 import socket
+import threading
+import time
+import uuid
+from http.cookiejar import DefaultCookiePolicy
 from urllib.parse import quote, urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from django.core.cache import cache
 from django.urls import reverse
 
 CACHE_TTL_OK = 60 * 60 * 24  # 24h
 CACHE_TTL_FAILED = 60 * 60  # 1h
 
+# Single-flight: one fetch per URL across every worker. The lock outlives the
+# slowest fetch_and_parse (oEmbed + scrape, each up to MAX_REDIRECTS hops);
+# a caller that finds it held waits up to SINGLE_FLIGHT_WAIT for the holder's
+# result before settling for a pending card.
+SINGLE_FLIGHT_LOCK_TTL = 30
+SINGLE_FLIGHT_WAIT = 5
+SINGLE_FLIGHT_POLL_INTERVAL = 0.1
+
 CONNECT_TIMEOUT = 3
 READ_TIMEOUT = 5
 MAX_REDIRECTS = 3
@@ -51,6 +62,17 @@ ALLOWED_IMAGE_CONTENT_TYPE_PREFIX = "image/"
 
 USER_AGENT = "ChatterloopLinkPreview/1.0 (+https://chatterloop.app)"
 
+# getaddrinfo() does not expose the record's real TTL, so this is a fixed,
+# deliberately short one - long enough that a burst of unfurls to one host
+# resolves once, short enough that a moved site is followed within a minute.
+DNS_CACHE_TTL = 60
+DNS_CACHE_MAX_ENTRIES = 1024
+
+# Shared connection pool: how many distinct hosts keep a pool, and how many
+# keep-alive connections each of those pools holds.
+POOL_HOSTS = 32
+POOL_MAXSIZE = 8
+
 URL_REGEX = re.compile(r"https?://[^\s<>\"']+")
 
 
@@ -120,6 +142,45 @@ def _is_public_ip(ip_str):
     )
 
 
+_dns_cache = {}  # hostname -> (expires_at, addresses or None)
+_dns_lock = threading.Lock()
+
+
+def _resolve_public_addresses(hostname):
+    """
+    The hostname's addresses if EVERY one of them is public, else None.
+    Cached for DNS_CACHE_TTL (unsafe answers too, so a host pointing at
+    private space is not re-resolved on every attempt). The transport
+    adapter connects to an address from this same answer, which is what
+    makes the check and the connect agree.
+    """
+    hostname = hostname.lower()
+    now = time.monotonic()
+
+    with _dns_lock:
+        entry = _dns_cache.get(hostname)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+    try:
+        addrinfo = socket.getaddrinfo(hostname, None)
+    except socket.gaierror:
+        return None
+
+    addresses = list(dict.fromkeys(sockaddr[0] for *_, sockaddr in addrinfo))
+    if not addresses or not all(_is_public_ip(address) for address in addresses):
+        addresses = None
+
+    with _dns_lock:
+        _dns_cache.pop(hostname, None)
+        if len(_dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+            # Insertion-ordered, so this drops the oldest resolution.
+            _dns_cache.pop(next(iter(_dns_cache)))
+        _dns_cache[hostname] = (now + DNS_CACHE_TTL, addresses)
+
+    return addresses
+
+
 def is_safe_url(url):
     """
     SSRF guard: scheme allowlist + resolve the hostname and require every
@@ -134,15 +195,95 @@ def is_safe_url(url):
     if parsed.scheme not in ALLOWED_SCHEMES or not parsed.hostname:
         return False
 
-    try:
-        addrinfo = socket.getaddrinfo(parsed.hostname, None)
-    except socket.gaierror:
-        return False
+    return _resolve_public_addresses(parsed.hostname) is not None
 
-    if not addrinfo:
-        return False
 
-    return all(_is_public_ip(sockaddr[0]) for *_, sockaddr in addrinfo)
+class _PinnedAddressAdapter(HTTPAdapter):
+    """
+    Connects to a validated address instead of the hostname - the first one
+    that accepts the connection, in resolver order, the way a plain connect
+    to the hostname would have.
+
+    The pool is keyed on the IP, with the hostname carried as the TLS
+    server_hostname/assert_hostname so SNI and certificate checks still see
+    the real name, and the Host header set explicitly (urllib3 would
+    otherwise send the IP). A host that fails validation is refused here
+    too, so nothing on this session can reach private address space even
+    if a caller skipped is_safe_url().
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        hostname = host_params["host"]
+        addresses = _resolve_public_addresses(hostname)
+        if not addresses:
+            raise requests.ConnectionError(
+                f"Refusing to connect to {hostname}: not a public address"
+            )
+
+        address = getattr(request, "pinned_address", None)
+        if address not in addresses:
+            address = addresses[0]
+        host_params = {**host_params, "host": address}
+        if host_params["scheme"] == "https":
+            pool_kwargs = {
+                **pool_kwargs,
+                "server_hostname": hostname,
+                "assert_hostname": hostname,
+            }
+        return host_params, pool_kwargs
+
+    def send(self, request, **kwargs):
+        parsed = urlparse(request.url)
+        addresses = _resolve_public_addresses(parsed.hostname or "")
+        if not addresses:
+            raise requests.ConnectionError(
+                f"Refusing to connect to {parsed.hostname}: not a public address"
+            )
+
+        request.headers["Host"] = parsed.netloc.rsplit("@", 1)[-1]
+        for attempt, address in enumerate(addresses, start=1):
+            request.pinned_address = address
+            try:
+                return super().send(request, **kwargs)
+            except requests.ConnectionError:
+                # e.g. an IPv6 first answer on an IPv4-only host.
+                if attempt == len(addresses):
+                    raise
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _http_session():
+    """
+    The process-wide session every outbound preview fetch goes through, so
+    repeat unfurls to the same host reuse a kept-alive connection instead of
+    paying a fresh TCP+TLS handshake. Built lazily, after gunicorn forks.
+
+    Cookies are refused outright: this session is shared by every user's
+    unfurls, and a cookie one site sets must not ride along on the next
+    user's request to it. trust_env is off so an HTTP(S)_PROXY in the
+    environment cannot route around the pinning.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.trust_env = False
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.headers["User-Agent"] = USER_AGENT
+                adapter = _PinnedAddressAdapter(
+                    pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
 
 
 def _guarded_get(url, *, session, timeout):
@@ -319,7 +460,7 @@ def fetch_oembed(url):
     endpoint, fallback_embed_url, embed_layout = provider
 
     try:
-        response = requests.get(
+        response = _http_session().get(
             endpoint,
             params={"url": url, "format": "json"},
             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
@@ -442,28 +583,27 @@ def fetch_and_parse(url):
 def _scrape_og_tags(url):
     """Guarded fetch + HTML parse. Never raises - returns None on any failure."""
     try:
-        with requests.Session() as session:
-            response = _guarded_get(
-                url, session=session, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        response = _guarded_get(
+            url, session=_http_session(), timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        if response is None:
+            return None
+
+        with response:
+            content_type = (
+                response.headers.get("Content-Type", "").split(";")[0].strip().lower()
             )
-            if response is None:
+            if content_type not in ALLOWED_HTML_CONTENT_TYPES:
                 return None
 
-            with response:
-                content_type = (
-                    response.headers.get("Content-Type", "").split(";")[0].strip().lower()
-                )
-                if content_type not in ALLOWED_HTML_CONTENT_TYPES:
-                    return None
-
-                body = b""
-                for chunk in response.iter_content(chunk_size=8192):
-                    body += chunk
-                    if len(body) > MAX_BODY_BYTES:
-                        break
+            body = b""
+            for chunk in response.iter_content(chunk_size=8192):
+                body += chunk
+                if len(body) > MAX_BODY_BYTES:
+                    break
 
-                resolved_url = response.url
-                encoding = response.encoding or "utf-8"
+            resolved_url = response.url
+            encoding = response.encoding or "utf-8"
     except (requests.RequestException, OSError):
         return None
 
@@ -517,7 +657,7 @@ def _scrape_og_tags(url):
     }
 
 
-def build_image_proxy_path(raw_url):
+def build_image_proxy_path(raw_url, variant=None):
     """
     Relative path (no host) for LinkPreviewImageProxyView, given a raw
     third-party image URL. Relative rather than absolute because the
@@ -530,6 +670,9 @@ def build_image_proxy_path(raw_url):
     (it's inline bytes, no privacy leak either), so pass it through as-is
     rather than wrapping it in a doomed proxy request. Any other
     non-http(s) scheme has nothing safe to fetch, so drop it.
+
+    `variant` asks the proxy for a resized copy (see
+    link_preview_images.IMAGE_VARIANTS) instead of the original bytes.
     """
     if not raw_url:
         return None
@@ -541,16 +684,118 @@ def build_image_proxy_path(raw_url):
         return None
 
     path = reverse("api-newsfeed:newsfeed-link-preview-image")
-    return f"{path}?url={quote(raw_url, safe='')}"
+    proxy_path = f"{path}?url={quote(raw_url, safe='')}"
+    if variant:
+        proxy_path += f"&variant={variant}"
+    return proxy_path
+
+
+def _empty_result(url, status_value):
+    return {
+        "url": url,
+        "resolved_url": None,
+        "title": None,
+        "description": None,
+        "image": None,
+        "site_name": None,
+        "favicon": None,
+        "embed_type": None,
+        "embed_url": None,
+        "embed_provider": None,
+        "embed_width": None,
+        "embed_height": None,
+        "embed_layout": None,
+        "status": status_value,
+    }
 
 
-def get_preview(url, force_refresh=False):
+def pending_preview(url):
     """
-    Cache-aside wrapper - the only function other modules should import.
-    Failures are cached too (shorter TTL) so a broken/blocked URL isn't
-    refetched on every request but does eventually get retried. image/
-    favicon are returned as proxy paths (see build_image_proxy_path), never
-    the raw third-party URL.
+    Placeholder card for a URL whose preview is still being resolved in the
+    background (see services/link_preview_worker.py). Same keys as a real
+    result so the client renders it with the same component.
+    """
+    return _empty_result(url, "pending")
+
+
+def get_cached_preview(url):
+    """Cache-only lookup: the stored result, or None. Never fetches."""
+    if not url:
+        return None
+    return cache.get(_cache_key(url))
+
+
+def get_cached_previews(urls):
+    """
+    Bulk get_cached_preview: url -> stored result for every url that has one,
+    fetched with a single MGET instead of one GET per card. Misses are simply
+    absent from the returned dict.
+    """
+    keys = {_cache_key(url): url for url in set(urls) if url}
+    if not keys:
+        return {}
+    found = cache.get_many(list(keys))
+    return {keys[key]: value for key, value in found.items() if value is not None}
+
+
+def _lock_key(url):
+    return f"{_cache_key(url)}:lock"
+
+
+def _acquire_fetch_lock(url):
+    """
+    Claims the right to fetch `url`. Returns the lock token, or None when
+    another worker already holds it.
+
+    cache.add is SET NX. The default cache is django_redis with
+    IGNORE_EXCEPTIONS, which answers None rather than True/False when Redis
+    is down - treated as acquired, so an outage degrades to the old
+    every-miss-fetches behaviour instead of every preview going pending.
+    """
+    token = uuid.uuid4().hex
+    added = cache.add(_lock_key(url), token, SINGLE_FLIGHT_LOCK_TTL)
+    return token if added is not False else None
+
+
+def _release_fetch_lock(url, token):
+    # Only our own lock - if the fetch outran the TTL, someone else's may
+    # have replaced it by now.
+    lock_key = _lock_key(url)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _wait_for_fetch(url, wait_seconds):
+    """
+    Waits for whoever holds the fetch lock to finish, then returns what they
+    stored - or None if it is still running after `wait_seconds`. Watches
+    the lock rather than the result key so a force_refresh caller does not
+    mistake the stale entry for the fresh one.
+    """
+    lock_key = _lock_key(url)
+    deadline = time.monotonic() + wait_seconds
+    while time.monotonic() < deadline:
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        if cache.get(lock_key) is None:
+            return cache.get(_cache_key(url))
+    return None
+
+
+def get_preview(url, force_refresh=False, wait_seconds=SINGLE_FLIGHT_WAIT):
+    """
+    Cache-aside wrapper. Failures are cached too (shorter TTL) so a broken/
+    blocked URL isn't refetched on every request but does eventually get
+    retried. image/favicon are returned as proxy paths (see
+    build_image_proxy_path), never the raw third-party URL.
+
+    Blocks on the fetch on a miss, so it belongs on paths that need the
+    answer now (LinkPreviewView, the background resolver). Serializers go
+    through link_preview_worker.get_preview_or_enqueue instead.
+
+    Misses are single-flight: when a viral link misses in many workers at
+    once, only the one holding the fetch lock goes to the origin. The rest
+    wait up to `wait_seconds` for its result and otherwise get a pending
+    card (not cached), exactly as a serializer would.
     """
     if not url:
         return None
@@ -561,34 +806,27 @@ def get_preview(url, force_refresh=False):
         if cached is not None:
             return cached
 
-    parsed = fetch_and_parse(url)
+    token = _acquire_fetch_lock(url)
+    if token is None:
+        result = _wait_for_fetch(url, wait_seconds)
+        return result if result is not None else pending_preview(url)
 
-    if parsed:
-        result = {
-            **parsed,
-            "image": build_image_proxy_path(parsed.get("image")),
-            "favicon": build_image_proxy_path(parsed.get("favicon")),
-            "status": "ok",
-        }
-        cache.set(key, result, CACHE_TTL_OK)
-    else:
-        result = {
-            "url": url,
-            "resolved_url": None,
-            "title": None,
-            "description": None,
-            "image": None,
-            "site_name": None,
-            "favicon": None,
-            "embed_type": None,
-            "embed_url": None,
-            "embed_provider": None,
-            "embed_width": None,
-            "embed_height": None,
-            "embed_layout": None,
-            "status": "failed",
-        }
-        cache.set(key, result, CACHE_TTL_FAILED)
+    try:
+        parsed = fetch_and_parse(url)
+
+        if parsed:
+            result = {
+                **parsed,
+                "image": build_image_proxy_path(parsed.get("image"), "card"),
+                "favicon": build_image_proxy_path(parsed.get("favicon"), "icon"),
+                "status": "ok",
+            }
+            cache.set(key, result, CACHE_TTL_OK)
+        else:
+            result = _empty_result(url, "failed")
+            cache.set(key, result, CACHE_TTL_FAILED)
+    finally:
+        _release_fetch_lock(url, token)
 
     return result
 
@@ -601,26 +839,25 @@ def fetch_image(url):
     size-capped, content-type-checked passthrough.
     """
     try:
-        with requests.Session() as session:
-            response = _guarded_get(
-                url, session=session, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        response = _guarded_get(
+            url, session=_http_session(), timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        if response is None:
+            return None
+
+        with response:
+            content_type = (
+                response.headers.get("Content-Type", "").split(";")[0].strip().lower()
             )
-            if response is None:
+            if not content_type.startswith(ALLOWED_IMAGE_CONTENT_TYPE_PREFIX):
                 return None
 
-            with response:
-                content_type = (
-                    response.headers.get("Content-Type", "").split(";")[0].strip().lower()
-                )
-                if not content_type.startswith(ALLOWED_IMAGE_CONTENT_TYPE_PREFIX):
+            body = b""
+            for chunk in response.iter_content(chunk_size=8192):
+                body += chunk
+                if len(body) > MAX_IMAGE_BYTES:
                     return None
 
-                body = b""
-                for chunk in response.iter_content(chunk_size=8192):
-                    body += chunk
-                    if len(body) > MAX_IMAGE_BYTES:
-                        return None
-
-                return body, content_type
+            return body, content_type
     except (requests.RequestException, OSError):
         return None
@@ -0,0 +1,222 @@
+"""
+Local, content-addressed cache for LinkPreviewImageProxyView, so a preview
+card's og:image/favicon is downloaded from the third-party origin once per
+host rather than once per feed impression.
+
+Two layers:
+
+- An index in the shared cache, url (+ variant) -> sha256 digest of the bytes
+  served for it. Same TTL as the preview metadata, so an image that changes
+  at the origin is picked up when the card itself is refreshed. Failed
+  fetches are indexed too, briefly, so a broken og:image is not re-requested
+  on every render.
+- The bytes themselves on local disk, one file per digest, shared by every
+  gunicorn worker on the host. Identical images (the same favicon linked from
+  a thousand pages) are stored once, and the digest doubles as a strong ETag.
+
+The disk cache is capped at LINK_PREVIEW_IMAGE_CACHE_MAX_BYTES and evicted
+least-recently-used: a hit bumps the file's mtime, and pruning deletes by
+oldest mtime. Pruning walks the directory, so it runs at most once per
+PRUNE_INTERVAL_SECONDS per process rather than on every write.
+
+Variants: "card" and "icon" are resized and re-encoded (WebP) for the
+preview card and its favicon slot, which is most of the byte savings on
+phone-camera og:images. Anything Pillow cannot or should not re-encode -
+SVG, animated GIF/WebP, a decompression bomb - is served as the original.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageOps
+
+from .link_preview import CACHE_TTL_OK, fetch_image
+
+logger = logging.getLogger(__name__)
+
+# variant -> bounding box. The original is always available as variant None.
+IMAGE_VARIANTS = {
+    "card": (600, 600),
+    "icon": (64, 64),
+}
+VARIANT_CONTENT_TYPE = "image/webp"
+VARIANT_QUALITY = 80
+# Refuse to decode anything larger - an 8MB PNG can still declare a canvas
+# big enough to exhaust a worker's memory once decompressed.
+MAX_DECODE_PIXELS = 40_000_000
+
+CACHE_TTL_MISSING = 60 * 10
+PRUNE_INTERVAL_SECONDS = 60
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+class CachedImage:
+    __slots__ = ("path", "content_type", "digest")
+
+    def __init__(self, path, content_type, digest):
+        self.path = path
+        self.content_type = content_type
+        self.digest = digest
+
+    @property
+    def etag(self):
+        return f'"{self.digest}"'
+
+
+def _cache_dir():
+    return Path(settings.LINK_PREVIEW_IMAGE_CACHE_DIR)
+
+
+def _index_key(url, variant):
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return f"chatterloop:linkpreview:image:{variant or 'original'}:{digest}"
+
+
+def _blob_path(digest):
+    return _cache_dir() / digest[:2] / digest
+
+
+def _render_variant(body, variant):
+    """Resized WebP bytes for `variant`, or None to serve the original."""
+    try:
+        with Image.open(io.BytesIO(body)) as image:
+            width, height = image.size
+            if width * height > MAX_DECODE_PIXELS:
+                return None
+            if getattr(image, "is_animated", False):
+                return None
+
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(IMAGE_VARIANTS[variant])
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+            out = io.BytesIO()
+            image.save(out, format="WEBP", quality=VARIANT_QUALITY)
+            return out.getvalue()
+    except Exception:
+        # Unsupported format (SVG, some ICOs) or a corrupt file - not an
+        # error worth more than falling back to the original bytes.
+        return None
+
+
+def _store_blob(body):
+    digest = hashlib.sha256(body).hexdigest()
+    path = _blob_path(digest)
+
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed into place, so a concurrent reader in
+        # another worker never sees a half-written file.
+        tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(body)
+        os.replace(tmp_path, path)
+        _maybe_prune()
+
+    return digest, path
+
+
+def _maybe_prune():
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+
+    try:
+        prune_image_cache()
+    except OSError:
+        logger.warning("Link preview image cache prune failed", exc_info=True)
+
+
+def prune_image_cache(max_bytes=None):
+    """Evicts least-recently-used files until the cache fits `max_bytes`."""
+    if max_bytes is None:
+        max_bytes = settings.LINK_PREVIEW_IMAGE_CACHE_MAX_BYTES
+
+    root = _cache_dir()
+    if not root.exists():
+        return 0
+
+    entries = []
+    total = 0
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def get_proxied_image(url, variant=None):
+    """
+    The cached image for `url` (resized when `variant` names one of
+    IMAGE_VARIANTS), fetching it through fetch_image() on a miss. Returns a
+    CachedImage, or None when the image cannot be served.
+    """
+    index_key = _index_key(url, variant)
+    indexed = cache.get(index_key)
+
+    if indexed is not None:
+        if not indexed:
+            return None
+        path = _blob_path(indexed["digest"])
+        if _touch(path):
+            return CachedImage(path, indexed["content_type"], indexed["digest"])
+        # Evicted from disk since it was indexed - fall through and refetch.
+
+    fetched = fetch_image(url)
+    if fetched is None:
+        cache.set(index_key, {}, CACHE_TTL_MISSING)
+        return None
+
+    body, content_type = fetched
+    if variant:
+        rendered = _render_variant(body, variant)
+        if rendered is not None:
+            body, content_type = rendered, VARIANT_CONTENT_TYPE
+
+    try:
+        digest, path = _store_blob(body)
+    except OSError:
+        logger.warning("Link preview image cache write failed", exc_info=True)
+        return None
+
+    cache.set(
+        index_key, {"digest": digest, "content_type": content_type}, CACHE_TTL_OK
+    )
+    return CachedImage(path, content_type, digest)
@@ -0,0 +1,183 @@
+"""
+Background resolution for link previews, so serializing a feed page never
+waits on a third-party fetch.
+
+On a cache miss get_preview_or_enqueue() hands the URL to a small per-process
+thread pool and returns a `status: "pending"` card straight away. The pool
+resolves it through get_preview() - which stores the result in the shared
+cache - and then nudges every viewer that was shown the pending card over
+their `events_<entity id>` SSE channel, so the client can refetch just that
+card.
+
+An in-process pool rather than a worker_service queue: the resolve is
+network-bound and needs nothing but the cache, and the Go worker has no
+unfurl code of its own. Per-process also means per-gunicorn-worker, so the
+executor is built lazily - a pool created at import time would not survive
+the fork.
+
+Bounded on purpose. A URL already queued in this process is not queued twice
+(its waiters are merged), and once MAX_QUEUED_URLS are outstanding new misses
+are dropped rather than queued behind them - the card simply stays pending
+and the next render enqueues it again.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from user_service.services.redis import RedisPubSubClient
+from .link_preview import (
+    SINGLE_FLIGHT_LOCK_TTL,
+    get_cached_preview,
+    get_cached_previews,
+    get_preview,
+    pending_preview,
+)
+
+logger = logging.getLogger(__name__)
+
+LINK_PREVIEW_WORKERS = 4
+MAX_QUEUED_URLS = 200
+LINK_PREVIEW_RESOLVED_EVENT = "link_preview_resolved"
+
+_executor = None
+_lock = threading.Lock()
+# url -> entity ids to nudge once it resolves. Presence means "queued".
+_waiting = {}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=LINK_PREVIEW_WORKERS, thread_name_prefix="linkpreview"
+        )
+    return _executor
+
+
+def enqueue_preview(url, notify_entity_id=None):
+    """
+    Queue `url` for background resolution. Returns False when it was dropped
+    because the queue is full.
+    """
+    with _lock:
+        waiters = _waiting.get(url)
+        if waiters is not None:
+            if notify_entity_id:
+                waiters.add(str(notify_entity_id))
+            return True
+
+        if len(_waiting) >= MAX_QUEUED_URLS:
+            return False
+
+        _waiting[url] = {str(notify_entity_id)} if notify_entity_id else set()
+        executor = _get_executor()
+
+    try:
+        executor.submit(_resolve, url)
+    except RuntimeError:
+        # Interpreter shutdown - nothing will ever run it.
+        with _lock:
+            _waiting.pop(url, None)
+        return False
+    return True
+
+
+def _resolve(url):
+    result = None
+    try:
+        # When another worker already holds the fetch lock, wait out its
+        # whole fetch - this is a background thread, and the nudge below is
+        # only worth sending with the real result.
+        result = get_preview(url, wait_seconds=SINGLE_FLIGHT_LOCK_TTL)
+    except Exception:
+        logger.exception("Background link preview resolution failed for %s", url)
+    finally:
+        with _lock:
+            waiters = _waiting.pop(url, set())
+
+    if result is None or result.get("status") == "pending":
+        return
+
+    for entity_id in waiters:
+        _publish_resolved(entity_id, url, result)
+
+
+def _publish_resolved(entity_id, url, result):
+    try:
+        RedisPubSubClient.publish_json(
+            f"events_{entity_id}",
+            {
+                "logType": None,
+                "pod": "podless",
+                "event": LINK_PREVIEW_RESOLVED_EVENT,
+                "message": {
+                    "status": True,
+                    "auth": True,
+                    "message": "Link preview resolved",
+                    "result": {"url": url, "link_preview": result},
+                },
+                "dateTime": datetime.now().isoformat(),
+            },
+        )
+    except Exception:
+        logger.warning(
+            "Failed to publish resolved link preview to %s", entity_id, exc_info=True
+        )
+
+
+def get_preview_or_enqueue(url, notify_entity_id=None):
+    """
+    Non-blocking get_preview(): the cached result when there is one,
+    otherwise a pending card while the URL resolves in the background.
+    `notify_entity_id` is who gets the SSE nudge when it does.
+    """
+    if not url:
+        return None
+
+    cached = get_cached_preview(url)
+    if cached is not None:
+        return cached
+
+    enqueue_preview(url, notify_entity_id)
+    return pending_preview(url)
+
+
+def get_previews_or_enqueue(urls, notify_entity_id=None):
+    """
+    Bulk get_preview_or_enqueue for a whole page: one MGET for every url,
+    then each miss queued and answered with a pending card. Returns
+    url -> preview.
+    """
+    urls = [url for url in urls if url]
+    cached = get_cached_previews(urls)
+
+    previews = {}
+    for url in urls:
+        if url in previews:
+            continue
+        if url in cached:
+            previews[url] = cached[url]
+        else:
+            enqueue_preview(url, notify_entity_id)
+            previews[url] = pending_preview(url)
+    return previews
+
+
+def link_preview_context(objects, extract_url, viewer_entity_id=None):
+    """
+    Serializer context carrying every object's link preview, resolved up
+    front in one batch. `extract_url(obj)` returns the object's first URL or
+    None; each serializer's get_link_preview reads `link_previews[obj.pk]`
+    before falling back to a per-object lookup, so the caption is scanned
+    once here rather than again during serialization.
+    """
+    urls = {obj.pk: extract_url(obj) for obj in objects}
+    previews = get_previews_or_enqueue(urls.values(), viewer_entity_id)
+    return {
+        "viewer_entity_id": viewer_entity_id,
+        "link_previews": {
+            pk: previews.get(url) if url else None for pk, url in urls.items()
+        },
+    }
@@ -145,13 +145,17 @@ def apply_profile_privacy_to_posts(entity):
     Returns the number of posts narrowed.
     """
     from newsfeed.models import Post
+    from newsfeed.services.feed_page_cache import invalidate_authors
 
     if entity is None:
         return 0
 
-    return Post.objects.filter(entity=entity, privacy_status="public").update(
+    narrowed = Post.objects.filter(entity=entity, privacy_status="public").update(
         privacy_status="connections"
     )
+    if narrowed:
+        invalidate_authors([entity.id])
+    return narrowed
 
 
 def default_privacy_status_for(entity):
@@ -0,0 +1,153 @@
+"""
+Periodic time-decay rescoring of PostScore.
+
+ranking_score divides by (age_hours + 1) ** 0.5, but it is only recomputed
+when a post is engaged with (see ranking_updates). A post nobody touches keeps
+the score it had at its last reaction, so ORDER BY score__ranking_score slowly
+drifts towards whatever went quiet earliest.
+
+rescore_decayed_posts() walks the PostScore rows of live posts younger than
+RESCORE_MAX_AGE in primary-key order, RESCORE_CHUNK_SIZE rows at a time,
+starting from the first row in that window, evaluates the same formula as
+compute_ranking_score() over the whole chunk as NumPy arrays, and writes back
+only the rows whose score moved by more than RESCORE_MIN_CHANGE (relative) -
+one bulk UPDATE per chunk, and none at all for a chunk of long-settled posts.
+
+Past RESCORE_MAX_AGE a pass moves a score by well under RESCORE_MIN_CHANGE
+(about 0.125 / age_hours per 15-minute run), so older posts keep the score
+of their last pass rather than costing a scan of the whole table every run.
+
+Only ranking_score is written. A ranking flush that lands between the read
+and the write of a chunk can have its score overwritten from the counters
+read before it; the counters themselves are untouched, so the next flush or
+rescore pass puts it right.
+"""
+
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Min
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+RESCORE_CHUNK_SIZE = 2000
+# Relative change below which a row is left alone. Decay is a square root, so
+# a week-old post moves well under this between two runs and is only
+# rewritten once the drift has added up.
+RESCORE_MIN_CHANGE = 0.01
+RESCORE_MAX_AGE = timedelta(days=30)
+
+_FIELDS = (
+    "id",
+    "likes_count",
+    "comments_count",
+    "shares_count",
+    "affinity_score",
+    "content_type_weight",
+    "recent_update_boost",
+    "ranking_score",
+    "post__date_posted",
+)
+
+
+def compute_ranking_scores(rows, now_ts):
+    """
+    Vectorized compute_ranking_score() over `rows` of _FIELDS tuples.
+    Returns (ids, new scores, old scores) as arrays.
+    """
+    (
+        ids,
+        likes,
+        comments,
+        shares,
+        affinity,
+        content_type_weight,
+        boost,
+        old_scores,
+        date_posted,
+    ) = zip(*rows)
+
+    posted_ts = np.fromiter((d.timestamp() for d in date_posted), dtype=np.float64)
+    age_hours = np.maximum(now_ts - posted_ts, 0.0) / 3600
+
+    weighted_engagement = (
+        np.asarray(comments, dtype=np.float64) * 3
+        + np.asarray(likes, dtype=np.float64)
+        + np.asarray(shares, dtype=np.float64) * 5
+        + 1
+    )
+    scores = (
+        weighted_engagement
+        / np.sqrt(age_hours + 1)
+        * np.asarray(affinity, dtype=np.float64)
+        * np.asarray(content_type_weight, dtype=np.float64)
+        * np.asarray(boost, dtype=np.float64)
+    )
+    return np.asarray(ids), scores, np.asarray(old_scores, dtype=np.float64)
+
+
+def _changed(scores, old_scores, min_change):
+    # Relative to the stored score; the floor keeps a zero score from
+    # dividing out to "changed" on every run.
+    return np.abs(scores - old_scores) > min_change * np.maximum(
+        np.abs(old_scores), 1e-9
+    )
+
+
+def rescore_decayed_posts(
+    chunk_size=RESCORE_CHUNK_SIZE,
+    min_change=RESCORE_MIN_CHANGE,
+    max_age=RESCORE_MAX_AGE,
+):
+    """
+    Recomputes ranking_score for every live post younger than `max_age`.
+    Returns (scanned, written).
+    """
+    from newsfeed.models import PostScore
+
+    scanned = 0
+    written = 0
+    current = now()
+    now_ts = current.timestamp()
+
+    scores = PostScore.objects.filter(
+        post__is_archived=False,
+        post__deleted_at__isnull=True,
+        post__date_posted__gte=current - max_age,
+    )
+    # Score rows are mostly created with their post, so the window is about
+    # the tail of the id range; the date_posted index finds where it starts
+    # and the filter still applies to every chunk after it.
+    first_id = scores.aggregate(first_id=Min("id"))["first_id"]
+    if first_id is None:
+        return 0, 0
+    last_id = first_id - 1
+
+    while True:
+        rows = list(
+            scores.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list(*_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+
+        ids, new_scores, old_scores = compute_ranking_scores(rows, now_ts)
+        changed = _changed(new_scores, old_scores, min_change)
+        if changed.any():
+            updates = [
+                PostScore(id=int(score_id), ranking_score=float(score))
+                for score_id, score in zip(ids[changed], new_scores[changed])
+            ]
+            PostScore.objects.bulk_update(updates, ["ranking_score"])
+            written += len(updates)
+
+        if len(rows) < chunk_size:
+            break
+
+    logger.info("Rescored decayed posts: %s scanned, %s written", scanned, written)
+    return scanned, written
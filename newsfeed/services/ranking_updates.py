@@ -0,0 +1,306 @@
+"""
+Coalescing stage for ranking-score updates.
+
+A reaction, comment or share used to mean one recompute job: two reads and
+an UPDATE per event, so a viral post taking thousands of reactions a minute
+cost thousands of writes to the same PostScore row - and the Celery path
+dropped whatever arrived while its per-post lock was held.
+
+Now each event only records its delta in Redis - HINCRBY into a per-post
+hash, plus the post id into a dirty set - and the first event of a window
+schedules one flush RANKING_FLUSH_WINDOW seconds later; a beat entry sweeps
+up anything a lost schedule left behind. The flush drains the dirty set,
+recomputes every dirty post once from its summed deltas, and writes them all
+back with a single bulk UPDATE. Nothing is dropped: an event that lands
+mid-flush just marks the post dirty again for the next one.
+
+Exactly once, across worker restarts, the same way as the interest trending
+buffer: a batch of posts is claimed by RENAMEing each pending hash to an
+in-flight one and tagging the batch with an id, atomically, so new events
+start fresh hashes. The batch is applied in one transaction together with a
+PostScoreFlush ledger row for its id, and only then are the in-flight hashes
+deleted. A flush that dies before committing leaves the batch for the next
+one to retry; one that dies after committing leaves it too, but the retry
+finds the ledger row and just clears it.
+
+Counters move here too (react -> likes_count, comment -> comments_count,
+share -> shares_count), the same contract the worker's per-event handler
+had, so callers still never touch them directly.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from user_service.services.rabbitmq import Queues, RabbitMQClient
+from user_service.services.redis import RedisPubSubClient
+from ..helpers.query_functions import (
+    DEFAULT_RANKING_BOOST,
+    RANKING_BOOST_BY_UPDATE_TYPE,
+    compute_ranking_score,
+)
+
+logger = logging.getLogger(__name__)
+
+RANKING_FLUSH_WINDOW = 5
+RANKING_FLUSH_BATCH = 500
+RANKING_FLUSH_LOCK_TTL = 60
+RANKING_FLUSH_LEDGER_TTL = timedelta(days=1)
+
+DIRTY_POSTS_KEY = "chatterloop:ranking:dirty"
+INFLIGHT_POSTS_KEY = "chatterloop:ranking:inflight"
+INFLIGHT_BATCH_KEY = "chatterloop:ranking:inflight_batch"
+FLUSH_SCHEDULED_KEY = "chatterloop:ranking:flush_scheduled"
+FLUSH_LOCK_KEY = "chatterloop:ranking:flush_lock"
+
+COUNTER_BY_UPDATE_TYPE = {
+    "react": "likes_count",
+    "comment": "comments_count",
+    "share": "shares_count",
+}
+
+
+def _pending_key(post_id):
+    return f"chatterloop:ranking:pending:{post_id}"
+
+
+def _inflight_key(post_id):
+    return f"chatterloop:ranking:inflight:{post_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _record(post_id, update_type, is_decrease, count):
+    sign = -1 if is_decrease else 1
+    boost = RANKING_BOOST_BY_UPDATE_TYPE.get(update_type, DEFAULT_RANKING_BOOST)
+
+    pipe = RedisPubSubClient.get_redis_connection().pipeline()
+    key = _pending_key(post_id)
+    pipe.hincrbyfloat(key, "recent_update_boost", sign * boost * count)
+    counter = COUNTER_BY_UPDATE_TYPE.get(update_type)
+    if counter:
+        pipe.hincrby(key, counter, sign * count)
+    # Marked dirty AFTER the delta is in, so a flush that sees the id always
+    # finds something to apply.
+    pipe.sadd(DIRTY_POSTS_KEY, str(post_id))
+    pipe.execute()
+
+
+def _schedule_flush():
+    if cache.add(FLUSH_SCHEDULED_KEY, "1", timeout=RANKING_FLUSH_WINDOW):
+        from newsfeed.scripts.calculate_ranking_score import (
+            flush_ranking_updates_task,
+        )
+
+        flush_ranking_updates_task.apply_async(countdown=RANKING_FLUSH_WINDOW)
+
+
+def record_ranking_update(post_id, update_type, is_decrease=False, count=1):
+    """
+    Queue a score change for `post_id`, applied at the next flush.
+
+    Deferred to COMMIT like the publish it replaces - the change it records
+    should only count if the reaction/comment row really landed. If Redis is
+    unreachable the event goes to the worker's per-event queue instead, so
+    it is late rather than lost.
+    """
+
+    def _enqueue():
+        try:
+            _record(post_id, update_type, is_decrease, count)
+        except Exception:
+            logger.warning(
+                "Ranking update coalescing failed for %s, publishing per event",
+                post_id,
+                exc_info=True,
+            )
+            for _ in range(count):
+                RabbitMQClient.publish(
+                    Queues.UPDATE_RANKING_SCORE,
+                    {
+                        "post_id": post_id,
+                        "update_type": update_type,
+                        "is_decrease": is_decrease,
+                    },
+                )
+            return
+
+        try:
+            _schedule_flush()
+        except Exception:
+            # The delta is safe in Redis; the next event's schedule, or a
+            # flush already running, picks it up.
+            logger.warning("Could not schedule a ranking flush", exc_info=True)
+
+    transaction.on_commit(_enqueue)
+
+
+def _claim_batch(conn, limit):
+    """
+    The in-flight batch left by an earlier flush, or else up to `limit` dirty
+    posts moved aside as a new one. Returns (batch_id, post_ids, deltas) -
+    deltas being post id -> summed deltas for the posts that had some - or
+    (None, [], {}) when nothing is pending.
+    """
+    batch_id = conn.get(INFLIGHT_BATCH_KEY)
+    if batch_id is not None:
+        post_ids = [_decode(post_id) for post_id in conn.smembers(INFLIGHT_POSTS_KEY)]
+    else:
+        post_ids = [
+            _decode(post_id)
+            for post_id in conn.srandmember(DIRTY_POSTS_KEY, limit) or []
+        ]
+        if not post_ids:
+            return None, [], {}
+        # Only a flush - holding FLUSH_LOCK_KEY - removes a pending hash or
+        # a dirty mark, and it removes both together, so every dirty post
+        # still has its hash to RENAME. An increment lands either before the
+        # MULTI, in this batch, or after it, in a fresh hash for the next.
+        batch_id = str(uuid.uuid4())
+        pipe = conn.pipeline(transaction=True)
+        for post_id in post_ids:
+            pipe.rename(_pending_key(post_id), _inflight_key(post_id))
+        pipe.srem(DIRTY_POSTS_KEY, *post_ids)
+        pipe.sadd(INFLIGHT_POSTS_KEY, *post_ids)
+        pipe.set(INFLIGHT_BATCH_KEY, batch_id)
+        pipe.execute()
+
+    deltas = {}
+    for post_id in post_ids:
+        pending = conn.hgetall(_inflight_key(post_id))
+        if pending:
+            deltas[post_id] = {
+                _decode(field): float(value) for field, value in pending.items()
+            }
+    return _decode(batch_id), post_ids, deltas
+
+
+def _clear_batch(conn, post_ids):
+    conn.delete(
+        *[_inflight_key(post_id) for post_id in post_ids],
+        INFLIGHT_POSTS_KEY,
+        INFLIGHT_BATCH_KEY,
+    )
+
+
+def _restore(post_id, delta):
+    """Puts a drained delta back for a post that has no score row yet."""
+    conn = RedisPubSubClient.get_redis_connection()
+    pipe = conn.pipeline()
+    for field, value in delta.items():
+        if field == "recent_update_boost":
+            pipe.hincrbyfloat(_pending_key(post_id), field, value)
+        else:
+            pipe.hincrby(_pending_key(post_id), field, int(value))
+    pipe.sadd(DIRTY_POSTS_KEY, post_id)
+    pipe.execute()
+
+
+def _apply(deltas, batch_id):
+    """
+    Applies `deltas` and records `batch_id` in the ledger, in one
+    transaction. Returns (rows written, deltas of posts with no score row),
+    or None if the batch was already applied.
+    """
+    from newsfeed.models import Post, PostScore, PostScoreFlush
+
+    fields = [
+        "recent_update_boost",
+        "likes_count",
+        "comments_count",
+        "shares_count",
+        "ranking_score",
+    ]
+
+    deltas = dict(deltas)
+    try:
+        with transaction.atomic():
+            PostScoreFlush.objects.create(batch_id=batch_id)
+            scores = list(
+                PostScore.objects.select_for_update(of=("self",))
+                .select_related("post")
+                .filter(post_id__in=list(deltas))
+            )
+            for post_score in scores:
+                delta = deltas.pop(post_score.post_id)
+                post_score.recent_update_boost += delta.get(
+                    "recent_update_boost", 0.0
+                )
+                for counter in COUNTER_BY_UPDATE_TYPE.values():
+                    value = getattr(post_score, counter) + int(delta.get(counter, 0))
+                    # PositiveIntegerField - an unmatched decrement (e.g. a
+                    # reaction counted before this stage existed) floors at 0.
+                    setattr(post_score, counter, max(value, 0))
+                post_score.ranking_score = compute_ranking_score(
+                    post_score, post_score.post.date_posted
+                )
+
+            PostScore.objects.bulk_update(scores, fields)
+    except IntegrityError:
+        if PostScoreFlush.objects.filter(batch_id=batch_id).exists():
+            return None
+        raise
+
+    # Whatever is left had no score row. The worker seeds it on create, so a
+    # brand new post can briefly have none - hand its delta back to be kept
+    # for the next flush. A post that no longer exists at all is dropped.
+    live_post_ids = set(
+        Post.objects.filter(post_id__in=list(deltas)).values_list("post_id", flat=True)
+    )
+    return len(scores), {
+        post_id: delta for post_id, delta in deltas.items() if post_id in live_post_ids
+    }
+
+
+def flush_ranking_updates(batch_size=RANKING_FLUSH_BATCH):
+    """
+    Applies every pending delta. Returns the number of PostScore rows
+    written. Each batch of up to `batch_size` posts is one bulk UPDATE.
+    """
+    from newsfeed.models import PostScoreFlush
+
+    # Released before draining, not after: an event recorded while this runs
+    # must be able to schedule the next flush, or it would sit in Redis until
+    # the beat sweep came along.
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    if not cache.add(FLUSH_LOCK_KEY, "1", timeout=RANKING_FLUSH_LOCK_TTL):
+        return 0
+
+    written = 0
+    unscored = {}
+    try:
+        conn = RedisPubSubClient.get_redis_connection()
+        while True:
+            batch_id, post_ids, deltas = _claim_batch(conn, batch_size)
+            if batch_id is None:
+                break
+            if deltas:
+                applied = _apply(deltas, batch_id)
+                if applied is not None:
+                    written += applied[0]
+                    unscored.update(applied[1])
+            _clear_batch(conn, post_ids)
+
+        PostScoreFlush.objects.filter(
+            applied_at__lt=now() - RANKING_FLUSH_LEDGER_TTL
+        ).delete()
+    except Exception:
+        logger.warning(
+            "Ranking flush failed, keeping its batch for the next one",
+            exc_info=True,
+        )
+    finally:
+        try:
+            # Only once the set is drained - restoring inside the loop would
+            # claim the same unscored posts straight back.
+            for post_id, delta in unscored.items():
+                _restore(post_id, delta)
+        finally:
+            cache.delete(FLUSH_LOCK_KEY)
+    return written
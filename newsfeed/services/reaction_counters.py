@@ -0,0 +1,340 @@
+"""
+Write-behind tallies for PreviewCount, CommentPreviewCount and ActivityCount.
+
+The reaction endpoints used to get_or_create the (post, emoji) row and then
+`count += 1; save()` it inside the request transaction. Every reaction to a
+hot post queued on that one row lock for the rest of its transaction, and
+two requests reading the same count before either saved lost an increment.
+
+Now an increment is an HINCRBY into a per-target Redis hash, recorded on
+commit like the ranking deltas (ranking_updates.py), and the first one in a
+window schedules a flush COUNTER_FLUSH_WINDOW seconds later; a beat entry
+sweeps up anything a lost schedule left behind. The flush drains every dirty
+hash and writes the summed deltas back in two statements per table - an
+INSERT ... ON CONFLICT for the increments, an UPDATE ... FROM VALUES for the
+decrements - so a burst of reactions on one post is one row write, not one
+locked read-modify-write each.
+
+Exactly once, as in ranking_updates: a batch of targets is claimed by
+RENAMEing their pending hashes to in-flight ones under a batch id, applied
+in one transaction with a CounterFlush ledger row, and only then cleared. A
+flush that dies before committing leaves the batch for the next one to
+retry; one that dies after finds the ledger row on retry and just clears it.
+
+Reads (get_counts) are the Postgres rows plus whatever is still pending in
+Redis, so the count endpoints never lag the reactions they just took. The
+hydrated feed and comment serializers read the rows alone and may trail by
+up to one flush window; between a flush's claim and its commit - or until
+a failed flush's batch is retried - a count can also read low by the amount
+in flight.
+
+If Redis is unreachable the delta is written straight to Postgres instead -
+slower, and only lost (logged) if Postgres refuses it too.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.utils.timezone import now
+
+from user_service.services.redis import RedisPubSubClient
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FLUSH_WINDOW = 5
+COUNTER_FLUSH_BATCH = 500
+COUNTER_FLUSH_LOCK_TTL = 60
+COUNTER_FLUSH_LEDGER_TTL = timedelta(days=1)
+
+DIRTY_COUNTERS_KEY = "chatterloop:counters:dirty"
+INFLIGHT_COUNTERS_KEY = "chatterloop:counters:inflight"
+INFLIGHT_BATCH_KEY = "chatterloop:counters:inflight_batch"
+FLUSH_SCHEDULED_KEY = "chatterloop:counters:flush_scheduled"
+FLUSH_LOCK_KEY = "chatterloop:counters:flush_lock"
+
+# Counter kinds: which tally table, keyed by which target.
+POST_REACTIONS = "post"
+COMMENT_REACTIONS = "comment"
+POST_ACTIVITY = "activity"
+
+
+def _counter_spec(kind):
+    """kind -> (model, target column, key column)."""
+    from newsfeed.models import ActivityCount, CommentPreviewCount, PreviewCount
+
+    return {
+        POST_REACTIONS: (PreviewCount, "post_id", "emoji_id"),
+        COMMENT_REACTIONS: (CommentPreviewCount, "comment_id", "emoji_id"),
+        POST_ACTIVITY: (ActivityCount, "post_id", "count_type"),
+    }[kind]
+
+
+def _pending_key(kind, target_id):
+    return f"chatterloop:counters:{kind}:{target_id}"
+
+
+def _inflight_key(member):
+    return f"chatterloop:counters:inflight:{member}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def apply_deltas(kind, rows):
+    """
+    Adds each (target_id, key, delta) in `rows` to its tally row in
+    Postgres, creating the row for an increment. Counts floor at zero - a
+    missing row already means zero, so a decrement never creates one.
+    (target_id, key) must be unique within `rows`.
+    """
+    model, target_column, key_column = _counter_spec(kind)
+    table = connection.ops.quote_name(model._meta.db_table)
+    increments = [row for row in rows if row[2] > 0]
+    decrements = [row for row in rows if row[2] < 0]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if increments:
+            params = []
+            for target_id, key, delta in increments:
+                params += [str(uuid.uuid4()), target_id, key, delta]
+            cursor.execute(
+                f"INSERT INTO {table} "
+                f"({model._meta.pk.column}, {target_column}, {key_column}, count) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(increments))} "
+                f"ON CONFLICT ({target_column}, {key_column}) "
+                f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                params,
+            )
+        if decrements:
+            params = []
+            for target_id, key, delta in decrements:
+                params += [target_id, key, delta]
+            cursor.execute(
+                f"UPDATE {table} SET count = GREATEST({table}.count + v.delta, 0) "
+                f"FROM (VALUES "
+                f"{', '.join(['(%s, %s, %s::integer)'] * len(decrements))}"
+                f") AS v(target_id, key, delta) "
+                f"WHERE {table}.{target_column} = v.target_id "
+                f"AND {table}.{key_column} = v.key",
+                params,
+            )
+
+
+def _schedule_flush():
+    if cache.add(FLUSH_SCHEDULED_KEY, "1", timeout=COUNTER_FLUSH_WINDOW):
+        from newsfeed.scripts.calculate_ranking_score import flush_counters_task
+
+        flush_counters_task.apply_async(countdown=COUNTER_FLUSH_WINDOW)
+
+
+def increment(kind, target_id, key, delta=1):
+    """
+    Adds `delta` to the `key` tally of `target_id` (an emoji id for the
+    reaction kinds, a CountType for POST_ACTIVITY). Recorded on commit, so
+    it only counts if the reaction row it mirrors really landed.
+    """
+    target_id = str(target_id)
+    key = str(key)
+
+    def _record():
+        try:
+            pipe = RedisPubSubClient.get_redis_connection().pipeline()
+            pipe.hincrby(_pending_key(kind, target_id), key, delta)
+            # Dirty AFTER the delta is in, so a flush that pops the target
+            # always finds something to apply.
+            pipe.sadd(DIRTY_COUNTERS_KEY, f"{kind}:{target_id}")
+            pipe.execute()
+        except Exception:
+            logger.warning(
+                "Counter write-behind failed for %s:%s, writing through",
+                kind,
+                target_id,
+                exc_info=True,
+            )
+            # Runs after the reaction committed, where an exception would
+            # only escape into the caller's response - log it instead.
+            try:
+                apply_deltas(kind, [(target_id, key, delta)])
+            except Exception:
+                logger.warning(
+                    "Counter write-through failed for %s:%s, dropping %s",
+                    kind,
+                    target_id,
+                    delta,
+                    exc_info=True,
+                )
+            return
+
+        try:
+            _schedule_flush()
+        except Exception:
+            logger.warning("Could not schedule a counter flush", exc_info=True)
+
+    transaction.on_commit(_record)
+
+
+def get_counts(kind, target_id):
+    """
+    key -> current count for `target_id`: the stored rows plus any pending
+    delta. Keys at zero are left out, as they were when rows were seeded.
+    """
+    return get_counts_many(kind, [target_id])[str(target_id)]
+
+
+def get_counts_many(kind, target_ids):
+    """
+    get_counts for many targets at once - one query for the rows and one
+    pipelined HGETALL round trip for the pending deltas. Returns
+    target_id -> {key: count}, with an entry for every requested target.
+    """
+    model, target_column, key_column = _counter_spec(kind)
+    target_ids = list(dict.fromkeys(str(target_id) for target_id in target_ids))
+    counts = {target_id: {} for target_id in target_ids}
+    if not target_ids:
+        return counts
+
+    for target_id, key, count in model.objects.filter(
+        **{f"{target_column}__in": target_ids}
+    ).values_list(target_column, key_column, "count"):
+        counts[target_id][key] = count
+
+    try:
+        pipe = RedisPubSubClient.get_redis_connection().pipeline()
+        for target_id in target_ids:
+            pipe.hgetall(_pending_key(kind, target_id))
+        pending = pipe.execute()
+    except Exception:
+        logger.warning("Pending counter read failed (non-fatal)", exc_info=True)
+        pending = [{}] * len(target_ids)
+
+    for target_id, deltas in zip(target_ids, pending):
+        target_counts = counts[target_id]
+        for key, delta in deltas.items():
+            key = _decode(key)
+            target_counts[key] = max(target_counts.get(key, 0) + int(delta), 0)
+        counts[target_id] = {
+            key: count for key, count in target_counts.items() if count > 0
+        }
+    return counts
+
+
+def _claim_batch(conn, limit):
+    """
+    The in-flight batch left by an earlier flush, or else up to `limit` dirty
+    targets moved aside as a new one. Returns (batch_id, members, deltas) -
+    deltas being kind -> [(target_id, key, delta)] - or (None, [], {}) when
+    nothing is pending.
+    """
+    batch_id = conn.get(INFLIGHT_BATCH_KEY)
+    if batch_id is not None:
+        members = [_decode(member) for member in conn.smembers(INFLIGHT_COUNTERS_KEY)]
+    else:
+        members = [
+            _decode(member)
+            for member in conn.srandmember(DIRTY_COUNTERS_KEY, limit) or []
+        ]
+        if not members:
+            return None, [], {}
+        # Only a flush - holding FLUSH_LOCK_KEY - removes a pending hash or a
+        # dirty mark, and it removes both together, so every dirty target
+        # still has its hash to RENAME. See ranking_updates._claim_batch.
+        batch_id = str(uuid.uuid4())
+        pipe = conn.pipeline(transaction=True)
+        for member in members:
+            kind, target_id = member.split(":", 1)
+            pipe.rename(_pending_key(kind, target_id), _inflight_key(member))
+        pipe.srem(DIRTY_COUNTERS_KEY, *members)
+        pipe.sadd(INFLIGHT_COUNTERS_KEY, *members)
+        pipe.set(INFLIGHT_BATCH_KEY, batch_id)
+        pipe.execute()
+
+    deltas = {}
+    for member in members:
+        kind, target_id = member.split(":", 1)
+        for key, delta in conn.hgetall(_inflight_key(member)).items():
+            delta = int(delta)
+            if delta:
+                deltas.setdefault(kind, []).append((target_id, _decode(key), delta))
+    return _decode(batch_id), members, deltas
+
+
+def _clear_batch(conn, members):
+    conn.delete(
+        *[_inflight_key(member) for member in members],
+        INFLIGHT_COUNTERS_KEY,
+        INFLIGHT_BATCH_KEY,
+    )
+
+
+def _apply_skipping_missing(kind, rows):
+    try:
+        apply_deltas(kind, rows)
+    except IntegrityError:
+        # A post or comment hard-deleted since it was reacted to fails the
+        # whole statement on its foreign key. Retry one by one and drop just
+        # that one, rather than hand the batch back to fail forever.
+        for row in rows:
+            try:
+                apply_deltas(kind, [row])
+            except IntegrityError:
+                logger.warning("Dropping counter delta for missing %s %s", kind, row[0])
+
+
+def _apply_batch(deltas, batch_id):
+    """
+    Applies every kind's deltas and records `batch_id` in the ledger, in one
+    transaction. Returns False without applying anything if the batch was
+    already applied.
+    """
+    from newsfeed.models import CounterFlush
+
+    try:
+        with transaction.atomic():
+            CounterFlush.objects.create(batch_id=batch_id)
+            for kind, rows in deltas.items():
+                _apply_skipping_missing(kind, rows)
+    except IntegrityError:
+        if CounterFlush.objects.filter(batch_id=batch_id).exists():
+            return False
+        raise
+    return True
+
+
+def flush_counters(batch_size=COUNTER_FLUSH_BATCH):
+    """
+    Writes every pending delta to Postgres. Returns the number of tally rows
+    touched.
+    """
+    from newsfeed.models import CounterFlush
+
+    # Released first, so an increment recorded mid-flush can schedule the next.
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    if not cache.add(FLUSH_LOCK_KEY, "1", timeout=COUNTER_FLUSH_LOCK_TTL):
+        return 0
+
+    written = 0
+    try:
+        conn = RedisPubSubClient.get_redis_connection()
+        while True:
+            batch_id, members, deltas = _claim_batch(conn, batch_size)
+            if batch_id is None:
+                break
+            if deltas and _apply_batch(deltas, batch_id):
+                written += sum(len(rows) for rows in deltas.values())
+            _clear_batch(conn, members)
+
+        CounterFlush.objects.filter(
+            applied_at__lt=now() - COUNTER_FLUSH_LEDGER_TTL
+        ).delete()
+    except Exception:
+        logger.warning(
+            "Counter flush failed, keeping its batch for the next one",
+            exc_info=True,
+        )
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return written
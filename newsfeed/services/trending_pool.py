@@ -0,0 +1,104 @@
+"""
+TrendingPool candidate reads, one partition per query.
+
+fetch_trending_posts used to read every category with one `category__in`
+query. The coordinator fans that out and waits for the slowest partition,
+and the cluster rejects it outright beyond 20 partition keys - which is why
+MAX_TRENDING_CATEGORIES was 19.
+
+read_trending_candidates() instead sends one prepared single-partition
+SELECT per category, all in flight at once via execute_async, each with its
+own TRENDING_PARTITION_TIMEOUT. A partition that errors or times out is
+skipped rather than failing or stalling the page. The per-category results
+are merged newest-first with a heap and de-duplicated by post_id, since a
+post can trend in several categories.
+
+TrendingPool clusters on post_id before created_at, so the rows a partition
+returns under its limit are the table's pick, not necessarily its newest;
+they are put in created_at order here, before the merge.
+"""
+
+import heapq
+import logging
+import threading
+
+from cassandra.cqlengine import connection as cql_connection
+
+from ..models import TrendingPool
+
+logger = logging.getLogger(__name__)
+
+TRENDING_PARTITION_LIMIT = 50
+TRENDING_PARTITION_TIMEOUT = 0.5
+
+# session -> prepared SELECT, per process - see feed_fanout._prepared.
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _session():
+    return cql_connection.get_session()
+
+
+def _select_statement(session):
+    key = id(session)
+    statement = _prepared.get(key)
+    if statement is None:
+        with _prepared_lock:
+            statement = _prepared.get(key)
+            if statement is None:
+                statement = session.prepare(
+                    f"SELECT post_id, created_at "
+                    f"FROM {TrendingPool.column_family_name()} "
+                    f"WHERE category = ? LIMIT ?"
+                )
+                _prepared[key] = statement
+    return statement
+
+
+def read_trending_candidates(categories, limit, per_partition_limit=None):
+    """
+    Up to `limit` distinct post ids trending in any of `categories`, newest
+    first.
+    """
+    categories = list(dict.fromkeys(categories))
+    if not categories:
+        return []
+    if per_partition_limit is None:
+        per_partition_limit = min(int(limit), TRENDING_PARTITION_LIMIT)
+
+    session = _session()
+    select = _select_statement(session)
+    futures = [
+        (
+            category,
+            session.execute_async(
+                select,
+                (category, per_partition_limit),
+                timeout=TRENDING_PARTITION_TIMEOUT,
+            ),
+        )
+        for category in categories
+    ]
+
+    partitions = []
+    for category, future in futures:
+        try:
+            # cqlengine sets the shared session's row_factory to dict_factory.
+            rows = [(row["post_id"], row["created_at"]) for row in future.result()]
+        except Exception:
+            logger.warning("Trending partition %s skipped", category, exc_info=True)
+            continue
+        rows.sort(key=lambda row: row[1], reverse=True)
+        partitions.append(rows)
+
+    post_ids = []
+    seen = set()
+    for post_id, _ in heapq.merge(*partitions, key=lambda row: row[1], reverse=True):
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        post_ids.append(post_id)
+        if len(post_ids) == limit:
+            break
+    return post_ids
@@ -1,14 +1,22 @@
+import logging
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.utils.timezone import now
 from django.dispatch import receiver
 from .models import (
+    AuthorTimeline,
     Post,
     Comment,
     Reaction,
 )
-from user.models import UserEngagementLog
+from user.models import UserEngagementIndex, UserEngagementLog
+from entity.models import Block, Connection, Follow
 from django.core.cache import cache
 from user_service.services.rabbitmq import RabbitMQClient, Queues
+from .services.feed_page_cache import invalidate_posts, invalidate_viewers
+
+logger = logging.getLogger(__name__)
 
 
 # PreviewCount rows are NOT pre-seeded any more - neither per new emoji
@@ -23,6 +31,28 @@ from user_service.services.rabbitmq import RabbitMQClient, Queues
 # and the (post, emoji) unique constraint keeps that safe under concurrency.
 
 
+def _remove_engagement_index_on_commit(entity_id, activity_type, target_id):
+    """
+    Deletes the UserEngagementIndex row of a retracted engagement once the
+    retraction commits. The worker's REMOVE_ENGAGEMENT_LOG handler deletes
+    the log row but knows nothing about the index. A failure is logged, not
+    raised - the row that removed it has already committed.
+    """
+
+    def _remove():
+        try:
+            UserEngagementIndex.remove(str(entity_id), activity_type, target_id)
+        except Exception:
+            logger.warning(
+                "Could not remove %s engagement index row for %s",
+                activity_type,
+                entity_id,
+                exc_info=True,
+            )
+
+    transaction.on_commit(_remove)
+
+
 @receiver(post_save, sender=Post)
 def create_post_score_for_new_post(sender, instance, created, **kwargs):
     """
@@ -40,6 +70,43 @@ def create_post_score_for_new_post(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=Post)
+def add_post_to_author_timeline(sender, instance, created, **kwargs):
+    """
+    The pull side of the friends feed: followers of a high-follower author
+    read this instead of a fanned-out row (see AuthorTimeline). One row per
+    post for every author, on COMMIT so a rolled-back post never shows up.
+    Best-effort like the fan-out it stands in for.
+    """
+    if not created:
+        return
+
+    def _write(author_id=str(instance.entity_id), post_id=str(instance.post_id)):
+        try:
+            AuthorTimeline.create(
+                author_id=author_id,
+                created_at=instance.date_posted,
+                post_id=post_id,
+            )
+        except Exception:
+            logger.warning(
+                "Author timeline write failed for %s", post_id, exc_info=True
+            )
+
+    transaction.on_commit(_write)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_cached_feed_pages_for_post(sender, instance, created, **kwargs):
+    """
+    Edits through a model save (the post editor, admin). Queryset .update()
+    paths bypass this and call invalidate_posts themselves - see
+    NewsfeedView.put/delete.
+    """
+    if not created:
+        invalidate_posts([instance.post_id])
+
+
 @receiver(post_save, sender=Comment)
 def log_comment_action(sender, instance, created, **kwargs):
     if created:
@@ -59,6 +126,7 @@ def log_comment_action(sender, instance, created, **kwargs):
             target_id=str(instance.comment_id),
         )
         log.save()
+        UserEngagementIndex.for_log(log).save()
 
         # bump interaction_score
 
@@ -133,6 +201,9 @@ def remove_comment_log(sender, instance, **kwargs):
             "target_id": instance.comment_id,
         },
     )
+    _remove_engagement_index_on_commit(
+        instance.entity_id, "comment", instance.comment_id
+    )
 
 
 @receiver(post_save, sender=Reaction)
@@ -154,6 +225,7 @@ def log_reaction_action(sender, instance, created, **kwargs):
             target_id=str(instance.reaction_id),
         )
         log.save()
+        UserEngagementIndex.for_log(log).save()
 
 
 @receiver(post_delete, sender=Reaction)
@@ -174,6 +246,41 @@ def remove_reaction_log(sender, instance, **kwargs):
             "target_id": instance.reaction_id,
         },
     )
+    _remove_engagement_index_on_commit(
+        instance.entity_id, "react", instance.reaction_id
+    )
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def invalidate_reactor_feed_pages(sender, instance, **kwargs):
+    """
+    The reactor's own cached feed pages carry the reaction counts they just
+    changed - rebuild those rather than show a highlighted emoji next to a
+    count that does not include it.
+    """
+    invalidate_viewers([instance.entity_id])
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+def invalidate_blocked_feed_pages(sender, instance, **kwargs):
+    # Blocks hide posts both ways, so both sides' cached pages are stale.
+    invalidate_viewers([instance.blocker_id, instance.blocked_id])
+
+
+@receiver(post_save, sender=Connection)
+@receiver(post_delete, sender=Connection)
+def invalidate_connection_feed_pages(sender, instance, **kwargs):
+    # Connections-only posts and the is_friend ordering both depend on the
+    # edge, and a connection is mutual.
+    invalidate_viewers([instance.action_by_id, instance.involved_entity_id])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follower_feed_pages(sender, instance, **kwargs):
+    invalidate_viewers([instance.follower_id])
 
 
 # Add Share Engagement Log to Server Express JS API
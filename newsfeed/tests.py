@@ -1,27 +1,71 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-from entity.models import Entity
+from cassandra.query import BoundStatement, PreparedStatement
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from entity.models import Entity, Follow
 from entity.permissions import PermissionEffect
-from interests.models import EntityInterest, EntityInterestAffinity, Interest
+from interests.models import (
+    EntityInterest,
+    EntityInterestAffinity,
+    Interest,
+    InterestTrendingScore,
+)
+from newsfeed.helpers import query_functions
 from newsfeed.helpers.query_functions import (
     MAX_TRENDING_CATEGORIES,
     resolved_interest_categories,
 )
+from newsfeed.models import (
+    ActivityCount,
+    Emoji,
+    Post,
+    PostReference,
+    PostScore,
+    PreviewCount,
+)
+from newsfeed.services import (
+    feed_candidates,
+    feed_fanout,
+    feed_page_cache,
+    link_preview,
+    link_preview_images,
+    link_preview_worker,
+    ranking_decay,
+    ranking_updates,
+    reaction_counters,
+    trending_pool,
+)
+from newsfeed.views import BatchCountsView
+from user.models import Account
 
 
 def _make_entity():
     return Entity.objects.create(type="user")
 
 
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
 class ResolvedInterestCategoriesTests(TestCase):
     """
-    TrendingPool.category is queried with category__in=user_interests - a
-    Cassandra/Scylla query that hard-rejects more than 25 IN values
-    ("cartesian product of all values in IN conditions is greater than 25").
-    An entity can accumulate far more than that many granted/high-affinity
-    interests over time (e.g. via diary tagging), so this must stay capped.
+    Every category is one TrendingPool partition read per feed page, and an
+    entity can accumulate any number of granted/high-affinity interests over
+    time (e.g. via diary tagging), so this must stay capped.
     """
 
+    def setUp(self):
+        cache.clear()
+
     def test_result_never_exceeds_max_categories_plus_global(self):
         entity = _make_entity()
         for i in range(MAX_TRENDING_CATEGORIES + 10):
@@ -42,7 +86,7 @@ class ResolvedInterestCategoriesTests(TestCase):
                 entity=entity, interest=interest, effect=PermissionEffect.GRANT
             )
         # High-affinity interests beyond the grant-filled cap should be
-        # excluded, not overflow the query past the Cassandra limit.
+        # excluded, not overflow the number of partition reads.
         overflow_interest = Interest.objects.create(name="Overflow")
         EntityInterestAffinity.objects.create(
             entity=entity, interest=overflow_interest, score=100.0
@@ -63,3 +107,1130 @@ class ResolvedInterestCategoriesTests(TestCase):
 
         categories = resolved_interest_categories(entity)
         self.assertEqual(set(categories), {"hiking", "cooking", "global"})
+
+    def test_room_left_is_filled_from_trending_interests_not_denied(self):
+        entity = _make_entity()
+        hiking = Interest.objects.create(name="Hiking")
+        cooking = Interest.objects.create(name="Cooking")
+        InterestTrendingScore.objects.create(
+            interest=hiking, score=10.0, daily_score=10.0
+        )
+        InterestTrendingScore.objects.create(
+            interest=cooking, score=5.0, daily_score=5.0
+        )
+        EntityInterest.objects.create(
+            entity=entity, interest=hiking, effect=PermissionEffect.DENY
+        )
+
+        categories = resolved_interest_categories(entity)
+        self.assertEqual(set(categories), {"cooking", "global"})
+
+
+class GetPreviewOrEnqueueTests(SimpleTestCase):
+    """
+    Serializers must never block on a third-party fetch: a miss returns a
+    pending card and queues the URL instead of calling get_preview inline.
+    """
+
+    URL = "https://example.com/article"
+
+    def test_miss_returns_pending_and_enqueues(self):
+        with mock.patch.object(
+            link_preview_worker, "get_cached_preview", return_value=None
+        ), mock.patch.object(
+            link_preview_worker, "enqueue_preview"
+        ) as enqueue, mock.patch.object(
+            link_preview_worker, "get_preview"
+        ) as get_preview:
+            result = link_preview_worker.get_preview_or_enqueue(self.URL, "viewer-1")
+
+        self.assertEqual(result["status"], "pending")
+        self.assertEqual(result["url"], self.URL)
+        enqueue.assert_called_once_with(self.URL, "viewer-1")
+        get_preview.assert_not_called()
+
+    def test_hit_returns_cached_without_enqueueing(self):
+        cached = {"url": self.URL, "status": "ok"}
+        with mock.patch.object(
+            link_preview_worker, "get_cached_preview", return_value=cached
+        ), mock.patch.object(link_preview_worker, "enqueue_preview") as enqueue:
+            result = link_preview_worker.get_preview_or_enqueue(self.URL, "viewer-1")
+
+        self.assertEqual(result, cached)
+        enqueue.assert_not_called()
+
+
+class GetPreviewsOrEnqueueTests(SimpleTestCase):
+    def test_one_bulk_read_for_the_whole_page(self):
+        hit = "https://example.com/cached"
+        miss = "https://example.com/cold"
+        with mock.patch.object(
+            link_preview_worker,
+            "get_cached_previews",
+            return_value={hit: {"url": hit, "status": "ok"}},
+        ) as bulk_read, mock.patch.object(
+            link_preview_worker, "get_cached_preview"
+        ) as single_read, mock.patch.object(
+            link_preview_worker, "enqueue_preview"
+        ) as enqueue:
+            previews = link_preview_worker.get_previews_or_enqueue(
+                [hit, miss, miss, None], "viewer-1"
+            )
+
+        bulk_read.assert_called_once()
+        single_read.assert_not_called()
+        enqueue.assert_called_once_with(miss, "viewer-1")
+        self.assertEqual(previews[hit]["status"], "ok")
+        self.assertEqual(previews[miss]["status"], "pending")
+
+
+class PinnedAddressAdapterTests(SimpleTestCase):
+    """
+    The connection must go to the address is_safe_url validated, not to
+    whatever the hostname resolves to a moment later (DNS rebinding).
+    """
+
+    def setUp(self):
+        link_preview._dns_cache.clear()
+        self.addCleanup(link_preview._dns_cache.clear)
+
+    def _addrinfo(self, address):
+        return [(None, None, None, "", (address, 0))]
+
+    def _pool_key_attributes(self, url):
+        request = link_preview.requests.Request("GET", url).prepare()
+        adapter = link_preview._PinnedAddressAdapter()
+        return adapter.build_connection_pool_key_attributes(request, True)
+
+    def test_https_connects_to_validated_ip_with_hostname_for_tls(self):
+        with mock.patch.object(
+            link_preview.socket, "getaddrinfo", return_value=self._addrinfo("93.184.216.34")
+        ):
+            self.assertTrue(link_preview.is_safe_url("https://example.com/"))
+
+        # A rebinding answer after validation is never consulted.
+        with mock.patch.object(
+            link_preview.socket, "getaddrinfo", return_value=self._addrinfo("127.0.0.1")
+        ):
+            host_params, pool_kwargs = self._pool_key_attributes("https://example.com/")
+
+        self.assertEqual(host_params["host"], "93.184.216.34")
+        self.assertEqual(pool_kwargs["server_hostname"], "example.com")
+        self.assertEqual(pool_kwargs["assert_hostname"], "example.com")
+
+    def test_private_address_is_refused_at_connect(self):
+        with mock.patch.object(
+            link_preview.socket, "getaddrinfo", return_value=self._addrinfo("10.0.0.5")
+        ):
+            with self.assertRaises(link_preview.requests.ConnectionError):
+                self._pool_key_attributes("http://internal.example/")
+
+    def test_falls_back_to_the_next_validated_address(self):
+        tried = []
+
+        def send(request, **kwargs):
+            tried.append(request.pinned_address)
+            if len(tried) == 1:
+                raise link_preview.requests.ConnectionError("unreachable")
+            return mock.sentinel.response
+
+        addrinfo = self._addrinfo("2606:2800:220:1::1") + self._addrinfo("93.184.216.34")
+        request = link_preview.requests.Request("GET", "https://example.com/").prepare()
+        with mock.patch.object(
+            link_preview.socket, "getaddrinfo", return_value=addrinfo
+        ), mock.patch.object(link_preview.HTTPAdapter, "send", side_effect=send):
+            response = link_preview._PinnedAddressAdapter().send(request)
+
+        self.assertIs(response, mock.sentinel.response)
+        self.assertEqual(tried, ["2606:2800:220:1::1", "93.184.216.34"])
+
+
+class ProxiedImageCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(
+            LINK_PREVIEW_IMAGE_CACHE_DIR=tmp.name,
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_second_request_is_served_from_disk(self):
+        with mock.patch.object(
+            link_preview_images,
+            "fetch_image",
+            return_value=(b"gif-bytes", "image/gif"),
+        ) as fetch:
+            first = link_preview_images.get_proxied_image("https://example.com/a.gif")
+            second = link_preview_images.get_proxied_image("https://example.com/a.gif")
+
+        fetch.assert_called_once()
+        self.assertEqual(first.etag, second.etag)
+        with open(second.path, "rb") as handle:
+            self.assertEqual(handle.read(), b"gif-bytes")
+
+    def test_identical_bytes_share_one_file(self):
+        with mock.patch.object(
+            link_preview_images,
+            "fetch_image",
+            return_value=(b"favicon", "image/x-icon"),
+        ):
+            one = link_preview_images.get_proxied_image("https://a.example/favicon.ico")
+            two = link_preview_images.get_proxied_image("https://b.example/favicon.ico")
+
+        self.assertEqual(one.path, two.path)
+
+    def test_undecodable_variant_falls_back_to_original(self):
+        with mock.patch.object(
+            link_preview_images,
+            "fetch_image",
+            return_value=(b"<svg/>", "image/svg+xml"),
+        ):
+            image = link_preview_images.get_proxied_image(
+                "https://example.com/logo.svg", "card"
+            )
+
+        self.assertEqual(image.content_type, "image/svg+xml")
+
+    def test_prune_evicts_least_recently_used_first(self):
+        with mock.patch.object(link_preview_images, "_maybe_prune"):
+            old, _ = link_preview_images._store_blob(b"x" * 10)
+            new, _ = link_preview_images._store_blob(b"y" * 10)
+        os.utime(link_preview_images._blob_path(old), (1, 1))
+
+        link_preview_images.prune_image_cache(max_bytes=10)
+
+        self.assertFalse(link_preview_images._blob_path(old).exists())
+        self.assertTrue(link_preview_images._blob_path(new).exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SingleFlightPreviewTests(SimpleTestCase):
+    URL = "https://example.com/viral"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_the_lock_holder_fetches(self):
+        cache.add(link_preview._lock_key(self.URL), "someone-else", 30)
+
+        with mock.patch.object(link_preview, "fetch_and_parse") as fetch:
+            result = link_preview.get_preview(self.URL, wait_seconds=0)
+
+        fetch.assert_not_called()
+        self.assertEqual(result["status"], "pending")
+        self.assertIsNone(cache.get(link_preview._cache_key(self.URL)))
+
+    def test_lock_is_released_after_the_fetch(self):
+        with mock.patch.object(
+            link_preview, "fetch_and_parse", return_value=None
+        ) as fetch:
+            result = link_preview.get_preview(self.URL)
+
+        fetch.assert_called_once_with(self.URL)
+        self.assertEqual(result["status"], "failed")
+        self.assertIsNone(cache.get(link_preview._lock_key(self.URL)))
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class FeedPageCacheTests(TestCase):
+    CANDIDATES = ["post-1", "post-2"]
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = _make_entity()
+        self.author_id = "author-1"
+        self.build = mock.Mock(
+            return_value=[
+                {"post_id": "post-1", "entity": {"id": self.author_id}},
+                {"post_id": "post-2", "entity": {"id": self.author_id}},
+            ]
+        )
+
+    def _page(self):
+        return feed_page_cache.get_or_build_page(
+            self.viewer, self.CANDIDATES, self.build
+        )
+
+    def test_repeat_request_is_served_without_rebuilding(self):
+        self._page()
+        cards = self._page()
+
+        self.build.assert_called_once()
+        self.assertEqual([card["post_id"] for card in cards], self.CANDIDATES)
+        self.assertFalse(cards[0]["is_saved"])
+        self.assertIsNone(cards[0]["entity_reaction"])
+
+    def test_post_edit_invalidates_the_page(self):
+        self._page()
+        with self.captureOnCommitCallbacks(execute=True):
+            feed_page_cache.invalidate_posts(["post-2"])
+        self._page()
+
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_author_change_invalidates_the_page(self):
+        self._page()
+        with self.captureOnCommitCallbacks(execute=True):
+            feed_page_cache.invalidate_authors([self.author_id])
+        self._page()
+
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_unfollow_invalidates_the_followers_page(self):
+        follow = Follow.objects.create(follower=self.viewer, followee=_make_entity())
+        self._page()
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        self._page()
+
+        self.assertEqual(self.build.call_count, 2)
+
+
+class _FakeBucket:
+    """NewsfeedIndex.objects for one viewer (or AuthorTimeline.objects for
+    one author, with no day): rows newest first, honouring the day
+    partition, created_at__lte and limit the way the table would."""
+
+    def __init__(self, rows, day=None, cursor=None, limit=None):
+        self.rows = rows
+        self.day = day
+        self.cursor = cursor
+        self._limit = limit
+
+    def filter(self, day=None, created_at__lte=None, **kwargs):
+        return _FakeBucket(
+            self.rows, day or self.day, created_at__lte or self.cursor, self._limit
+        )
+
+    def limit(self, limit):
+        return _FakeBucket(self.rows, self.day, self.cursor, limit)
+
+    def values_list(self, *fields):
+        rows = [
+            row
+            for row in self.rows
+            if (self.day is None or row[1].date() == self.day)
+            and (self.cursor is None or row[1] <= self.cursor)
+        ]
+        return rows[: self._limit]
+
+
+@override_settings(FEED_INDEX_BY_DAY_READS=True)
+class FetchFriendsPostsTests(SimpleTestCase):
+    def setUp(self):
+        today = timezone.now().replace(tzinfo=None)
+        # post-0 is the newest row; post-3 onwards are from previous days.
+        self.rows = [
+            (f"post-{i}", today - timedelta(minutes=i)) for i in range(3)
+        ] + [(f"post-{i}", today - timedelta(days=i - 2)) for i in range(3, 6)]
+        bucket = _FakeBucket(self.rows)
+        objects = mock.patch.object(query_functions.NewsfeedIndex, "objects", bucket)
+        objects.start()
+        self.addCleanup(objects.stop)
+        day_heads = mock.patch.object(
+            query_functions,
+            "read_day_heads",
+            side_effect=lambda entity_id, days, limit: [
+                bucket.filter(day=day).limit(limit).values_list() for day in days
+            ],
+        )
+        self.day_heads = day_heads.start()
+        self.addCleanup(day_heads.stop)
+        pull_authors = mock.patch.object(
+            query_functions, "get_followed_pull_author_ids", return_value=[]
+        )
+        self.pull_authors = pull_authors.start()
+        self.addCleanup(pull_authors.stop)
+
+    def _unseen(self, seen):
+        return mock.patch.object(
+            query_functions.RedisPubSubClient,
+            "filter_unseen_feed_posts",
+            side_effect=lambda entity_id, ids: [i for i in ids if i not in seen],
+        )
+
+    def test_cursor_continues_below_the_previous_page(self):
+        with self._unseen(set()):
+            first, cursor = query_functions.fetch_friends_posts("viewer", 2)
+            second, _ = query_functions.fetch_friends_posts("viewer", 2, cursor)
+
+        self.assertEqual(first, ["post-0", "post-1"])
+        self.assertEqual(second, ["post-2", "post-3"])
+
+    def test_page_continues_into_older_days(self):
+        with self._unseen(set()):
+            post_ids, _ = query_functions.fetch_friends_posts("viewer", 5)
+
+        self.assertEqual(post_ids, [f"post-{i}" for i in range(5)])
+        # Every older day in the window is probed in one concurrent read.
+        self.day_heads.assert_called_once()
+        self.assertEqual(
+            len(self.day_heads.call_args.args[1]), query_functions.FEED_WINDOW_DAYS
+        )
+
+    def test_failed_day_read_falls_back_to_reading_it_alone(self):
+        self.day_heads.side_effect = lambda entity_id, days, limit: [None] * len(days)
+
+        with self._unseen(set()):
+            post_ids, _ = query_functions.fetch_friends_posts("viewer", 5)
+
+        self.assertEqual(post_ids, [f"post-{i}" for i in range(5)])
+
+    @override_settings(FEED_INDEX_BY_DAY_READS=False)
+    def test_legacy_table_is_read_until_the_switch(self):
+        # Clustered on post_id, so the bucket comes back out of time order.
+        legacy = mock.patch.object(
+            query_functions.LegacyNewsfeedIndex,
+            "objects",
+            _FakeBucket(sorted(self.rows, key=lambda row: row[0], reverse=True)),
+        )
+        with legacy, self._unseen(set()):
+            first, cursor = query_functions.fetch_friends_posts("viewer", 2)
+            second, _ = query_functions.fetch_friends_posts("viewer", 2, cursor)
+
+        self.assertEqual(first + second, [f"post-{i}" for i in range(4)])
+        self.day_heads.assert_not_called()
+
+    def test_seen_posts_are_skipped_without_a_short_page(self):
+        with self._unseen({"post-0", "post-1", "post-2"}):
+            post_ids, cursor = query_functions.fetch_friends_posts("viewer", 2)
+
+        self.assertEqual(post_ids, ["post-3", "post-4"])
+        self.assertEqual(cursor, (self.rows[4][1], frozenset({"post-4"})))
+
+    def test_every_followed_pull_author_is_merged_from_concurrent_heads(self):
+        at = self.rows[0][1]
+        authors = [f"star-{i}" for i in range(30)]
+        timelines = {
+            author: [(f"{author}-post", at - timedelta(seconds=30 + i))]
+            for i, author in enumerate(authors)
+        }
+        self.pull_authors.return_value = authors
+
+        with mock.patch.object(
+            query_functions,
+            "read_timeline_heads",
+            side_effect=lambda ids, cursor, limit: [timelines[a][:limit] for a in ids],
+        ) as heads, self._unseen(set()):
+            post_ids, _ = query_functions.fetch_friends_posts("viewer", 40)
+
+        heads.assert_called_once()
+        self.assertEqual(post_ids[0], "post-0")
+        self.assertEqual(post_ids[1:31], [f"{author}-post" for author in authors])
+        self.assertEqual(post_ids[31], "post-1")
+
+    def _timeline(self):
+        # Newer than every pushed row.
+        at = self.rows[0][1]
+        timeline = [(f"star-{i}", at + timedelta(seconds=5 - i)) for i in range(5)]
+        objects = mock.patch.object(
+            query_functions.AuthorTimeline, "objects", _FakeBucket(timeline)
+        )
+        objects.start()
+        self.addCleanup(objects.stop)
+        self.pull_authors.return_value = ["star"]
+        return timeline
+
+    def test_full_timeline_head_continues_from_the_table(self):
+        timeline = self._timeline()
+
+        with mock.patch.object(
+            query_functions,
+            "read_timeline_heads",
+            side_effect=lambda ids, cursor, limit: [timeline[:limit]],
+        ), self._unseen({"star-0"}):
+            post_ids, _ = query_functions.fetch_friends_posts("viewer", 2)
+
+        self.assertEqual(post_ids, ["star-1", "star-2"])
+
+    def test_failed_timeline_head_is_read_on_its_own(self):
+        self._timeline()
+
+        with mock.patch.object(
+            query_functions, "read_timeline_heads", return_value=[None]
+        ), self._unseen(set()):
+            post_ids, _ = query_functions.fetch_friends_posts("viewer", 2)
+
+        self.assertEqual(post_ids, ["star-0", "star-1"])
+
+    def test_rows_sharing_a_created_at_straddle_pages(self):
+        at = self.rows[0][1]
+        self.rows[:] = [("tie-a", at), ("tie-b", at), ("tie-c", at)] + self.rows[1:]
+
+        with self._unseen(set()):
+            first, cursor = query_functions.fetch_friends_posts("viewer", 2)
+            second, _ = query_functions.fetch_friends_posts("viewer", 2, cursor)
+
+        self.assertEqual(first, ["tie-a", "tie-b"])
+        self.assertEqual(second, ["tie-c", "post-1"])
+
+    def test_pull_author_timeline_is_merged_by_created_at(self):
+        pulled = [
+            ("pulled-0", self.rows[0][1] - timedelta(seconds=30)),
+            ("pulled-1", self.rows[3][1] - timedelta(hours=1)),
+        ]
+        self.pull_authors.return_value = ["star"]
+        timeline = mock.patch.object(
+            query_functions.AuthorTimeline, "objects", _FakeBucket(pulled)
+        )
+        with timeline, self._unseen(set()):
+            first, cursor = query_functions.fetch_friends_posts("viewer", 3)
+            second, _ = query_functions.fetch_friends_posts("viewer", 3, cursor)
+
+        self.assertEqual(first, ["post-0", "pulled-0", "post-1"])
+        self.assertEqual(second, ["post-2", "post-3", "pulled-1"])
+
+    def test_cursor_round_trips_and_rejects_garbage(self):
+        cursor = (self.rows[3][1], frozenset({"post-3", "post-9"}))
+
+        self.assertEqual(
+            query_functions.decode_feed_cursor(
+                query_functions.encode_feed_cursor(cursor)
+            ),
+            cursor,
+        )
+        self.assertIsNone(query_functions.decode_feed_cursor("not-a-cursor"))
+
+
+class _FakeHashRedis:
+    """The hash/set commands the write-behind stages use, with real pipelines."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.sets = {}
+        self.strings = {}
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = float(bucket.get(field, 0)) + amount
+        return bucket[field]
+
+    def hincrby(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = int(bucket.get(field, 0)) + amount
+        return bucket[field]
+
+    def hgetall(self, key):
+        return {k: str(v) for k, v in self.hashes.get(key, {}).items()}
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.sets.pop(key, None)
+            self.strings.pop(key, None)
+
+    def rename(self, key, new_key):
+        self.hashes[new_key] = self.hashes.pop(key)
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value):
+        self.strings[key] = value
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def srandmember(self, key, count):
+        return list(self.sets.get(key, set()))[:count]
+
+    def spop(self, key, count):
+        members = self.sets.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+    def pipeline(self, transaction=False):
+        return _FakeHashPipeline(self)
+
+
+class _FakeHashPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [
+            getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class RankingUpdatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.redis = _FakeHashRedis()
+        patcher = mock.patch(
+            "user_service.services.redis.RedisPubSubClient.get_redis_connection",
+            return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        schedule = mock.patch.object(ranking_updates, "_schedule_flush")
+        self.schedule = schedule.start()
+        self.addCleanup(schedule.stop)
+
+        self.post = Post.objects.create(
+            entity=_make_entity(),
+            file_type="image",
+            content_type="post",
+            on_feed="true",
+        )
+        PostScore.objects.create(post=self.post)
+
+    def test_burst_of_events_is_one_recompute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                ranking_updates.record_ranking_update(self.post.post_id, "react")
+            ranking_updates.record_ranking_update(self.post.post_id, "comment")
+
+        written = ranking_updates.flush_ranking_updates()
+
+        score = PostScore.objects.get(post=self.post)
+        self.assertEqual(written, 1)
+        self.assertEqual(score.likes_count, 3)
+        self.assertEqual(score.comments_count, 1)
+        self.assertAlmostEqual(score.recent_update_boost, 1.6)
+        self.assertGreater(score.ranking_score, 0)
+
+    def test_decrement_floors_at_zero(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ranking_updates.record_ranking_update(
+                self.post.post_id, "comment", is_decrease=True, count=2
+            )
+
+        ranking_updates.flush_ranking_updates()
+
+        self.assertEqual(PostScore.objects.get(post=self.post).comments_count, 0)
+
+    def test_failed_flush_keeps_its_batch_for_the_next(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ranking_updates.record_ranking_update(self.post.post_id, "react")
+
+        with mock.patch.object(
+            ranking_updates, "_apply", side_effect=Exception("db down")
+        ), self.assertLogs(ranking_updates.logger, "WARNING"):
+            self.assertEqual(ranking_updates.flush_ranking_updates(), 0)
+        # Recorded while the batch was in flight - lands in a fresh hash.
+        with self.captureOnCommitCallbacks(execute=True):
+            ranking_updates.record_ranking_update(self.post.post_id, "react")
+
+        ranking_updates.flush_ranking_updates()
+
+        self.assertEqual(PostScore.objects.get(post=self.post).likes_count, 2)
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_batch_committed_before_a_crash_is_not_applied_twice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ranking_updates.record_ranking_update(self.post.post_id, "react")
+
+        # The worker dies after the UPDATE commits but before the clear.
+        with mock.patch.object(
+            ranking_updates, "_clear_batch", side_effect=Exception("killed")
+        ), self.assertLogs(ranking_updates.logger, "WARNING"):
+            ranking_updates.flush_ranking_updates()
+        written = ranking_updates.flush_ranking_updates()
+
+        self.assertEqual(written, 0)
+        self.assertEqual(PostScore.objects.get(post=self.post).likes_count, 1)
+        self.assertEqual(self.redis.hashes, {})
+
+
+class RescoreDecayedPostsTests(TestCase):
+    def _post_with_score(self, hours_old, ranking_score):
+        post = Post.objects.create(
+            entity=_make_entity(),
+            file_type="image",
+            content_type="post",
+            on_feed="true",
+        )
+        Post.objects.filter(post_id=post.post_id).update(
+            date_posted=timezone.now() - timedelta(hours=hours_old)
+        )
+        return PostScore.objects.create(post=post, ranking_score=ranking_score)
+
+    def test_stale_scores_decay_and_settled_ones_are_left_alone(self):
+        # Scored at launch (age 0): weighted engagement 1, no decay yet.
+        stale = self._post_with_score(hours_old=24, ranking_score=1.0)
+        # Already holds the decayed value for its age.
+        settled = self._post_with_score(hours_old=3, ranking_score=0.5)
+
+        scanned, written = ranking_decay.rescore_decayed_posts(chunk_size=1)
+
+        self.assertEqual((scanned, written), (2, 1))
+        stale.refresh_from_db()
+        self.assertAlmostEqual(stale.ranking_score, 1 / 5, places=3)
+        settled.refresh_from_db()
+        self.assertEqual(settled.ranking_score, 0.5)
+
+    def test_deleted_and_long_settled_posts_are_not_scanned(self):
+        deleted = self._post_with_score(hours_old=24, ranking_score=1.0)
+        Post.objects.filter(post_id=deleted.post_id).update(
+            deleted_at=timezone.now()
+        )
+        old = self._post_with_score(
+            hours_old=ranking_decay.RESCORE_MAX_AGE.total_seconds() / 3600 + 1,
+            ranking_score=1.0,
+        )
+
+        scanned, written = ranking_decay.rescore_decayed_posts()
+
+        self.assertEqual((scanned, written), (0, 0))
+        for score in (deleted, old):
+            score.refresh_from_db()
+            self.assertEqual(score.ranking_score, 1.0)
+
+
+class BackfillPostScoresTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = os.path.join(tmp.name, "checkpoint.json")
+
+    def _post(self):
+        return Post.objects.create(
+            entity=_make_entity(),
+            file_type="image",
+            content_type="post",
+            on_feed="true",
+        )
+
+    def test_scores_from_aggregates(self):
+        post = self._post()
+        PreviewCount.objects.create(post=post, count=2)
+        ActivityCount.objects.create(post=post, count_type="comment", count=3)
+        for media_type in ("image", "video"):
+            PostReference.objects.create(
+                post=post, reference=media_type, reference_media_type=media_type
+            )
+
+        call_command(
+            "backfill_post_scores", checkpoint=self.checkpoint, stdout=io.StringIO()
+        )
+
+        score = PostScore.objects.get(post=post)
+        self.assertEqual(
+            (score.likes_count, score.comments_count, score.shares_count), (2, 3, 0)
+        )
+        self.assertAlmostEqual(score.content_type_weight, (1 + 6.5 + 8.5) / 3)
+        self.assertGreater(score.ranking_score, 0)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_after_the_checkpointed_post(self):
+        first, second = sorted((self._post(), self._post()), key=lambda p: p.post_id)
+        with open(self.checkpoint, "w") as handle:
+            json.dump({"ranges": [[None, None]]}, handle)
+        with open(f"{self.checkpoint}.0", "w") as handle:
+            json.dump({"last_post_id": first.post_id}, handle)
+
+        call_command(
+            "backfill_post_scores", checkpoint=self.checkpoint, stdout=io.StringIO()
+        )
+
+        self.assertFalse(PostScore.objects.filter(post=first).exists())
+        self.assertTrue(PostScore.objects.filter(post=second).exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ReactionCountersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.redis = _FakeHashRedis()
+        patcher = mock.patch(
+            "user_service.services.redis.RedisPubSubClient.get_redis_connection",
+            return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        schedule = mock.patch.object(reaction_counters, "_schedule_flush")
+        schedule.start()
+        self.addCleanup(schedule.stop)
+
+        self.post = Post.objects.create(
+            entity=_make_entity(),
+            file_type="image",
+            content_type="post",
+            on_feed="true",
+        )
+        entity = _make_entity()
+        account = Account.objects.create(
+            entity=entity,
+            first_name="Test",
+            last_name="User",
+            email=f"{entity.id}@example.com",
+            is_active=True,
+            is_verified=True,
+        )
+        self.like = Emoji.objects.create(
+            emoji_content="+1", emoji_tags="like", updated_by=account
+        )
+        self.heart = Emoji.objects.create(
+            emoji_content="<3", emoji_tags="heart", updated_by=account
+        )
+
+    def _increment(self, emoji, delta=1):
+        reaction_counters.increment(
+            reaction_counters.POST_REACTIONS,
+            self.post.post_id,
+            emoji.emoji_id,
+            delta,
+        )
+
+    def test_pending_deltas_are_read_and_then_flushed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self._increment(self.like)
+            self._increment(self.like, -1)
+            # Nothing to take away from a tally that does not exist yet.
+            self._increment(self.heart, -1)
+
+        self.assertFalse(PreviewCount.objects.filter(post=self.post).exists())
+        self.assertEqual(
+            reaction_counters.get_counts(
+                reaction_counters.POST_REACTIONS, self.post.post_id
+            ),
+            {self.like.emoji_id: 2},
+        )
+
+        reaction_counters.flush_counters()
+
+        self.assertEqual(
+            dict(
+                PreviewCount.objects.filter(post=self.post).values_list(
+                    "emoji_id", "count"
+                )
+            ),
+            {self.like.emoji_id: 2},
+        )
+
+    def test_flush_adds_to_the_existing_row(self):
+        PreviewCount.objects.create(post=self.post, emoji=self.like, count=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._increment(self.like)
+
+        reaction_counters.flush_counters()
+
+        self.assertEqual(
+            PreviewCount.objects.get(post=self.post, emoji=self.like).count, 6
+        )
+
+    def test_failed_flush_keeps_its_batch_for_the_next(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._increment(self.like)
+
+        with mock.patch.object(
+            reaction_counters, "_apply_batch", side_effect=Exception("db down")
+        ), self.assertLogs(reaction_counters.logger, "WARNING"):
+            self.assertEqual(reaction_counters.flush_counters(), 0)
+        # Recorded while the batch was in flight - lands in a fresh hash.
+        with self.captureOnCommitCallbacks(execute=True):
+            self._increment(self.like)
+
+        reaction_counters.flush_counters()
+
+        self.assertEqual(
+            PreviewCount.objects.get(post=self.post, emoji=self.like).count, 2
+        )
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_batch_committed_before_a_crash_is_not_applied_twice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._increment(self.like)
+
+        # The worker dies after the tally commits but before the clear.
+        with mock.patch.object(
+            reaction_counters, "_clear_batch", side_effect=Exception("killed")
+        ), self.assertLogs(reaction_counters.logger, "WARNING"):
+            reaction_counters.flush_counters()
+        written = reaction_counters.flush_counters()
+
+        self.assertEqual(written, 0)
+        self.assertEqual(
+            PreviewCount.objects.get(post=self.post, emoji=self.like).count, 1
+        )
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_failed_write_through_is_logged_not_raised(self):
+        with mock.patch.object(
+            self.redis, "pipeline", side_effect=Exception("redis down")
+        ), mock.patch.object(
+            reaction_counters, "apply_deltas", side_effect=Exception("db down")
+        ), self.assertLogs(
+            reaction_counters.logger, "WARNING"
+        ) as logs, self.captureOnCommitCallbacks(execute=True):
+            self._increment(self.like)
+
+        self.assertIn("write-through failed", logs.output[-1])
+
+
+class BatchCountsViewTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "user_service.services.redis.RedisPubSubClient.get_redis_connection",
+            return_value=_FakeHashRedis(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.factory = APIRequestFactory()
+        self.entity = _make_entity()
+        self.account = Account.objects.create(
+            entity=self.entity,
+            first_name="Test",
+            last_name="User",
+            email=f"{self.entity.id}@example.com",
+            is_active=True,
+            is_verified=True,
+        )
+        self.post = Post.objects.create(
+            entity=self.entity,
+            file_type="image",
+            content_type="post",
+            on_feed="true",
+        )
+        self.emoji = Emoji.objects.create(
+            emoji_content="+1", emoji_tags="like", updated_by=self.account
+        )
+        PreviewCount.objects.create(post=self.post, emoji=self.emoji, count=4)
+        PostScore.objects.create(post=self.post, likes_count=4)
+
+    def _get(self, **headers):
+        request = self.factory.get(
+            "/api/newsfeed/batch_counts",
+            {"post_ids": f"{self.post.post_id},missing"},
+            **headers,
+        )
+        force_authenticate(request, user=self.account)
+        request.entity = self.entity
+        response = BatchCountsView.as_view()(request)
+        response.render()
+        return response
+
+    def test_every_requested_post_in_one_response(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        posts = response.data["posts"]
+        self.assertEqual(
+            posts[self.post.post_id]["reactions"],
+            [{"count": 4, "emoji": self.emoji.emoji_id}],
+        )
+        self.assertEqual(posts[self.post.post_id]["activity"]["likes_count"], 4)
+        self.assertEqual(posts["missing"], {"reactions": [], "activity": None})
+
+    def test_unchanged_counts_revalidate_to_304(self):
+        etag = self._get()["ETag"]
+
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        PreviewCount.objects.filter(post=self.post).update(count=5)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FeedFanoutWriterTests(SimpleTestCase):
+    def setUp(self):
+        feed_fanout._prepared.clear()
+        self.addCleanup(feed_fanout._prepared.clear)
+        # BatchStatement.add binds a real PreparedStatement; a plain string
+        # would be %-formatted as CQL instead.
+        self.prepared = mock.Mock(spec=PreparedStatement)
+        self.prepared.bind.return_value = mock.Mock(
+            spec=BoundStatement,
+            keyspace=None,
+            routing_key=None,
+            custom_payload=None,
+            values=[],
+        )
+        self.session = mock.Mock()
+        self.session.prepare.return_value = self.prepared
+        patcher = mock.patch.object(feed_fanout, "_session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sleep = mock.patch.object(feed_fanout.time, "sleep")
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def _row(self, bucket, post_id):
+        return {
+            "bucket": bucket,
+            "day": timezone.now().date(),
+            "post_id": post_id,
+            "created_at": timezone.now(),
+            "author_id": "author",
+        }
+
+    def test_rows_are_grouped_per_partition(self):
+        calls = []
+
+        def execute(session, statements, **kwargs):
+            calls.append(list(statements))
+            return [(True, None)] * len(statements)
+
+        with mock.patch.object(feed_fanout, "execute_concurrent", side_effect=execute):
+            failed = feed_fanout.write_feed_rows(
+                [self._row("a", "1"), self._row("a", "2"), self._row("b", "1")],
+                models=(feed_fanout.NewsfeedIndex,),
+            )
+
+        self.assertEqual(failed, 0)
+        (statements,) = calls
+        self.assertEqual(len(statements), 2)
+        batch, single = statements
+        self.assertIsInstance(batch[0], feed_fanout.BatchStatement)
+        self.assertIs(single[0], self.prepared)
+        self.assertEqual(single[1][0], "b")
+
+    def test_only_failed_statements_are_retried(self):
+        attempts = []
+
+        def execute(session, statements, **kwargs):
+            attempts.append(len(statements))
+            if len(attempts) == 1:
+                return [(True, None), (False, Exception("timeout"))]
+            return [(True, None)] * len(statements)
+
+        with mock.patch.object(feed_fanout, "execute_concurrent", side_effect=execute):
+            failed = feed_fanout.write_feed_rows(
+                [self._row("a", "1"), self._row("b", "1")],
+                models=(feed_fanout.NewsfeedIndex,),
+            )
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(attempts, [2, 1])
+
+    def test_rows_are_written_to_both_feed_tables_by_default(self):
+        calls = []
+
+        def execute(session, statements, **kwargs):
+            calls.append(list(statements))
+            return [(True, None)] * len(statements)
+
+        with mock.patch.object(feed_fanout, "execute_concurrent", side_effect=execute):
+            feed_fanout.write_feed_rows([self._row("a", "1"), self._row("b", "1")])
+
+        (statements,) = calls
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(self.session.prepare.call_count, 2)
+
+
+class ReadTrendingCandidatesTests(SimpleTestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.partitions = {
+            "global": [("a", now - timedelta(hours=3)), ("b", now)],
+            "hiking": [
+                ("c", now - timedelta(hours=1)),
+                ("a", now - timedelta(hours=3)),
+            ],
+        }
+        self.session = mock.Mock()
+        self.session.execute_async.side_effect = self._execute_async
+        patcher = mock.patch.object(
+            trending_pool, "_session", return_value=self.session
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _execute_async(self, statement, params, timeout=None):
+        category, _ = params
+        future = mock.Mock()
+        if category not in self.partitions:
+            future.result.side_effect = Exception("read timeout")
+        else:
+            future.result.return_value = [
+                {"post_id": post_id, "created_at": created_at}
+                for post_id, created_at in self.partitions[category]
+            ]
+        return future
+
+    def test_partitions_merge_newest_first_without_duplicates(self):
+        post_ids = trending_pool.read_trending_candidates(["global", "hiking"], 10)
+
+        self.assertEqual(post_ids, ["b", "c", "a"])
+        self.assertEqual(self.session.execute_async.call_count, 2)
+
+    def test_failed_partition_is_skipped(self):
+        post_ids = trending_pool.read_trending_candidates(["slow", "hiking"], 1)
+
+        self.assertEqual(post_ids, ["c"])
+
+
+@override_settings(FEED_FRIENDS_SHARE=0.7)
+class GenerateCandidatesTests(SimpleTestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.friends = [(f"friend-{i}", now - timedelta(minutes=i)) for i in range(10)]
+        self.trending = [f"trending-{i}" for i in range(10)]
+        self.friends_rows = mock.Mock(return_value=(self.friends, "end-cursor"))
+        self.trending_posts = mock.Mock(return_value=self.trending)
+        for name, target in (
+            ("fetch_friends_rows", self.friends_rows),
+            ("fetch_trending_posts", self.trending_posts),
+            ("get_followed_pull_author_ids", mock.Mock(return_value=["star"])),
+            ("resolved_interest_categories", mock.Mock(return_value=["global"])),
+        ):
+            patcher = mock.patch.object(feed_candidates, name, target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.entity = mock.Mock(id="viewer")
+
+    def test_page_is_blended_by_share(self):
+        post_ids, cursor = feed_candidates.generate_candidates(self.entity, 10)
+
+        self.assertEqual(len(post_ids), 10)
+        self.assertEqual(sum(p.startswith("friend") for p in post_ids), 7)
+        self.assertEqual(post_ids[:4], ["friend-0", "trending-0", "friend-1", "friend-2"])
+        # Three friends rows went unused, so the next page starts at them.
+        self.assertEqual(cursor, (self.friends[6][1], frozenset({"friend-6"})))
+        self.friends_rows.assert_called_once_with("viewer", 10, None, ["star"])
+
+    def test_short_source_is_filled_by_the_other(self):
+        self.friends_rows.return_value = (self.friends[:2], "end-cursor")
+
+        post_ids, cursor = feed_candidates.generate_candidates(self.entity, 10)
+
+        self.assertEqual(post_ids[:3], ["friend-0", "trending-0", "friend-1"])
+        self.assertEqual(post_ids[3:], self.trending[1:8])
+        self.assertEqual(cursor, "end-cursor")
+
+    def test_failed_source_leaves_the_cursor_alone(self):
+        self.friends_rows.side_effect = Exception("read timeout")
+
+        post_ids, cursor = feed_candidates.generate_candidates(
+            self.entity, 10, "cursor"
+        )
+
+        self.assertEqual(post_ids, self.trending)
+        self.assertEqual(cursor, "cursor")
+
+    def test_post_in_both_sources_is_served_once(self):
+        post_ids, consumed = feed_candidates.interleave(
+            ["a", "b", "c"], ["a", "d"], 4, 0.5
+        )
+
+        self.assertEqual(post_ids, ["a", "d", "b", "c"])
+        self.assertEqual(consumed, 3)
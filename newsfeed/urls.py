@@ -65,6 +65,12 @@ urlpatterns = [
         views.CommentReactionsCountView.as_view(),
         name="newsfeed-comment-total-reactions",
     ),
+    # One request for every tally on a page - see BatchCountsView. NEW route.
+    path(
+        "batch_counts",
+        views.BatchCountsView.as_view(),
+        name="newsfeed-batch-counts",
+    ),
     path(
         "saves",
         views.PostSaveView.as_view(),
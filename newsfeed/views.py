@@ -1,5 +1,5 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -44,13 +44,21 @@ from .serializers import (
     ActivityCountSerializer,
     PostScoreSerializer,
     PostSaveSerializer,
+    post_link_url,
+    comment_link_url,
 )
 from user.serializers import ConnectionSerializer
 from rest_framework.pagination import PageNumberPagination
 from user.services.connections import ConnectionHelpers
 from user.services.mongohelpers import NotificationService
 from .drf_permissions import AllowsInternalService
-from .services.link_preview import extract_first_url, get_preview, fetch_image
+from .services.link_preview import extract_first_url, get_preview
+from .services.link_preview_images import IMAGE_VARIANTS, get_proxied_image
+from .services.link_preview_worker import link_preview_context
+from .services.feed_page_cache import get_or_build_page, invalidate_posts
+from .services.feed_candidates import generate_candidates
+from .services import reaction_counters
+from .services.ranking_updates import record_ranking_update
 from .services.comment_mentions import (
     extract_mention_handles,
     notify_comment_mentions,
@@ -67,10 +75,11 @@ from .helpers.query_functions import (
     update_ranking_score,
     interaction_score_bump,
     follower_interaction_score_bump,
-    fetch_friends_posts,
-    fetch_trending_posts,
-    resolved_interest_categories,
+    decode_feed_cursor,
+    encode_feed_cursor,
 )
+import hashlib
+import json
 import uuid
 from community.models import Follow, Realm
 from entity.models import Entity
@@ -102,22 +111,17 @@ class NewsfeedView(APIView):
         try:
             page_size = request.query_params.get("page_size", 10)
 
-            connections = ConnectionHelpers(entity)
-            connections_list = connections.get_connections()
-            # Was values_list("follower_id"), which returned the CURRENT
-            # entity's own id for every row rather than the things it follows -
-            # so this list was effectively useless. followee_id is the target.
-            followed_realm_ids = list(
-                Follow.objects.filter(follower=entity, status=True).values_list(
-                    "followee_id", flat=True
-                )
-            )
-            blocked_account_ids = get_blocked_account_ids(entity)
-
-            current_mode = RedisPubSubClient.get_and_toggle_feed_mode(entity.id)
+            # Opaque to the client: echoed back from the previous response to
+            # continue the friends feed below it, omitted to start at the top.
+            friends_cursor = decode_feed_cursor(request.data.get("friends_cursor"))
 
             viewcache = request.data.get("viewcache", [])
             if viewcache:
+                # Recorded here rather than by the worker so this very request
+                # already skips them.
+                RedisPubSubClient.mark_feed_posts_seen(
+                    entity.id, [view["post_id"] for view in viewcache]
+                )
                 # The worker's handler bumps interest affinity for these views
                 # too, so this one message replaces both calls.
                 RabbitMQClient.publish_on_commit(
@@ -125,85 +129,103 @@ class NewsfeedView(APIView):
                     {"entity_id": entity.id, "view_cache": viewcache},
                 )
 
-            if current_mode == "friends":
-                candidate_post_ids = fetch_friends_posts(entity.id, page_size)
+            # Friends and trending read concurrently and blended - see
+            # services/feed_candidates.py.
+            candidate_post_ids, friends_cursor = generate_candidates(
+                entity, page_size, friends_cursor
+            )
 
-                if not candidate_post_ids:
-                    candidate_post_ids = fetch_trending_posts(
-                        entity.id, page_size, 100, resolved_interest_categories(entity)
+            def build_page():
+                connections = ConnectionHelpers(entity)
+                connections_list = connections.get_connections()
+                # Was values_list("follower_id"), which returned the CURRENT
+                # entity's own id for every row rather than the things it
+                # follows - so this list was effectively useless. followee_id
+                # is the target.
+                followed_realm_ids = list(
+                    Follow.objects.filter(follower=entity, status=True).values_list(
+                        "followee_id", flat=True
                     )
-                    current_mode = "trending"
-                    RedisPubSubClient.update_feed_mode(entity.id, current_mode)
-            else:
-                candidate_post_ids = fetch_trending_posts(
-                    entity.id, page_size, 100, resolved_interest_categories(entity)
-                )
-
-                if not candidate_post_ids:
-                    candidate_post_ids = fetch_friends_posts(entity.id, page_size)
-                    current_mode = "friends"
-                    RedisPubSubClient.update_feed_mode(entity.id, current_mode)
-
-            hydrated_posts = (
-                Post.objects.select_related("entity", "score")
-                .prefetch_related(
-                    "tagging",
-                    "privacy_users",
-                    "references",
-                    "map_info",
-                    "preview",
                 )
-                .annotate(
-                    is_friend=Case(
-                        When(
-                            Q(entity_id__in=connections_list)
-                            | Q(entity_id__in=followed_realm_ids),
-                            then=Value(0.8),
+                blocked_account_ids = get_blocked_account_ids(entity)
+
+                hydrated_posts = (
+                    Post.objects.select_related("entity", "score")
+                    .prefetch_related(
+                        "tagging",
+                        "privacy_users",
+                        "references",
+                        "map_info",
+                        "preview",
+                    )
+                    .annotate(
+                        is_friend=Case(
+                            When(
+                                Q(entity_id__in=connections_list)
+                                | Q(entity_id__in=followed_realm_ids),
+                                then=Value(0.8),
+                            ),
+                            default=Value(0),
+                            output_field=IntegerField(),
                         ),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    ),
-                    is_friend_tagged=Case(
-                        When(tagging__entity_id__in=connections_list, then=Value(0.5)),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    ),
-                    is_saved=Exists(
-                        PostSave.objects.filter(post=OuterRef("pk"), entity=entity)
-                    ),
-                    entity_reaction=Coalesce(
-                        Subquery(
-                            Reaction.objects.filter(
-                                post=OuterRef("pk"), entity=entity
-                            ).values("emoji_id")[:1]
+                        is_friend_tagged=Case(
+                            When(
+                                tagging__entity_id__in=connections_list,
+                                then=Value(0.5),
+                            ),
+                            default=Value(0),
+                            output_field=IntegerField(),
                         ),
-                        Value(None),
-                    ),
-                )
-                .filter(
-                    visible_posts_filter(entity),
-                    post_id__in=candidate_post_ids,
-                    deleted_at=None,
-                    is_archived=False,
-                )
-                .exclude(entity_id__in=blocked_account_ids)
-                # The bucket is fanned out on write, so a post can sit in it
-                # from before its author narrowed their audience (going
-                # private rewrites existing posts). The filter above is what
-                # keeps those from being served; the bucket row is harmless
-                # once it can never hydrate.
-                .distinct()
-                .order_by(
-                    "-is_friend",
-                    "-is_friend_tagged",
-                    "-score__ranking_score",
+                        is_saved=Exists(
+                            PostSave.objects.filter(post=OuterRef("pk"), entity=entity)
+                        ),
+                        entity_reaction=Coalesce(
+                            Subquery(
+                                Reaction.objects.filter(
+                                    post=OuterRef("pk"), entity=entity
+                                ).values("emoji_id")[:1]
+                            ),
+                            Value(None),
+                        ),
+                    )
+                    .filter(
+                        visible_posts_filter(entity),
+                        post_id__in=candidate_post_ids,
+                        deleted_at=None,
+                        is_archived=False,
+                    )
+                    .exclude(entity_id__in=blocked_account_ids)
+                    # The bucket is fanned out on write, so a post can sit in
+                    # it from before its author narrowed their audience (going
+                    # private rewrites existing posts). The filter above is
+                    # what keeps those from being served; the bucket row is
+                    # harmless once it can never hydrate.
+                    .distinct()
+                    .order_by(
+                        "-is_friend",
+                        "-is_friend_tagged",
+                        "-score__ranking_score",
+                    )
                 )
-            )
 
-            serialized_result = PostSerializer(hydrated_posts, many=True)
+                # Evaluated here so every card's link preview can be read in
+                # one batch before serialization instead of one cache GET per
+                # post.
+                hydrated_posts = list(hydrated_posts)
+                return PostSerializer(
+                    hydrated_posts,
+                    many=True,
+                    context=link_preview_context(
+                        hydrated_posts, post_link_url, viewer_entity_id=entity.id
+                    ),
+                ).data
 
-            is_page_matched = len(serialized_result.data) == len(candidate_post_ids)
-            will_still_paginate = len(serialized_result.data) == int(page_size)
+            # Repeat refreshes over the same candidates skip everything in
+            # build_page - see services/feed_page_cache.py.
+            results = get_or_build_page(entity, candidate_post_ids, build_page)
+
+            is_page_matched = len(results) == len(candidate_post_ids)
+            will_still_paginate = len(results) == int(page_size)
             is_next = will_still_paginate if is_page_matched else None
 
             return Response(
@@ -211,7 +233,8 @@ class NewsfeedView(APIView):
                     "count": len(candidate_post_ids),
                     "next": is_next,
                     "previous": None,
-                    "results": serialized_result.data,
+                    "friends_cursor": encode_feed_cursor(friends_cursor),
+                    "results": results,
                 }
             )
         except Exception as e:
@@ -229,6 +252,7 @@ class NewsfeedView(APIView):
 
             if fields:
                 Post.objects.filter(post_id=post_id).update(**fields)
+                invalidate_posts([post_id])
 
             return Response(
                 {
@@ -260,6 +284,7 @@ class NewsfeedView(APIView):
                 Post.objects.filter(post_id__in=post_ids).update(
                     deleted_at=now(), deleted_by=user
                 )
+                invalidate_posts(post_ids)
 
             return Response(
                 {
@@ -312,6 +337,9 @@ class NewsfeedProfileView(APIView):
             viewcache = request.data.get("viewcache", [])
 
             if user.username != username and viewcache:
+                RedisPubSubClient.mark_feed_posts_seen(
+                    entity.id, [view["post_id"] for view in viewcache]
+                )
                 RabbitMQClient.publish_on_commit(
                     Queues.SAVE_VIEWCACHE_ENGAGEMENTS,
                     {"entity_id": entity.id, "view_cache": viewcache},
@@ -401,7 +429,15 @@ class NewsfeedProfileView(APIView):
                 queryset, request, view=self
             )
 
-            serialized_result = PostSerializer(paginated_queryset, many=True)
+            serialized_result = PostSerializer(
+                paginated_queryset,
+                many=True,
+                context=link_preview_context(
+                    paginated_queryset,
+                    post_link_url,
+                    viewer_entity_id=getattr(entity, "id", None),
+                ),
+            )
             data = paginator.get_paginated_response(serialized_result.data)
 
             return data
@@ -468,7 +504,9 @@ class NewsfeedPostPreviewView(APIView):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            serialized_result = PostSerializer(queryset)
+            serialized_result = PostSerializer(
+                queryset, context={"viewer_entity_id": getattr(entity, "id", None)}
+            )
 
             if (
                 serialized_result.data["deleted_at"]
@@ -541,30 +579,22 @@ class PostReactionsView(APIView):
                     emoji=emoji,
                 )
 
-                # Created on first use rather than pre-seeded for every
-                # (post, emoji) pair - a zero row is indistinguishable from no
-                # row to every reader (the clients filter count > 0, and the
-                # emoji picker reads the Emoji table, not this one). The
-                # unique constraint on (post, emoji) is what makes this safe
-                # under concurrent reactions: get_or_create catches the
-                # IntegrityError and re-reads instead of double-counting.
-                preview_count_obj, _ = PreviewCount.objects.get_or_create(
-                    post=post, emoji=emoji, defaults={"count": 0}
+                # Write-behind: no PreviewCount row is locked in this
+                # transaction, so concurrent reactions to a hot post don't
+                # queue on it. The row is created on first flush rather than
+                # pre-seeded - see services/reaction_counters.py.
+                reaction_counters.increment(
+                    reaction_counters.POST_REACTIONS, post.post_id, emoji.emoji_id
                 )
-                preview_count_obj.count += 1
-                preview_count_obj.save()
 
-                # likes_count is NOT incremented here any more. The worker's
-                # UpdateRankingScore adjusts the counter itself as part of
-                # recomputing the score, so doing it here too counts twice.
+                # likes_count is NOT incremented here any more. The ranking
+                # flush adjusts the counter itself as part of recomputing the
+                # score, so doing it here too counts twice.
                 #
-                # Published on commit, never inline: the worker reads these rows
+                # Recorded on commit, never inline: the flush reads these rows
                 # back on another connection and would otherwise score the
-                # pre-change state.
-                RabbitMQClient.publish_on_commit(
-                    Queues.UPDATE_RANKING_SCORE,
-                    {"post_id": post_id, "update_type": "react", "is_decrease": False},
-                )
+                # pre-change state. See services/ranking_updates.py.
+                record_ranking_update(post_id, "react")
                 RabbitMQClient.publish_on_commit(
                     Queues.INTERACTION_SCORE_BUMP,
                     {
@@ -659,21 +689,18 @@ class PostReactionsView(APIView):
                 reaction.emoji = new_emoji
                 reaction.save()
 
-                # Decrement side is tolerant of a missing row: with rows
-                # created on demand, "no row" already means zero, so there is
-                # nothing to take away.
-                old_preview = PreviewCount.objects.filter(
-                    post=post, emoji=old_emoji
-                ).first()
-                if old_preview:
-                    old_preview.count = max(old_preview.count - 1, 0)
-                    old_preview.save()
-
-                new_preview, _ = PreviewCount.objects.get_or_create(
-                    post=post, emoji=new_emoji, defaults={"count": 0}
+                # The decrement floors at zero when flushed: with rows created
+                # on demand, "no row" already means zero.
+                if old_emoji is not None:
+                    reaction_counters.increment(
+                        reaction_counters.POST_REACTIONS,
+                        post.post_id,
+                        old_emoji.emoji_id,
+                        -1,
+                    )
+                reaction_counters.increment(
+                    reaction_counters.POST_REACTIONS, post.post_id, new_emoji.emoji_id
                 )
-                new_preview.count += 1
-                new_preview.save()
 
                 if post.entity.id != entity.id:
                     service = NotificationService()
@@ -723,11 +750,8 @@ class PostReactionsView(APIView):
                     reaction_id=reaction.reaction_id,
                 )
 
-                # See the add path above: the worker owns likes_count.
-                RabbitMQClient.publish_on_commit(
-                    Queues.UPDATE_RANKING_SCORE,
-                    {"post_id": post_id, "update_type": "react", "is_decrease": True},
-                )
+                # See the add path above: the ranking flush owns likes_count.
+                record_ranking_update(post_id, "react", is_decrease=True)
                 RabbitMQClient.publish_on_commit(
                     Queues.INTERACTION_SCORE_BUMP,
                     {
@@ -762,12 +786,13 @@ class PostReactionsView(APIView):
                 emoji = reaction.emoji
                 reaction.delete()
 
-                preview_count = PreviewCount.objects.filter(
-                    post=post, emoji=emoji
-                ).first()
-                if preview_count:
-                    preview_count.count = max(preview_count.count - 1, 0)
-                    preview_count.save()
+                if emoji is not None:
+                    reaction_counters.increment(
+                        reaction_counters.POST_REACTIONS,
+                        post.post_id,
+                        emoji.emoji_id,
+                        -1,
+                    )
 
                 return Response(
                     {"message": "Reaction has been deleted"}, status=status.HTTP_200_OK
@@ -784,10 +809,18 @@ class ReactionsCountView(APIView):
         try:
             user = self.request.user
             post = Post.objects.get(post_id=post_id)
-            query_set = PreviewCount.objects.filter(post=post)
-
-            serialized_result = PreviewCountSerializer(query_set, many=True)
-            return Response(serialized_result.data, status=status.HTTP_200_OK)
+            # Rows plus the not-yet-flushed deltas, in PreviewCountSerializer's
+            # shape.
+            counts = reaction_counters.get_counts(
+                reaction_counters.POST_REACTIONS, post.post_id
+            )
+            return Response(
+                [
+                    {"count": count, "emoji": emoji_id}
+                    for emoji_id, count in counts.items()
+                ],
+                status=status.HTTP_200_OK,
+            )
         except Exception as e:
             logger.exception("ReactionsCountView.get failed")
             return Response({"error": str(e)}, status=500)
@@ -891,11 +924,11 @@ class CommentReactionsView(APIView):
                     emoji=emoji,
                 )
 
-                preview_count_obj, _ = CommentPreviewCount.objects.get_or_create(
-                    comment=comment, emoji=emoji, defaults={"count": 0}
+                reaction_counters.increment(
+                    reaction_counters.COMMENT_REACTIONS,
+                    comment.comment_id,
+                    emoji.emoji_id,
                 )
-                preview_count_obj.count += 1
-                preview_count_obj.save()
 
                 # The reactor is engaging with the comment's AUTHOR, so the
                 # interaction bump is between those two entities - not the
@@ -940,18 +973,18 @@ class CommentReactionsView(APIView):
                 reaction.emoji = new_emoji
                 reaction.save()
 
-                old_preview = CommentPreviewCount.objects.filter(
-                    comment=comment, emoji=old_emoji
-                ).first()
-                if old_preview:
-                    old_preview.count = max(old_preview.count - 1, 0)
-                    old_preview.save()
-
-                new_preview, _ = CommentPreviewCount.objects.get_or_create(
-                    comment=comment, emoji=new_emoji, defaults={"count": 0}
+                if old_emoji is not None:
+                    reaction_counters.increment(
+                        reaction_counters.COMMENT_REACTIONS,
+                        comment.comment_id,
+                        old_emoji.emoji_id,
+                        -1,
+                    )
+                reaction_counters.increment(
+                    reaction_counters.COMMENT_REACTIONS,
+                    comment.comment_id,
+                    new_emoji.emoji_id,
                 )
-                new_preview.count += 1
-                new_preview.save()
 
                 self._notify_comment_author(
                     comment, entity, new_emoji, reaction.reaction_id, "updated"
@@ -994,12 +1027,13 @@ class CommentReactionsView(APIView):
                 emoji = reaction.emoji
                 reaction.delete()
 
-                preview_count = CommentPreviewCount.objects.filter(
-                    comment=comment, emoji=emoji
-                ).first()
-                if preview_count:
-                    preview_count.count = max(preview_count.count - 1, 0)
-                    preview_count.save()
+                if emoji is not None:
+                    reaction_counters.increment(
+                        reaction_counters.COMMENT_REACTIONS,
+                        comment.comment_id,
+                        emoji.emoji_id,
+                        -1,
+                    )
 
             return Response(
                 {"message": "Reaction has been deleted"}, status=status.HTTP_200_OK
@@ -1018,10 +1052,16 @@ class CommentReactionsCountView(APIView):
         try:
             user = self.request.user
             comment = Comment.objects.get(comment_id=comment_id)
-            query_set = CommentPreviewCount.objects.filter(comment=comment)
-
-            serialized_result = CommentPreviewCountSerializer(query_set, many=True)
-            return Response(serialized_result.data, status=status.HTTP_200_OK)
+            counts = reaction_counters.get_counts(
+                reaction_counters.COMMENT_REACTIONS, comment.comment_id
+            )
+            return Response(
+                [
+                    {"count": count, "emoji": emoji_id}
+                    for emoji_id, count in counts.items()
+                ],
+                status=status.HTTP_200_OK,
+            )
         except Exception as e:
             logger.exception("CommentReactionsCountView.get failed")
             return Response({"error": str(e)}, status=500)
@@ -1047,6 +1087,108 @@ class ActivityCountView(APIView):
             return Response({"error": str(e)}, status=500)
 
 
+MAX_BATCH_COUNT_IDS = 50
+
+
+def _split_ids(raw):
+    return [item for item in (raw or "").split(",") if item]
+
+
+def _reaction_rows(counts):
+    # Sorted so the same tallies always serialize - and hash - the same way.
+    return [
+        {"count": count, "emoji": emoji_id}
+        for emoji_id, count in sorted(counts.items())
+    ]
+
+
+class BatchCountsView(APIView):
+    """
+    The tallies behind every card on a page in one request, instead of one
+    total_reactions / comment_total_reactions / post_activities call per
+    card. NEW route; the single-id endpoints stay for the live mobile app.
+
+    GET ?post_ids=<id>,<id>&comment_ids=<id>,<id> (either may be omitted, at
+    most MAX_BATCH_COUNT_IDS in total). Every requested id is in the
+    response, with empty tallies for one that has none:
+
+        {"posts": {post_id: {"reactions": [...], "activity": {...} | null}},
+         "comments": {comment_id: {"reactions": [...]}}}
+
+    `reactions` is the total_reactions shape and reads the same counters,
+    pending deltas included. The body's digest is the ETag, so a client
+    polling an unchanged page gets a 304.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            post_ids = list(dict.fromkeys(_split_ids(request.GET.get("post_ids"))))
+            comment_ids = list(
+                dict.fromkeys(_split_ids(request.GET.get("comment_ids")))
+            )
+            if len(post_ids) + len(comment_ids) > MAX_BATCH_COUNT_IDS:
+                return Response(
+                    {"error": f"At most {MAX_BATCH_COUNT_IDS} ids per request"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            post_reactions = reaction_counters.get_counts_many(
+                reaction_counters.POST_REACTIONS, post_ids
+            )
+            comment_reactions = reaction_counters.get_counts_many(
+                reaction_counters.COMMENT_REACTIONS, comment_ids
+            )
+            activity = {
+                post_id: {
+                    "likes_count": likes_count,
+                    "comments_count": comments_count,
+                    "shares_count": shares_count,
+                }
+                for post_id, likes_count, comments_count, shares_count in (
+                    PostScore.objects.filter(post_id__in=post_ids).values_list(
+                        "post_id", "likes_count", "comments_count", "shares_count"
+                    )
+                )
+            }
+
+            body = {
+                "posts": {
+                    post_id: {
+                        "reactions": _reaction_rows(post_reactions[post_id]),
+                        "activity": activity.get(post_id),
+                    }
+                    for post_id in post_ids
+                },
+                "comments": {
+                    comment_id: {
+                        "reactions": _reaction_rows(comment_reactions[comment_id])
+                    }
+                    for comment_id in comment_ids
+                },
+            }
+
+            etag = '"{}"'.format(
+                hashlib.sha1(
+                    json.dumps(body, sort_keys=True).encode("utf-8")
+                ).hexdigest()
+            )
+            if_none_match = request.headers.get("If-None-Match", "")
+            if etag in [tag.strip() for tag in if_none_match.split(",")]:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(body, status=status.HTTP_200_OK)
+
+            response["ETag"] = etag
+            # Per viewer and live: revalidate every time, never share.
+            response["Cache-Control"] = "private, no-cache"
+            return response
+        except Exception as e:
+            logger.exception("BatchCountsView.get failed")
+            return Response({"error": str(e)}, status=500)
+
+
 class CommentsView(APIView):
     # permission_classes = [IsAuthenticated]
     pagination_class = Pagination
@@ -1140,7 +1282,15 @@ class CommentsView(APIView):
                     queryset, request, view=self
                 )
 
-                serialized_result = CommentSerializer(paginated_queryset, many=True)
+                serialized_result = CommentSerializer(
+                    paginated_queryset,
+                    many=True,
+                    context=link_preview_context(
+                        paginated_queryset,
+                        comment_link_url,
+                        viewer_entity_id=getattr(entity, "id", None),
+                    ),
+                )
                 data = paginator.get_paginated_response(serialized_result.data)
 
                 return data
@@ -1176,7 +1326,15 @@ class CommentsView(APIView):
                     queryset, request, view=self
                 )
 
-                serialized_result = CommentSerializer(paginated_queryset, many=True)
+                serialized_result = CommentSerializer(
+                    paginated_queryset,
+                    many=True,
+                    context=link_preview_context(
+                        paginated_queryset,
+                        comment_link_url,
+                        viewer_entity_id=getattr(entity, "id", None),
+                    ),
+                )
                 data = paginator.get_paginated_response(serialized_result.data)
 
                 return data
@@ -1235,15 +1393,9 @@ class CommentsView(APIView):
                     entity=entity,
                 )
 
-                # comments_count is the worker's to move, same as likes_count.
-                RabbitMQClient.publish_on_commit(
-                    Queues.UPDATE_RANKING_SCORE,
-                    {
-                        "post_id": post_id,
-                        "update_type": "comment",
-                        "is_decrease": False,
-                    },
-                )
+                # comments_count is the ranking flush's to move, same as
+                # likes_count.
+                record_ranking_update(post_id, "comment")
                 RabbitMQClient.publish_on_commit(
                     Queues.BUMP_INTEREST_AFFINITY,
                     {
@@ -1437,19 +1589,15 @@ class CommentsView(APIView):
                 # row that was clicked. Without this the post's comment count
                 # only ever grew.
                 #
-                # One message PER deleted row, not one for the thread: the
-                # worker's handler moves comments_count by exactly one per
-                # message, so a single publish would return 1 where the bulk
-                # decrement this replaces returned len(deleted_ids).
-                for _ in deleted_ids:
-                    RabbitMQClient.publish_on_commit(
-                        Queues.UPDATE_RANKING_SCORE,
-                        {
-                            "post_id": current_comment.post_id,
-                            "update_type": "comment",
-                            "is_decrease": True,
-                        },
-                    )
+                # One event carrying the whole thread's count: the flush moves
+                # comments_count by exactly `count`, so this gives back
+                # len(deleted_ids) just like the bulk decrement it replaces.
+                record_ranking_update(
+                    current_comment.post_id,
+                    "comment",
+                    is_decrease=True,
+                    count=len(deleted_ids),
+                )
 
             # Deliberately AFTER the atomic block: Mongo is not part of the
             # Postgres transaction, so doing this inside would leave the
@@ -1644,6 +1792,12 @@ class LinkPreviewImageProxyView(APIView):
     URL through it; no rate limiting exists yet (matches the rest of this
     codebase, see LinkPreviewView's docstring/plan notes) - worth adding
     a per-IP throttle as a fast-follow.
+
+    Served from a host-local, content-addressed cache
+    (services.link_preview_images), so a card rendered in a thousand feeds
+    costs one third-party fetch. The content digest is the ETag, so a
+    revalidating browser gets a 304 without the bytes being read at all.
+    `?variant=card|icon` returns a resized copy instead of the original.
     """
 
     permission_classes = [AllowAny]
@@ -1651,15 +1805,28 @@ class LinkPreviewImageProxyView(APIView):
 
     def get(self, request):
         url = request.GET.get("url")
-        if not url:
+        variant = request.GET.get("variant") or None
+        if not url or (variant and variant not in IMAGE_VARIANTS):
             return HttpResponse(status=400)
 
-        result = fetch_image(url)
-        if result is None:
+        image = get_proxied_image(url, variant)
+        if image is None:
             return HttpResponse(status=404)
 
-        body, content_type = result
-        response = HttpResponse(body, content_type=content_type)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if image.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            response = HttpResponse(status=304)
+        else:
+            try:
+                response = FileResponse(
+                    open(image.path, "rb"), content_type=image.content_type
+                )
+            except FileNotFoundError:
+                # Pruned between the lookup and the open - rare enough that
+                # the client's retry refetching it is fine.
+                return HttpResponse(status=404)
+
+        response["ETag"] = image.etag
         response["Cache-Control"] = "public, max-age=86400"
         return response
 
@@ -7,5 +7,7 @@ class AuthenticationConfig(AppConfig):
     name = "user"
 
     def ready(self):
+        import user.signals  # noqa: F401
+
         MongoDBClient.get_connection()
         print("MongoDB connection initialized at project startup")
@@ -6,6 +6,7 @@ from .utils.consent import get_pending_consents
 from user_service.utils.crypto import decrypt_nonce
 from user_service.services.redis import RedisPubSubClient
 from .services.mongohelpers import SessionService
+from .services.auth_context_cache import get_auth_context, set_auth_context
 from django.core.exceptions import PermissionDenied
 import logging
 import time
@@ -37,29 +38,76 @@ COMPLIANCE_EXEMPT_VIEW_NAMES = {
 
 class AutheticationBackend(BaseBackend):
 
-    def _check_compliance(self, request, user):
+    def _compliance_error(self, user):
+        """
+        The reason this account is non-compliant, or None. Independent of the
+        view being requested, which is what lets the verdict be cached per
+        account and only the exemption check run per request.
+        """
+        if user.is_minor():
+            return "ACCOUNT_UNDERAGE: account does not meet the minimum age requirement"
+
+        if not user.is_profile_complete():
+            return "PROFILE_INCOMPLETE: birthdate and gender are required"
+
+        if get_pending_consents(user.entity):
+            return "CONSENT_REQUIRED: latest Terms and Conditions must be accepted"
+
+        return None
+
+    def _is_compliance_exempt(self, request):
         resolver_match = getattr(request, "resolver_match", None)
         if resolver_match is None:
-            return
+            return True
+
+        return resolver_match.view_name in COMPLIANCE_EXEMPT_VIEW_NAMES
+
+    def _enforce_compliance(self, request, compliance_error):
+        if compliance_error and not self._is_compliance_exempt(request):
+            raise PermissionDenied(compliance_error)
 
-        view_name = resolver_match.view_name
-        if view_name in COMPLIANCE_EXEMPT_VIEW_NAMES:
+    def _check_compliance(self, request, user):
+        if self._is_compliance_exempt(request):
             return
 
-        if user.is_minor():
-            raise PermissionDenied(
-                "ACCOUNT_UNDERAGE: account does not meet the minimum age requirement"
-            )
+        self._enforce_compliance(request, self._compliance_error(user))
+
+    def _set_request_entity(self, request, entity):
+        request.entity = entity
+        # `request` here is DRF's Request wrapper, and plain attribute
+        # assignment on it does not reach the Django HttpRequest
+        # underneath - only DRF's own `user` setter does that. Mirror
+        # it for `entity` so middleware (which only ever sees the
+        # HttpRequest) can report which entity a request acted as.
+        setattr(request._request, "entity", entity)
+
+    def _authenticate_cached(self, request, decoded_id, entity_id, device_token, fcm_token):
+        """
+        Warm path: everything after the nonce/JWT checks comes from one Redis
+        read (user/services/auth_context_cache.py). Returns None on a miss so
+        the caller falls through to the full lookup.
+        """
+        context = get_auth_context(entity_id, device_token, decoded_id)
+        if context is None:
+            return None
 
-        if not user.is_profile_complete():
-            raise PermissionDenied(
-                "PROFILE_INCOMPLETE: birthdate and gender are required"
+        if fcm_token and fcm_token != context.fcm_token:
+            # The token rotated since the entry was written - write it through
+            # and re-cache, rather than skipping the Mongo update.
+            SessionService().update_fcm_token(device_token, entity_id, fcm_token)
+            set_auth_context(
+                entity_id,
+                device_token,
+                context.account,
+                context.entity,
+                fcm_token=fcm_token,
+                compliance_error=context.compliance_error,
             )
 
-        if get_pending_consents(user.entity):
-            raise PermissionDenied(
-                "CONSENT_REQUIRED: latest Terms and Conditions must be accepted"
-            )
+        self._enforce_compliance(request, context.compliance_error)
+        self._set_request_entity(request, context.entity)
+
+        return (context.account, True)
 
     def authenticate(self, request):
         try:
@@ -98,6 +146,14 @@ class AutheticationBackend(BaseBackend):
 
             decoded_header = jwt.decoder(token)
             decoded_id = decoded_header["userID"]
+            entity_id = decoded_header["entity"]
+
+            if entity_id:
+                cached = self._authenticate_cached(
+                    request, decoded_id, entity_id, device_token, fcm_token
+                )
+                if cached is not None:
+                    return cached
 
             user = Account.objects.get(id=decoded_id)
 
@@ -107,27 +163,32 @@ class AutheticationBackend(BaseBackend):
                 )
 
             session = SessionService()
-            is_existing = session.exists(device_token, decoded_header["entity"])
+            is_existing = session.exists(device_token, entity_id)
 
             if not is_existing:
                 raise PermissionDenied("Device not logged in.")
 
             if fcm_token:
-                session.update_fcm_token(
-                    device_token, decoded_header["entity"], fcm_token
+                session.update_fcm_token(device_token, entity_id, fcm_token)
+
+            # Computed even for exempt views, and cached before it is
+            # enforced, so a non-compliant account working through the
+            # Complete Profile / consent pages still gets warm requests.
+            compliance_error = self._compliance_error(user)
+
+            if entity_id:
+                entity = Entity.objects.get(id=uuid.UUID(entity_id))
+                self._set_request_entity(request, entity)
+                set_auth_context(
+                    entity_id,
+                    device_token,
+                    user,
+                    entity,
+                    fcm_token=fcm_token,
+                    compliance_error=compliance_error,
                 )
 
-            self._check_compliance(request, user)
-
-            if decoded_header["entity"]:
-                entity = Entity.objects.get(id=uuid.UUID(decoded_header["entity"]))
-                request.entity = entity
-                # `request` here is DRF's Request wrapper, and plain attribute
-                # assignment on it does not reach the Django HttpRequest
-                # underneath - only DRF's own `user` setter does that. Mirror
-                # it for `entity` so middleware (which only ever sees the
-                # HttpRequest) can report which entity a request acted as.
-                setattr(request._request, "entity", entity)
+            self._enforce_compliance(request, compliance_error)
 
             return (user, True)
         except Account.DoesNotExist:
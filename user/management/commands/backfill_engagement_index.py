@@ -0,0 +1,179 @@
+"""
+Fills UserEngagementIndex from the existing UserEngagementLog rows.
+
+The index only receives engagements written after it was deployed, so read
+alone it would make fetch_trending_posts' seen-filter and the new-friend
+backfill forget every earlier view. This walks the log one user partition at a time,
+in token order, keeps the latest activity_time per (activity type, target)
+and writes those rows.
+
+Each row is written with its activity_time as the write timestamp, so an
+engagement recorded live while this runs - stamped with the current time -
+always wins over the backfilled row, and so does a live retraction's delete.
+Rerunning is harmless. The last user finished is checkpointed after every
+--chunk-size users: rerun the same command to resume, or pass --restart.
+
+Run it once the Go worker writes the index for the views it logs, then
+switch ENGAGEMENT_INDEX_READS on; until then the reads stay on the log.
+
+    python manage.py backfill_engagement_index
+"""
+
+import calendar
+import json
+import os
+import threading
+import uuid
+from datetime import timezone as dt_timezone
+
+from cassandra.concurrent import execute_concurrent
+from cassandra.cqlengine import connection as cql_connection
+from cassandra.cqlengine.functions import Token
+from django.core.management.base import BaseCommand, CommandError
+
+from user.models import UserEngagementIndex, UserEngagementLog
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_CHECKPOINT = "engagement_index_backfill.checkpoint.json"
+WRITE_CONCURRENCY = 50
+
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _session():
+    return cql_connection.get_session()
+
+
+def _insert_statement(session):
+    key = id(session)
+    statement = _prepared.get(key)
+    if statement is None:
+        with _prepared_lock:
+            statement = _prepared.get(key)
+            if statement is None:
+                statement = session.prepare(
+                    f"INSERT INTO {UserEngagementIndex.column_family_name()} "
+                    f"(user_id, activity_type, target_id, target_type, activity_time) "
+                    f"VALUES (?, ?, ?, ?, ?) USING TIMESTAMP ?"
+                )
+                _prepared[key] = statement
+    return statement
+
+
+def _write_timestamp(activity_time):
+    """`activity_time` as a Cassandra write timestamp (microseconds, UTC)."""
+    if activity_time.tzinfo is not None:
+        activity_time = activity_time.astimezone(dt_timezone.utc)
+    seconds = calendar.timegm(activity_time.timetuple())
+    return seconds * 1_000_000 + activity_time.microsecond
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def latest_engagements(user_id):
+    """
+    (activity_type, target_id) -> (target_type, activity_time) of the latest
+    logged engagement with each target, for one user.
+    """
+    latest = {}
+    for activity_type, target_id, target_type, activity_time in (
+        UserEngagementLog.objects.filter(user_id=user_id)
+        .limit(None)
+        .values_list("activity_type", "target_id", "target_type", "activity_time")
+    ):
+        if not activity_type or not target_id or activity_time is None:
+            continue
+        key = (activity_type, target_id)
+        if key not in latest or activity_time > latest[key][1]:
+            latest[key] = (target_type, activity_time)
+    return latest
+
+
+def backfill_user(session, user_id):
+    """Writes one user's index rows. Returns (rows written, rows failed)."""
+    insert = _insert_statement(session)
+    statements = [
+        (
+            insert,
+            (
+                user_id,
+                activity_type,
+                target_id,
+                target_type,
+                activity_time,
+                _write_timestamp(activity_time),
+            ),
+        )
+        for (activity_type, target_id), (target_type, activity_time) in (
+            latest_engagements(user_id).items()
+        )
+    ]
+    if not statements:
+        return 0, 0
+    results = execute_concurrent(
+        session, statements, concurrency=WRITE_CONCURRENCY, raise_on_first_error=False
+    )
+    failed = sum(1 for success, _ in results if not success)
+    return len(statements) - failed, failed
+
+
+def next_users(after, chunk_size):
+    """The next `chunk_size` user ids in the log after `after`, in token order."""
+    queryset = UserEngagementLog.objects.distinct()
+    if after is not None:
+        queryset = queryset.filter(pk__token__gt=Token(uuid.UUID(after)))
+    return [row.user_id for row in queryset.limit(chunk_size)]
+
+
+class Command(BaseCommand):
+    help = "Fill UserEngagementIndex from the existing UserEngagementLog rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any saved checkpoint and start from the first user.",
+        )
+
+    def handle(self, *args, chunk_size, checkpoint, restart, **options):
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        progress = None if restart else _read_json(checkpoint)
+        after = (progress or {}).get("last_user_id")
+
+        session = _session()
+        written = 0
+        while True:
+            users = next_users(after, chunk_size)
+            if not users:
+                break
+            for user_id in users:
+                count, failed = backfill_user(session, user_id)
+                if failed:
+                    raise CommandError(
+                        f"{failed} index rows failed to write for user {user_id}"
+                    )
+                written += count
+            after = str(users[-1])
+            _write_json(checkpoint, {"last_user_id": after})
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} engagement index rows"))
@@ -159,6 +159,59 @@ class UserEngagementLog(DjangoCassandraModel):
         get_pk_field = "log_id"
 
 
+class UserEngagementIndex(DjangoCassandraModel):
+    """
+    Latest engagement per (user, activity type, target), written alongside
+    every UserEngagementLog row.
+
+    The log is clustered by log_id/activity_time, so "which of these posts
+    has this user viewed" against it scans the user's whole history. Here the
+    same question is one partition read with an IN on the last clustering
+    column:
+
+        UserEngagementIndex.objects.filter(
+            user_id=..., activity_type="view", target_id__in=[...]
+        )
+
+    An upsert rather than an append: a target engaged with twice is one row,
+    last write wins. That is normally the later engagement, but a write that
+    lands late - a viewcache batch, say - replaces a newer activity_time
+    with its own.
+
+    Rows are deleted alongside the REMOVE_ENGAGEMENT_LOG publish when the
+    engagement is retracted (newsfeed/signals.py), and
+    backfill_engagement_index fills the table from the log.
+    """
+
+    user_id = columns.UUID(partition_key=True)
+    activity_type = columns.Text(primary_key=True)
+    target_id = columns.Text(primary_key=True)
+
+    target_type = columns.Text(required=False)
+    activity_time = columns.DateTime(required=False)
+
+    class Meta:
+        get_pk_field = "target_id"
+
+    @classmethod
+    def for_log(cls, log):
+        """The index row matching a UserEngagementLog, ready to save or batch."""
+        return cls(
+            user_id=log.user_id,
+            activity_type=log.activity_type,
+            target_id=log.target_id,
+            target_type=log.target_type,
+            activity_time=log.activity_time,
+        )
+
+    @classmethod
+    def remove(cls, user_id, activity_type, target_id):
+        """Deletes the row for one retracted engagement, by primary key."""
+        cls.objects.filter(
+            user_id=user_id, activity_type=activity_type, target_id=str(target_id)
+        ).delete()
+
+
 class UserConsent(models.Model):
 
     id = models.CharField(
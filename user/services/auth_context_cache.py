@@ -0,0 +1,221 @@
+"""
+Short-lived cache of everything AutheticationBackend.authenticate resolves
+after the nonce check: the Account, its personal Entity, the acting Entity,
+whether the (device, entity) session exists in Mongo, the FCM token last
+written for it, and the account's compliance verdict.
+
+Keyed by (acting entity, device token) - the same pair a Mongo session row is
+keyed by - so a cold request costs what it always did and a warm one costs a
+single GET. The account id is stored inside the value and compared on read
+rather than being part of the key: two admins acting as the same page from
+one browser share a session row, and revoking that row has to reach both.
+
+Uses the raw Redis connection for the same reason as
+entity/services/permission_catalog_cache.py - plain JSON under a plain key,
+no django.core.cache version mangling. Every failure is swallowed and treated
+as a miss, so a Redis outage degrades auth to the uncached path instead of
+rejecting requests.
+
+Invalidation is explicit (SessionService.revoke_device/clear_fcm_token,
+user/signals.py for Account, Entity and UserConsent writes). The TTL bounds whatever
+is NOT covered by it: sessions deleted by the Node server, and a
+PolicyDocument whose effective_date passes without any write on our side.
+"""
+
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from user_service.services.redis import RedisPubSubClient
+
+logger = logging.getLogger(__name__)
+
+AUTH_CONTEXT_TTL_SECONDS = 120
+AUTH_CONTEXT_VERSION = "v1"
+
+
+def _context_key(entity_id, device_token):
+    return f"chatterloop:authctx:{AUTH_CONTEXT_VERSION}:{entity_id}:{device_token}"
+
+
+def _account_index_key(account_id):
+    """Set of context keys filled for one account, so a write to the Account
+    can drop every device/entity combination it is cached under."""
+    return f"chatterloop:authctx:{AUTH_CONTEXT_VERSION}:account:{account_id}"
+
+
+def _entity_index_key(entity_id):
+    """Set of context keys an entity appears in, as the acting or the
+    personal entity, so a write to the Entity can drop them."""
+    return f"chatterloop:authctx:{AUTH_CONTEXT_VERSION}:entity:{entity_id}"
+
+
+def _snapshot(instance):
+    return {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields
+    }
+
+
+def _restore(model, data):
+    """
+    Rebuilds a model instance the way a queryset would (from_db), not via the
+    constructor - a constructor-built Account has _state.adding=True, and its
+    uuid default pk would make a later account.save() attempt an INSERT.
+    """
+    fields = model._meta.concrete_fields
+    return model.from_db(
+        DEFAULT_DB_ALIAS,
+        [field.attname for field in fields],
+        [field.to_python(data.get(field.attname)) for field in fields],
+    )
+
+
+class AuthContext:
+    """What a cache hit hands back to the backend."""
+
+    __slots__ = ("account", "entity", "fcm_token", "compliance_error")
+
+    def __init__(self, account, entity, fcm_token, compliance_error):
+        self.account = account
+        self.entity = entity
+        self.fcm_token = fcm_token
+        self.compliance_error = compliance_error
+
+
+def get_auth_context(entity_id, device_token, account_id):
+    """
+    The cached context for this (entity, device), or None on a miss.
+
+    A hit for a different account than the token names is a miss too - see
+    the module docstring for why the account is not part of the key.
+    """
+    from entity.models import Entity
+    from user.models import Account
+
+    try:
+        raw = RedisPubSubClient.get_redis_connection().get(
+            _context_key(entity_id, device_token)
+        )
+    except Exception:
+        logger.warning("Auth context cache read failed (non-fatal)", exc_info=True)
+        return None
+
+    if raw is None:
+        return None
+
+    try:
+        payload = json.loads(raw)
+        if payload["account"]["id"] != str(account_id):
+            return None
+
+        personal_entity = _restore(Entity, payload["personal_entity"])
+        account = _restore(Account, payload["account"])
+        account.entity = personal_entity
+
+        entity = (
+            personal_entity
+            if payload["entity"]["id"] == str(personal_entity.id)
+            else _restore(Entity, payload["entity"])
+        )
+    except Exception:
+        logger.warning("Discarding unreadable auth context entry", exc_info=True)
+        return None
+
+    return AuthContext(
+        account=account,
+        entity=entity,
+        fcm_token=payload.get("fcm_token"),
+        compliance_error=payload.get("compliance_error"),
+    )
+
+
+def set_auth_context(
+    entity_id, device_token, account, entity, fcm_token=None, compliance_error=None
+):
+    """
+    Stores a context. Only called once the session has been confirmed to
+    exist, so "session exists" is implied by the entry itself.
+    """
+    key = _context_key(entity_id, device_token)
+    index_keys = {
+        _account_index_key(account.id),
+        _entity_index_key(entity.id),
+        _entity_index_key(account.entity.id),
+    }
+    payload = json.dumps(
+        {
+            "account": _snapshot(account),
+            "personal_entity": _snapshot(account.entity),
+            "entity": _snapshot(entity),
+            "fcm_token": fcm_token,
+            "compliance_error": compliance_error,
+        },
+        cls=DjangoJSONEncoder,
+    )
+
+    try:
+        pipe = RedisPubSubClient.get_redis_connection().pipeline()
+        pipe.set(key, payload, ex=AUTH_CONTEXT_TTL_SECONDS)
+        for index_key in index_keys:
+            pipe.sadd(index_key, key)
+            # Outlives every entry it lists; stale members only cost a no-op DEL.
+            pipe.expire(index_key, AUTH_CONTEXT_TTL_SECONDS * 2)
+        pipe.execute()
+    except Exception:
+        logger.warning("Auth context cache write failed (non-fatal)", exc_info=True)
+
+
+def invalidate_device(device_token, entity_ids):
+    """Drops the contexts for one device across the given entities."""
+    keys = [_context_key(entity_id, device_token) for entity_id in entity_ids]
+    if not device_token or not keys:
+        return
+
+    try:
+        RedisPubSubClient.get_redis_connection().delete(*keys)
+    except Exception:
+        logger.warning(
+            "Auth context invalidation failed for a device (non-fatal)",
+            exc_info=True,
+        )
+
+
+def _invalidate_index(index_key, label):
+    """Deletes every context listed under `index_key`, on commit."""
+
+    def _invalidate():
+        try:
+            conn = RedisPubSubClient.get_redis_connection()
+            keys = conn.smembers(index_key)
+            conn.delete(index_key, *keys)
+        except Exception:
+            logger.warning(
+                "Auth context invalidation failed for %s (non-fatal)",
+                label,
+                exc_info=True,
+            )
+
+    transaction.on_commit(_invalidate)
+
+
+def invalidate_account(account_id):
+    """
+    Drops every context cached for this account, on every device and entity.
+
+    Deferred until the surrounding transaction commits: invalidating first
+    lets a concurrent request re-cache the pre-change row before the writer
+    commits, which would leave a deactivated account authenticating until the
+    TTL ran out.
+    """
+    _invalidate_index(_account_index_key(account_id), f"account {account_id}")
+
+
+def invalidate_entity(entity_id):
+    """
+    Drops every context this entity appears in, as the acting entity or as
+    an account's personal entity. Deferred to commit like invalidate_account.
+    """
+    _invalidate_index(_entity_index_key(entity_id), f"entity {entity_id}")
@@ -7,6 +7,7 @@ from ..ext_models.mongomodels import (
 from ..utils.generators import generate_random_digit
 from datetime import datetime
 from ..ext_models.mongomodels import Session
+from .auth_context_cache import invalidate_device
 import uuid
 
 
@@ -245,6 +246,10 @@ class SessionService:
             deviceToken=device_token,
             entityID=str(entity_id),
         ).update(set__fcmToken=None)
+        # The cached auth context remembers the token it last wrote and skips
+        # the write while the header still matches - drop it so switching
+        # back to this entity re-registers the token instead.
+        invalidate_device(device_token, [entity_id])
 
     def update_fcm_token(self, device_token, entity_id, fcm_token):
         """Upsert this device's FCM push token onto its session row - but only
@@ -276,4 +281,8 @@ class SessionService:
         physical device/browser - allowed_entity_ids must be this account's
         personal entity plus every page/realm it can switch into."""
         allowed = [str(entity_id) for entity_id in allowed_entity_ids]
-        return Session.objects(deviceToken=device_token, entityID__in=allowed).delete()
+        deleted = Session.objects(deviceToken=device_token, entityID__in=allowed).delete()
+        # Otherwise the revoked device keeps authenticating off its cached
+        # context until the TTL runs out.
+        invalidate_device(device_token, allowed)
+        return deleted
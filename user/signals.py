@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from entity.models import Entity
+from user.models import Account, UserConsent
+from user.services.auth_context_cache import invalidate_account, invalidate_entity
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def _on_account_changed(sender, instance, **kwargs):
+    # Covers deactivation (delete_account sets is_active=False) as well as
+    # birthdate/gender edits, both of which change the cached verdict.
+    invalidate_account(instance.id)
+
+
+@receiver(post_save, sender=Entity)
+@receiver(post_delete, sender=Entity)
+def _on_entity_changed(sender, instance, **kwargs):
+    # The cached context carries both the acting and the personal Entity row.
+    invalidate_entity(instance.id)
+
+
+@receiver(post_save, sender=UserConsent)
+@receiver(post_delete, sender=UserConsent)
+def _on_consent_changed(sender, instance, **kwargs):
+    # Consent is recorded against the personal entity, but the cached
+    # compliance verdict is per account.
+    for account_id in Account.objects.filter(entity_id=instance.entity_id).values_list(
+        "id", flat=True
+    ):
+        invalidate_account(account_id)
@@ -0,0 +1,142 @@
+import uuid
+from unittest import mock
+
+from django.test import TestCase
+
+from entity.models import Entity
+from user.models import Account
+from user.services import auth_context_cache
+
+
+class _FakeRedis:
+    """Just enough of the redis-py surface the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def sadd(self, key, member):
+        self.store.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.store.get(key, set()))
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+def _make_account():
+    entity = Entity.objects.create(type="user")
+    return Account.objects.create(
+        entity=entity,
+        first_name="Test",
+        last_name="User",
+        email=f"{uuid.uuid4()}@example.com",
+        is_active=True,
+        is_verified=True,
+    )
+
+
+class AuthContextCacheTests(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch(
+            "user_service.services.redis.RedisPubSubClient.get_redis_connection",
+            return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.account = _make_account()
+        self.entity = self.account.entity
+        self.device_token = f"device-{uuid.uuid4()}"
+
+    def _fill(self, **kwargs):
+        auth_context_cache.set_auth_context(
+            self.entity.id, self.device_token, self.account, self.entity, **kwargs
+        )
+
+    def test_round_trip_restores_a_saveable_account(self):
+        self._fill(fcm_token="fcm-1", compliance_error=None)
+
+        context = auth_context_cache.get_auth_context(
+            self.entity.id, self.device_token, self.account.id
+        )
+
+        self.assertEqual(context.account.id, self.account.id)
+        self.assertEqual(context.account.entity.id, self.entity.id)
+        self.assertEqual(context.entity.id, self.entity.id)
+        self.assertEqual(context.fcm_token, "fcm-1")
+        self.assertIsNone(context.compliance_error)
+        # A restored instance must UPDATE, not INSERT a duplicate primary key.
+        context.account.save()
+        self.assertEqual(Account.objects.filter(id=self.account.id).count(), 1)
+
+    def test_other_account_on_the_same_device_is_a_miss(self):
+        self._fill()
+
+        self.assertIsNone(
+            auth_context_cache.get_auth_context(
+                self.entity.id, self.device_token, uuid.uuid4()
+            )
+        )
+
+    def test_revoking_the_device_drops_the_entry(self):
+        self._fill()
+
+        auth_context_cache.invalidate_device(self.device_token, [self.entity.id])
+
+        self.assertIsNone(
+            auth_context_cache.get_auth_context(
+                self.entity.id, self.device_token, self.account.id
+            )
+        )
+
+    def test_saving_the_account_drops_the_entry(self):
+        self._fill()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.is_active = False
+            self.account.save()
+
+        self.assertIsNone(
+            auth_context_cache.get_auth_context(
+                self.entity.id, self.device_token, self.account.id
+            )
+        )
+
+    def test_acting_as_the_personal_entity_reuses_it(self):
+        self._fill()
+
+        context = auth_context_cache.get_auth_context(
+            self.entity.id, self.device_token, self.account.id
+        )
+
+        self.assertIs(context.entity, context.account.entity)
+
+    def test_saving_the_entity_drops_the_entry(self):
+        self._fill()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entity.save()
+
+        self.assertIsNone(
+            auth_context_cache.get_auth_context(
+                self.entity.id, self.device_token, self.account.id
+            )
+        )
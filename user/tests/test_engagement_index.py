@@ -0,0 +1,150 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from newsfeed import signals as newsfeed_signals
+from newsfeed.helpers import query_functions
+from user.management.commands import backfill_engagement_index as backfill
+
+
+class _FakeLog:
+    """UserEngagementLog.objects for one user."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, **kwargs):
+        return self
+
+    def limit(self, limit):
+        return self
+
+    def values_list(self, *fields):
+        return list(self.rows)
+
+
+class EngagementIndexBackfillTests(SimpleTestCase):
+    def setUp(self):
+        backfill._prepared.clear()
+        self.addCleanup(backfill._prepared.clear)
+        self.user_id = uuid.uuid4()
+        self.at = datetime(2026, 1, 1, 12, 0, 0)
+        rows = [
+            ("view", "post-1", "post", self.at),
+            ("view", "post-1", "post", self.at + timedelta(hours=1)),
+            ("view", "post-2", "post", self.at),
+            # Nothing to index these under.
+            ("view", None, "post", self.at),
+            ("view", "post-3", "post", None),
+        ]
+        objects = mock.patch.object(
+            backfill.UserEngagementLog, "objects", _FakeLog(rows)
+        )
+        objects.start()
+        self.addCleanup(objects.stop)
+
+    def test_keeps_the_latest_engagement_per_target(self):
+        latest = backfill.latest_engagements(self.user_id)
+
+        self.assertEqual(
+            latest,
+            {
+                ("view", "post-1"): ("post", self.at + timedelta(hours=1)),
+                ("view", "post-2"): ("post", self.at),
+            },
+        )
+
+    def test_rows_are_written_at_their_activity_time(self):
+        session = mock.Mock()
+        with mock.patch.object(
+            backfill,
+            "execute_concurrent",
+            side_effect=lambda session, statements, **kwargs: [(True, None)]
+            * len(statements),
+        ) as execute:
+            written, failed = backfill.backfill_user(session, self.user_id)
+
+        self.assertEqual((written, failed), (2, 0))
+        statements = execute.call_args.args[1]
+        timestamps = {params[2]: params[-1] for _, params in statements}
+        # 2026-01-01 12:00 UTC, in microseconds.
+        self.assertEqual(timestamps["post-2"], 1767268800 * 1_000_000)
+        self.assertEqual(
+            timestamps["post-1"] - timestamps["post-2"], 3600 * 1_000_000
+        )
+
+
+class _FakeEngagements:
+    """UserEngagementLog/UserEngagementIndex.objects, recording filters."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+
+    def filter(self, **kwargs):
+        self.filters.append(kwargs)
+        return self
+
+    def values_list(self, *fields):
+        return list(self.rows)
+
+
+class SeenFilterSourceTests(SimpleTestCase):
+    def setUp(self):
+        self.log = _FakeEngagements([("post-1", "post", datetime(2026, 1, 1))])
+        self.index = _FakeEngagements([("post-2", "post", datetime(2026, 1, 1))])
+        for model, fake in (
+            (query_functions.UserEngagementLog, self.log),
+            (query_functions.UserEngagementIndex, self.index),
+        ):
+            patcher = mock.patch.object(model, "objects", fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        candidates = mock.patch.object(
+            query_functions,
+            "read_trending_candidates",
+            return_value=["post-1", "post-2", "post-3"],
+        )
+        candidates.start()
+        self.addCleanup(candidates.stop)
+
+    def _unseen(self):
+        return query_functions.fetch_trending_posts(uuid.uuid4(), user_interests=[])
+
+    @override_settings(ENGAGEMENT_INDEX_READS=False)
+    def test_reads_the_log_until_the_index_is_switched_on(self):
+        self.assertEqual(self._unseen(), ["post-2", "post-3"])
+        self.assertEqual(self.index.filters, [])
+
+    @override_settings(ENGAGEMENT_INDEX_READS=True)
+    def test_reads_the_index_once_switched_on(self):
+        self.assertEqual(self._unseen(), ["post-1", "post-3"])
+        self.assertEqual(self.log.filters, [])
+
+
+class EngagementIndexRemovalTests(TestCase):
+    def test_unreacting_deletes_the_index_row(self):
+        reaction = mock.Mock(entity_id="entity-1", reaction_id="reaction-1")
+        with mock.patch.object(
+            newsfeed_signals.RabbitMQClient, "publish_on_commit"
+        ), mock.patch.object(
+            newsfeed_signals.UserEngagementIndex, "remove"
+        ) as remove, self.captureOnCommitCallbacks(execute=True):
+            newsfeed_signals.remove_reaction_log(sender=None, instance=reaction)
+
+        remove.assert_called_once_with("entity-1", "react", "reaction-1")
+
+    def test_a_failed_delete_is_logged_not_raised(self):
+        reaction = mock.Mock(entity_id="entity-1", reaction_id="reaction-1")
+        with mock.patch.object(
+            newsfeed_signals.RabbitMQClient, "publish_on_commit"
+        ), mock.patch.object(
+            newsfeed_signals.UserEngagementIndex,
+            "remove",
+            side_effect=Exception("cassandra down"),
+        ), self.assertLogs(
+            newsfeed_signals.logger, "WARNING"
+        ), self.captureOnCommitCallbacks(execute=True):
+            newsfeed_signals.remove_reaction_log(sender=None, instance=reaction)
@@ -156,6 +156,7 @@ def delete_account(account, entity):
         PostTag,
         PostPrivacy,
     )
+    from newsfeed.services.feed_page_cache import invalidate_authors
 
     account_id = account.id
 
@@ -163,6 +164,7 @@ def delete_account(account, entity):
         Post.objects.filter(entity=entity, deleted_at__isnull=True).update(
             deleted_at=now(), deleted_by=account
         )
+        invalidate_authors([entity.id])
         Comment.objects.filter(entity=entity, deleted_at__isnull=True).update(
             deleted_at=now(), deleted_by=entity
         )
@@ -5,7 +5,7 @@ from django.utils.timezone import make_aware
 from django.utils.timezone import now
 from ..utils.bcrypt_tools import hash_password
 from ..utils.generators import generate_unique_username
-from ..models import UserEngagementLog
+from ..models import UserEngagementIndex, UserEngagementLog
 from django.utils.timezone import now, is_naive, make_aware, get_current_timezone
 from django.utils.dateparse import parse_datetime
 import uuid
@@ -105,6 +105,7 @@ def save_profile_visit(entity, profile_id, target_type):
             target_id=str(profile_id),
         )
         log.save()
+        UserEngagementIndex.for_log(log).save()
         return log
 
     except Exception as ex:
@@ -1,6 +1,7 @@
 from django_redis import get_redis_connection
 from django.db import transaction
 import json
+import time
 
 
 class RedisPubSubClient:
@@ -86,43 +87,45 @@ class RedisPubSubClient:
 
         return result is True
 
+    # Same lifetime as a NewsfeedIndex row - once the row has expired there is
+    # nothing left for the seen-set to filter.
+    FEED_SEEN_TTL = 60 * 60 * 24 * 14
+
     @classmethod
-    def get_and_toggle_feed_mode(cls, entity_id, fallback_mode="friends"):
+    def mark_feed_posts_seen(cls, entity_id, post_ids):
         """
-        Determines the feed mode for the current request by reading the
-        previous state from Redis, automatically toggling it, and saving it.
+        Records posts the viewer has scrolled past, so fetch_friends_posts can
+        skip them without deleting the bucket rows (which only left tombstones
+        for every read to wade through). A sorted set scored by when each was
+        seen, so entries older than a bucket row can be trimmed on the way in.
         """
         conn = cls.get_redis_connection()
-        if not conn:
-            return fallback_mode
-
-        mode_key = f"chatterloop:feed:current_mode:{entity_id}"
-
-        # 1. Read the previous mode
-        last_mode = conn.get(mode_key)
+        if not conn or not post_ids:
+            return
 
-        if last_mode:
-            # Decode the bytes from Redis to a string
-            last_mode_str = (
-                last_mode.decode() if isinstance(last_mode, bytes) else str(last_mode)
-            )
-            current_mode = "trending" if last_mode_str == "friends" else "friends"
-        else:
-            current_mode = fallback_mode
-
-        # 2. Instantly save the new mode so the next request flips automatically
-        # Set a 30-minute expiration (1800 seconds) to save Redis memory
-        conn.setex(mode_key, 1800, current_mode)
-
-        return current_mode
+        seen_key = f"chatterloop:feed:seen:{entity_id}"
+        seen_at = time.time()
+        pipe = conn.pipeline()
+        pipe.zadd(seen_key, {str(post_id): seen_at for post_id in post_ids})
+        pipe.zremrangebyscore(seen_key, "-inf", seen_at - cls.FEED_SEEN_TTL)
+        pipe.expire(seen_key, cls.FEED_SEEN_TTL)
+        pipe.execute()
 
     @classmethod
-    def update_feed_mode(cls, entity_id, finalized_mode):
+    def filter_unseen_feed_posts(cls, entity_id, post_ids):
         """
-        Force-updates the current mode state in Redis. Useful for
-        re-aligning the state when the view triggers a fallback path.
+        `post_ids` minus the ones mark_feed_posts_seen recorded, order kept.
+        Fails open - without Redis every post counts as unseen.
         """
         conn = cls.get_redis_connection()
-        if conn:
-            mode_key = f"chatterloop:feed:current_mode:{entity_id}"
-            conn.setex(mode_key, 1800, finalized_mode)
+        if not conn or not post_ids:
+            return list(post_ids)
+
+        seen_key = f"chatterloop:feed:seen:{entity_id}"
+        pipe = conn.pipeline()
+        for post_id in post_ids:
+            pipe.zscore(seen_key, str(post_id))
+        scores = pipe.execute()
+        return [
+            post_id for post_id, score in zip(post_ids, scores) if score is None
+        ]
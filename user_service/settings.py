@@ -117,6 +117,45 @@ MONGODB_CLUSTER_PASS = os.getenv("MONGODB_CLUSTER_PASS")
 MONGODB_CLUSTER_HOST = os.getenv("MONGODB_CLUSTER_HOST")
 MONGODB_DB = os.getenv("MONGODB_DB")
 
+# Local disk cache behind LinkPreviewImageProxyView (see
+# newsfeed/services/link_preview_images.py). Per host, shared by its workers.
+LINK_PREVIEW_IMAGE_CACHE_DIR = os.getenv(
+    "LINK_PREVIEW_IMAGE_CACHE_DIR", "/tmp/chatterloop-link-preview-images"
+)
+LINK_PREVIEW_IMAGE_CACHE_MAX_BYTES = int(
+    os.getenv("LINK_PREVIEW_IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+
+# Share of each newsfeed page drawn from the friends feed; trending fills the
+# rest, and either side fills in for the other when it runs short.
+FEED_FRIENDS_SHARE = float(os.getenv("FEED_FRIENDS_SHARE", "0.7"))
+
+# Read the friends feed from the day-partitioned NewsfeedIndex table rather
+# than the legacy one the Go worker writes. Switch on only once the worker
+# writes the new table and backfill_newsfeed_index has run.
+FEED_INDEX_BY_DAY_READS = os.getenv("FEED_INDEX_BY_DAY_READS", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+# Read seen/engaged checks (trending seen-filter, new-friend backfill, mutual
+# friends' engagements) from UserEngagementIndex instead of UserEngagementLog.
+# The Go worker logs views without writing the index, so switch this on only
+# once it dual-writes the index and backfill_engagement_index has run.
+ENGAGEMENT_INDEX_READS = os.getenv(
+    "ENGAGEMENT_INDEX_READS", ""
+).strip().lower() in ("1", "true", "yes", "on")
+
+# Rank trending interests by the decayed daily window by default instead of
+# the all-time score. Only the Python trending flush writes the decayed
+# windows; the Go worker's affinity and view-engagement handlers still bump
+# the all-time score alone, so switch this on once they write the windows too.
+TRENDING_DECAYED_WINDOWS = os.getenv(
+    "TRENDING_DECAYED_WINDOWS", ""
+).strip().lower() in ("1", "true", "yes", "on")
+
 MAILINGSERVICE = os.getenv("MAILINGSERVICE")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://chatterloop.app")
 
@@ -224,6 +263,40 @@ CELERY_STORE_ERRORS_EVEN_IF_IGNORED = False
 CELERY_BROKER_TRANSPORT_OPTIONS = {
     "max_connections": 4,
 }
+# autodiscover_tasks() only looks for <app>.tasks modules.
+CELERY_IMPORTS = ("newsfeed.scripts.calculate_ranking_score",)
+CELERY_BEAT_SCHEDULE = {
+    # Decay only changes scores over hours, so every 15 minutes keeps feed
+    # ordering current without rewriting rows that barely moved.
+    "rescore-decayed-posts": {
+        "task": "newsfeed.scripts.calculate_ranking_score.rescore_decayed_posts_task",
+        "schedule": 60 * 15,
+    },
+    # Flushes are normally scheduled by the first buffered event; this only
+    # sweeps up posts whose scheduled flush was lost with its worker, or found
+    # another flush holding the lock.
+    "flush-ranking-updates": {
+        "task": "newsfeed.scripts.calculate_ranking_score.flush_ranking_updates_task",
+        "schedule": 60,
+    },
+    # Likewise for the reaction and activity counters.
+    "flush-reaction-counters": {
+        "task": "newsfeed.scripts.calculate_ranking_score.flush_counters_task",
+        "schedule": 60,
+    },
+    # Flushes are normally scheduled by the first buffered delta; this only
+    # sweeps up a batch whose scheduled flush was lost with its worker.
+    "flush-interest-trending-scores": {
+        "task": "interests.tasks.flush_trending_scores_task",
+        "schedule": 60,
+    },
+    # Decays the hourly/daily trending windows and re-materializes their
+    # top-K lists (TOP_TRENDING_TTL outlives two of these).
+    "decay-trending-interests": {
+        "task": "interests.tasks.decay_trending_scores_task",
+        "schedule": 60 * 5,
+    },
+}
 
 CORS_ALLOWED_ORIGINS = []
 